@@ -125,13 +125,17 @@ export default function PositionParserClient() {
 
       const reader = response.body.getReader()
       const decoder = new TextDecoder()
+      let buffer = ''
+      let streamedCount = 0
 
       while (true) {
         const { done, value } = await reader.read()
         if (done) break
 
-        const chunk = decoder.decode(value, { stream: true })
-        const lines = chunk.split('\n')
+        // Keep any trailing partial line for the next chunk
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop() ?? ''
 
         for (const line of lines) {
           if (line.startsWith('data: ')) {
@@ -140,6 +144,9 @@ export default function PositionParserClient() {
 
               if (event.type === 'progress') {
                 setProgress(event.message)
+              } else if (event.type === 'position') {
+                streamedCount += 1
+                setProgress(`Extracted ${streamedCount} position(s)...`)
               } else if (event.type === 'result') {
                 setResult(event.data)
                 // Select all positions by default, all categories start as "uncategorized"
@@ -28,6 +28,12 @@ export interface SSEResultEvent {
   data: ParserResponse
 }
 
+/** SSE position event, sent as soon as each position is extracted */
+export interface SSEPositionEvent {
+  type: 'position'
+  data: PolicyPosition
+}
+
 /** SSE error event */
 export interface SSEErrorEvent {
   type: 'error'
@@ -35,4 +41,4 @@ export interface SSEErrorEvent {
 }
 
 /** Union of all SSE event types */
-export type SSEEvent = SSEProgressEvent | SSEResultEvent | SSEErrorEvent
+export type SSEEvent = SSEProgressEvent | SSEPositionEvent | SSEResultEvent | SSEErrorEvent
@@ -1,87 +1,1169 @@
 """Claude API integration for policy position analysis."""
 
+from __future__ import annotations
+
+import asyncio
+import hashlib
 import json
 import logging
 import re
-from typing import Any
+import time
+import uuid
+from typing import Any, AsyncIterator, Optional
 
 import anthropic
+from pydantic import ValidationError
 
-from prompts import SYSTEM_PROMPT
+from cache import ANALYSES, TieredCache, content_hash, make_key
+from incremental_json import PositionStreamParser, salvage_truncated
+from metrics import (
+    CONTINUATION_TOKENS,
+    CONTINUATIONS,
+    JSON_PARSE_SECONDS,
+    LLM_FIRST_TOKEN_SECONDS,
+    LLM_IN_FLIGHT,
+    LLM_SECONDS,
+    SOURCE_ANALYSES,
+    TOKENS,
+    stage,
+)
+from models import ParserResponse, PolicyPosition
+from prompts import CONTINUE_PROMPT, REDUCE_PROMPT, SYSTEM_PROMPT, TRIAGE_PROMPT
+from scheduler import BATCH, PriorityScheduler, RateLimits, current_priority
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 8192
+# Follow-up calls allowed when a response hits MAX_TOKENS
+MAX_CONTINUATIONS = 3
 
-def analyze_content(
-    content_map: dict[str, str],
-    api_key: str,
-) -> dict[str, Any]:
+# Content limits (Claude has ~200k context but we want to be safe)
+MAX_SOURCE_CHARS = 50000
+MAX_COMBINED_CHARS = 150000
+
+# Default chunk size for map-reduce analysis of content too large for one call
+DEFAULT_CHUNK_CHARS = 40000
+
+# Rough characters per token, for estimating a call's input tokens before sending it
+CHARS_PER_TOKEN = 4
+
+# Tool Claude is forced to call in structured output mode; its input schema
+# is the ParserResponse model, so the API enforces the response shape
+RESULT_TOOL_NAME = "record_positions"
+RESULT_TOOL = {
+    "name": RESULT_TOOL_NAME,
+    "description": "Record the politician's name and every policy position extracted from the sources.",
+    "input_schema": ParserResponse.model_json_schema(),
+}
+
+# Tool the triage model is forced to call with a policy-content score per source
+TRIAGE_TOOL_NAME = "score_sources"
+TRIAGE_TOOL = {
+    "name": TRIAGE_TOOL_NAME,
+    "description": "Record a policy-content score from 0 to 10 for every source.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "scores": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "integer"},
+                        "score": {"type": "number", "minimum": 0, "maximum": 10},
+                    },
+                    "required": ["index", "score"],
+                },
+            },
+        },
+        "required": ["scores"],
+    },
+}
+TRIAGE_MAX_TOKENS = 1024
+
+# Changes whenever a prompt changes, invalidating cached analyses
+PROMPT_VERSION = hashlib.sha256((SYSTEM_PROMPT + REDUCE_PROMPT + CONTINUE_PROMPT).encode()).hexdigest()[:12]
+
+
+def build_user_message(content_map: dict[str, str]) -> str:
     """
-    Analyze scraped content using Claude API to extract policy positions.
+    Build the user message sent to Claude from scraped content.
 
     Args:
         content_map: Dict mapping URLs to their scraped text content
-        api_key: Anthropic API key
 
     Returns:
-        Parsed JSON response with policy positions
-
-    Raises:
-        Exception: If API call fails or response cannot be parsed
+        User message containing the source URLs and their (truncated) content
     """
-    client = anthropic.Anthropic(api_key=api_key)
-
-    # Build the user message with all content
     urls = list(content_map.keys())
     combined_sections = []
 
     for url, content in content_map.items():
         # Truncate very long content per URL
-        truncated = content[:50000] if len(content) > 50000 else content
+        truncated = content[:MAX_SOURCE_CHARS] if len(content) > MAX_SOURCE_CHARS else content
         combined_sections.append(f"=== Source: {url} ===\n{truncated}")
 
     combined_text = "\n\n".join(combined_sections)
 
-    # Further truncate if total is too long (Claude has ~200k context but we want to be safe)
-    if len(combined_text) > 150000:
-        logger.warning(f"Content truncated from {len(combined_text)} to 150000 chars")
-        combined_text = combined_text[:150000] + "\n\n[Content truncated due to length]"
+    # Further truncate if total is too long
+    if len(combined_text) > MAX_COMBINED_CHARS:
+        logger.warning(f"Content truncated from {len(combined_text)} to {MAX_COMBINED_CHARS} chars")
+        combined_text = combined_text[:MAX_COMBINED_CHARS] + "\n\n[Content truncated due to length]"
 
-    user_message = f"Source URLs: {', '.join(urls)}\n\nContent:\n{combined_text}"
+    return f"Source URLs: {', '.join(urls)}\n\nContent:\n{combined_text}"
 
-    logger.info(f"Calling Claude API with {len(combined_text)} chars from {len(urls)} URL(s)")
 
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8192,
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_message}],
+def needs_chunking(content_map: dict[str, str]) -> bool:
+    """Whether content_map exceeds what a single call analyzes without truncation."""
+    total = sum(len(content) for content in content_map.values())
+    return total > MAX_COMBINED_CHARS or any(len(content) > MAX_SOURCE_CHARS for content in content_map.values())
+
+
+def split_sources(content_map: dict[str, str], chunk_chars: int = DEFAULT_CHUNK_CHARS) -> list[dict[str, str]]:
+    """
+    Split content into chunks for map-reduce analysis.
+
+    Each chunk is itself a content map holding part of a single source, so
+    positions extracted from it are attributed to the right URL. Sources are
+    split on line boundaries; a single overlong line is split hard.
+
+    Args:
+        content_map: Dict mapping URLs to their scraped text content
+        chunk_chars: Maximum characters per chunk
+
+    Returns:
+        List of single-source content maps
+    """
+    chunks: list[dict[str, str]] = []
+    for url, content in content_map.items():
+        current: list[str] = []
+        size = 0
+        for line in content.splitlines():
+            while len(line) > chunk_chars:
+                chunks.append({url: line[:chunk_chars]})
+                line = line[chunk_chars:]
+            if size + len(line) + 1 > chunk_chars and current:
+                chunks.append({url: "\n".join(current)})
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            chunks.append({url: "\n".join(current)})
+    return chunks
+
+
+def merge_results(results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Concatenate partial results without consolidation (reduce fallback)."""
+    merged: dict[str, Any] = {
+        "politician_name": next((r.get("politician_name") for r in results if r.get("politician_name")), None),
+        "positions": [position for r in results for position in r.get("positions", [])],
+    }
+    warnings = [warning for r in results for warning in (r.get("warnings") or [])]
+    if warnings:
+        merged["warnings"] = warnings
+    return merged
+
+
+def build_reduce_message(candidates: dict[str, Any], urls: list[str]) -> str:
+    """Build the user message for consolidating candidate positions."""
+    return (
+        f"Source URLs: {', '.join(urls)}\n\n"
+        f"Candidate positions:\n{json.dumps(candidates, indent=2)}"
+    )
+
+
+def build_request_params(
+    model: str,
+    user_message: str,
+    prompt_caching: bool = True,
+    system_prompt: str = SYSTEM_PROMPT,
+    structured_output: bool = False,
+) -> dict[str, Any]:
+    """
+    Build the keyword arguments for a messages API call (or a batch request's params).
+
+    With prompt_caching, the static system prompt is marked as a cache
+    breakpoint so repeated calls read it from the prompt cache instead of
+    reprocessing it. With structured_output, Claude must answer by calling
+    the record_positions tool, whose input follows the ParserResponse schema.
+    """
+    system: Any = system_prompt
+    if prompt_caching:
+        system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+    params: dict[str, Any] = {
+        "model": model,
+        "max_tokens": MAX_TOKENS,
+        "system": system,
+        "messages": [{"role": "user", "content": user_message}],
+    }
+    if structured_output:
+        params["tools"] = [RESULT_TOOL]
+        params["tool_choice"] = {"type": "tool", "name": RESULT_TOOL_NAME}
+    return params
+
+
+def build_triage_message(excerpts: dict[str, str]) -> str:
+    """Build the user message asking the triage model to score source excerpts."""
+    sections = [f"=== Source {index}: {url} ===\n{text}" for index, (url, text) in enumerate(excerpts.items())]
+    return "Score each source:\n\n" + "\n\n".join(sections)
+
+
+def parse_triage_scores(message: Any, urls: list[str]) -> dict[str, float]:
+    """Map the scores of a score_sources tool call back to URLs, skipping invalid entries."""
+    scores: dict[str, float] = {}
+    for block in message.content:
+        if block.type != "tool_use" or block.name != TRIAGE_TOOL_NAME:
+            continue
+        for item in block.input.get("scores") or []:
+            try:
+                index, score = int(item["index"]), float(item["score"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < len(urls):
+                scores[urls[index]] = max(0.0, min(10.0, score))
+    return scores
+
+
+def estimate_input_tokens(params: dict[str, Any]) -> int:
+    """Rough input token count of a messages API call, for rate-limit budgeting."""
+    chars = len(json.dumps(params["messages"])) + len(json.dumps(params.get("system", "")))
+    if "tools" in params:
+        chars += len(json.dumps(params["tools"]))
+    return chars // CHARS_PER_TOKEN
+
+
+class UsageStats:
+    """Running totals of token usage reported by the API."""
+
+    def __init__(self, backend: str = "realtime"):
+        self.backend = backend
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.cache_creation_input_tokens = 0
+        self.continuations = 0
+        self.continuation_output_tokens = 0
+
+    def record(self, usage: Any, label: str = "Claude API response", continuation: bool = False) -> None:
+        """Add one response's usage to the totals and log it."""
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+        self.calls += 1
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.cache_read_input_tokens += cache_read
+        self.cache_creation_input_tokens += cache_creation
+        for token_type, count in (
+            ("input", usage.input_tokens),
+            ("output", usage.output_tokens),
+            ("cache_read", cache_read),
+            ("cache_creation", cache_creation),
+        ):
+            TOKENS.labels(backend=self.backend, type=token_type).inc(count)
+            if continuation:
+                CONTINUATION_TOKENS.labels(backend=self.backend, type=token_type).inc(count)
+        if continuation:
+            self.continuations += 1
+            self.continuation_output_tokens += usage.output_tokens
+            CONTINUATIONS.labels(backend=self.backend).inc()
+        logger.info(
+            f"{label}: {usage.input_tokens} input tokens "
+            f"({cache_read} cache read, {cache_creation} cache write), "
+            f"{usage.output_tokens} output tokens"
         )
-    except anthropic.APIError as e:
-        logger.error(f"Claude API error: {type(e).__name__}: {e}")
-        raise
 
-    # Extract text content from response
-    response_text = message.content[0].text
-    logger.info(f"Claude API response: {message.usage.input_tokens} input tokens, {message.usage.output_tokens} output tokens")
+    def as_dict(self) -> dict[str, Any]:
+        """Totals plus the share of input tokens served from the prompt cache."""
+        total_input = self.input_tokens + self.cache_read_input_tokens + self.cache_creation_input_tokens
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "cache_hit_ratio": round(self.cache_read_input_tokens / total_input, 3) if total_input else 0.0,
+            "continuations": self.continuations,
+            "continuation_output_tokens": self.continuation_output_tokens,
+        }
+
+
+class Continuation:
+    """
+    A response generated over several calls because it kept hitting max_tokens.
+
+    Each truncated response contributes its completed positions. The next
+    call replays the original request followed by the positions recorded so
+    far and asks Claude for the remaining ones, so the system prompt and
+    source content stay an identical prefix that follow-up calls read from
+    the prompt cache.
+    """
+
+    def __init__(self, params: dict[str, Any], max_continuations: int = MAX_CONTINUATIONS):
+        self.params = params
+        self.max_continuations = max_continuations
+        self.parts: list[dict[str, Any]] = []
+
+    @property
+    def count(self) -> int:
+        """Continuation calls made so far."""
+        return len(self.parts)
 
-    # Try to parse JSON from response
+    def next_params(self, message: Any, raw_output: str) -> Optional[dict[str, Any]]:
+        """
+        Record a finished call and build the follow-up call, if one is needed.
+
+        Args:
+            message: Final message of the call
+            raw_output: JSON text the call produced (text or tool input, as streamed)
+
+        Returns:
+            Params for the next call, or None if the response is complete,
+            nothing could be salvaged or the continuation limit is reached
+        """
+        if message.stop_reason != "max_tokens" or self.count >= self.max_continuations:
+            return None
+        part = salvage_truncated(raw_output)
+        if part is None:
+            return None
+        self.parts.append(validate_result(part))
+
+        recorded = merge_results(self.parts)
+        instruction = CONTINUE_PROMPT.format(count=len(recorded["positions"]))
+        logger.info(
+            f"Response hit max_tokens, continuing ({self.count}/{self.max_continuations}) "
+            f"after {len(recorded['positions'])} position(s)"
+        )
+
+        messages = [self._cached(turn) for turn in self.params["messages"]]
+        tool_use = next((block for block in message.content if block.type == "tool_use"), None)
+        if tool_use is not None:
+            messages += [
+                {"role": "assistant", "content": [
+                    {"type": "tool_use", "id": tool_use.id, "name": RESULT_TOOL_NAME, "input": recorded},
+                ]},
+                {"role": "user", "content": [
+                    {"type": "tool_result", "tool_use_id": tool_use.id, "content": instruction},
+                ]},
+            ]
+        else:
+            messages += [
+                {"role": "assistant", "content": json.dumps(recorded)},
+                {"role": "user", "content": instruction},
+            ]
+        return {**self.params, "messages": messages}
+
+    def merge(self, result: dict[str, Any]) -> dict[str, Any]:
+        """Combine the recorded parts with the result of the final call."""
+        if not self.parts:
+            return result
+        return merge_results([*self.parts, result])
+
+    def _cached(self, turn: dict[str, Any]) -> dict[str, Any]:
+        """Mark the source content as a cache breakpoint when prompt caching is on."""
+        if not isinstance(self.params["system"], list) or not isinstance(turn["content"], str):
+            return turn
+        return {
+            "role": turn["role"],
+            "content": [{"type": "text", "text": turn["content"], "cache_control": {"type": "ephemeral"}}],
+        }
+
+
+def parse_response_text(response_text: str) -> dict[str, Any]:
+    """
+    Parse Claude's text response into a result dict.
+
+    Args:
+        response_text: Raw text returned by Claude
+
+    Returns:
+        Parsed JSON response, or a structured error response if it is not valid JSON
+    """
+    with stage("parse_json", JSON_PARSE_SECONDS):
+        return _parse_response_text(response_text)
+
+
+def _parse_response_text(response_text: str) -> dict[str, Any]:
     # Sometimes Claude wraps JSON in markdown code blocks
     json_match = re.search(r"```(?:json)?\s*(\{[\s\S]*\})\s*```", response_text)
     if json_match:
         response_text = json_match.group(1)
 
     try:
-        result = json.loads(response_text)
-        logger.info(f"Successfully parsed response: {result.get('politician_name', 'Unknown')}")
+        result = validate_result(json.loads(response_text))
+        logger.info(f"Successfully parsed response: {result.get('politician_name') or 'Unknown'}")
         return result
     except json.JSONDecodeError as e:
+        salvaged = salvage_truncated(response_text)
+        if salvaged is not None:
+            salvaged = validate_result(salvaged)
+            count = len(salvaged["positions"])
+            logger.warning(f"Claude response was cut off ({e}), recovered {count} completed position(s)")
+            salvaged["warnings"] = [
+                f"The analysis was cut off before it finished; recovered {count} completed position(s)."
+            ]
+            return salvaged
         logger.error(f"Failed to parse Claude response as JSON: {e}")
         logger.debug(f"Raw response: {response_text[:500]}...")
-        # Return a structured error response
         return {
             "politician_name": None,
             "positions": [],
             "warnings": [f"Failed to parse Claude response as JSON: {str(e)}"],
         }
+
+
+def parse_tool_input(tool_input: Any, truncated: bool = False) -> dict[str, Any]:
+    """
+    Validate the input of a record_positions tool call into a result dict.
+
+    The API enforces the tool's schema, so this normally just validates. If
+    the call was cut off or still fails validation, positions that are
+    individually valid are kept instead of discarding the whole response.
+
+    Args:
+        tool_input: Input of the tool_use block
+        truncated: Whether generation stopped at max_tokens
+
+    Returns:
+        Result dict in the ParserResponse shape
+    """
+    with stage("parse_json", JSON_PARSE_SECONDS):
+        try:
+            result = ParserResponse.model_validate(tool_input).model_dump(exclude_none=True)
+            if truncated:
+                result["warnings"] = (result.get("warnings") or []) + [
+                    "The analysis was cut off before it finished; some positions may be missing."
+                ]
+            logger.info(f"Successfully parsed tool response: {result.get('politician_name') or 'Unknown'}")
+            return result
+        except ValidationError as e:
+            logger.warning(f"Tool response failed validation, keeping valid positions: {e.error_count()} error(s)")
+        return keep_valid_positions(tool_input)
+
+
+def validate_result(data: Any) -> dict[str, Any]:
+    """
+    Bring a response parsed from text into the ParserResponse shape.
+
+    Every analysis path returns (and caches) results in this shape, as
+    dumped with exclude_none, whether Claude answered with a tool call or
+    with text. Positions that fail validation are dropped with a warning.
+    """
+    try:
+        return ParserResponse.model_validate(data).model_dump(exclude_none=True)
+    except ValidationError as e:
+        logger.warning(f"Response failed validation, keeping valid positions: {e.error_count()} error(s)")
+    return keep_valid_positions(data)
+
+
+def keep_valid_positions(data: Any) -> dict[str, Any]:
+    """Result dict holding the positions of a malformed response that are individually valid."""
+    data = data if isinstance(data, dict) else {}
+    positions = []
+    for item in data.get("positions") or []:
+        try:
+            positions.append(PolicyPosition.model_validate(item).model_dump(exclude_none=True))
+        except ValidationError:
+            logger.debug(f"Skipping malformed position: {item}")
+    name = data.get("politician_name")
+    return {
+        "politician_name": name if isinstance(name, str) else None,
+        "positions": positions,
+        "warnings": [
+            f"Claude's response was incomplete or malformed; recovered {len(positions)} valid position(s)."
+        ],
+    }
+
+
+def parse_message(message: Any) -> dict[str, Any]:
+    """
+    Parse a complete Claude message into a result dict.
+
+    Uses the record_positions tool call when the message has one (structured
+    output mode), otherwise the message text.
+
+    Args:
+        message: Message returned by the messages API
+
+    Returns:
+        Parsed result dict
+    """
+    truncated = message.stop_reason == "max_tokens"
+    if truncated:
+        logger.warning(f"Claude response hit the {MAX_TOKENS} token limit")
+
+    for block in message.content:
+        if block.type == "tool_use" and block.name == RESULT_TOOL_NAME:
+            return parse_tool_input(block.input, truncated)
+    return parse_response_text("".join(block.text for block in message.content if block.type == "text"))
+
+
+def parse_output(message: Any, output: str) -> dict[str, Any]:
+    """
+    Parse the final message of a streamed call into a result dict.
+
+    A response cut off at max_tokens is parsed from the output as it
+    streamed (tool input or text), because the tool input of a truncated
+    call may be empty; completed positions are salvaged from it.
+
+    Args:
+        message: Final message of the call
+        output: Tool input JSON or text accumulated from the stream
+
+    Returns:
+        Parsed result dict
+    """
+    if message.stop_reason == "max_tokens":
+        logger.warning(f"Claude response hit the {MAX_TOKENS} token limit")
+        return parse_response_text(output)
+    return parse_message(message)
+
+
+def stream_delta(event: Any) -> Optional[str]:
+    """Output text carried by a stream event: partial tool input JSON or answer text."""
+    if event.type == "input_json":
+        return event.partial_json
+    if event.type == "text":
+        return event.text
+    return None
+
+
+def analysis_cache_key(content_map: dict[str, str], model: str) -> str:
+    """
+    Generate a content-addressed cache key for an analysis.
+
+    The key depends only on the scraped text, the prompt and the model, so an
+    unchanged set of pages hits the cache even when reached through different
+    URLs, and any change to a page produces a new key.
+    """
+    hashes = sorted(content_hash(content) for content in content_map.values())
+    return make_key(hashes, PROMPT_VERSION, model)
+
+
+def unfiltered_sources(content_map: dict[str, str], raw_map: Optional[dict[str, str]] = None) -> dict[str, str]:
+    """
+    The unfiltered text of content_map's sources, which cache keys are derived from.
+
+    Pre-analysis filtering (see dedup.BoilerplateFilter) depends on what else
+    has been parsed, so the same page can be sent to Claude as different
+    text over time; keying on the scraped text keeps the analysis of an
+    unchanged page reusable.
+
+    Args:
+        content_map: Dict mapping URLs to the (filtered) text to analyze
+        raw_map: Dict mapping URLs to their scraped text before filtering;
+            None if content_map is unfiltered
+
+    Returns:
+        Dict mapping each URL of content_map to its unfiltered text
+    """
+    if raw_map is None:
+        return content_map
+    return {url: raw_map.get(url, content) for url, content in content_map.items()}
+
+
+def source_hashes(content_map: dict[str, str]) -> dict[str, str]:
+    """Map each source's content hash to its URL, for rebasing cached results."""
+    return {content_hash(content): url for url, content in content_map.items()}
+
+
+def rebase_source_urls(
+    result: dict[str, Any],
+    cached_sources: dict[str, str],
+    content_map: dict[str, str],
+) -> dict[str, Any]:
+    """
+    Rewrite source_urls of a cached result to the URLs of the current request.
+
+    Args:
+        result: Cached analysis result
+        cached_sources: Content hash to URL mapping stored with the result
+        content_map: Content of the current request
+
+    Returns:
+        The result with each position's source_urls pointing at current URLs
+    """
+    current = source_hashes(content_map)
+    url_map = {url: current.get(digest, url) for digest, url in cached_sources.items()}
+    for position in result.get("positions", []):
+        position["source_urls"] = [url_map.get(url, url) for url in position.get("source_urls", [])]
+    return result
+
+
+def analyze_content(
+    content_map: dict[str, str],
+    api_key: str,
+    max_continuations: int = MAX_CONTINUATIONS,
+) -> dict[str, Any]:
+    """
+    Analyze scraped content using Claude API to extract policy positions.
+
+    This is the blocking variant, kept for scripts. The server uses
+    AsyncAnalyzer so a long analysis never stalls the event loop.
+
+    Args:
+        content_map: Dict mapping URLs to their scraped text content
+        api_key: Anthropic API key
+        max_continuations: Follow-up calls allowed when the response hits max_tokens
+
+    Returns:
+        Parsed JSON response with policy positions
+
+    Raises:
+        Exception: If API call fails or response cannot be parsed
+    """
+    client = anthropic.Anthropic(api_key=api_key)
+    user_message = build_user_message(content_map)
+    params: Optional[dict[str, Any]] = build_request_params(DEFAULT_MODEL, user_message)
+    continuation = Continuation(params, max_continuations)
+    usage = UsageStats()
+
+    logger.info(f"Calling Claude API with {len(user_message)} chars from {len(content_map)} URL(s)")
+
+    while params is not None:
+        # Streamed so a response cut off mid-tool-call keeps its partial input
+        output = []
+        try:
+            with client.messages.stream(**params) as stream:
+                for event in stream:
+                    text = stream_delta(event)
+                    if text is not None:
+                        output.append(text)
+                message = stream.get_final_message()
+        except anthropic.APIError as e:
+            logger.error(f"Claude API error: {type(e).__name__}: {e}")
+            raise
+        usage.record(message.usage, continuation=continuation.count > 0)
+        params = continuation.next_params(message, "".join(output))
+
+    return continuation.merge(parse_output(message, "".join(output)))
+
+
+class AsyncAnalyzer:
+    """
+    Non-blocking analysis engine built on AsyncAnthropic.
+
+    A single instance is shared for the lifetime of the application so that
+    every request reuses the same HTTP connection pool. A PriorityScheduler
+    bounds the number of Claude calls in flight: additional calls wait their
+    turn without blocking the event loop, interactive parses ahead of batch
+    jobs, with reserved_slots kept free for interactive parses. With
+    rate_limits, the API's rate-limit headers are tracked and batch calls
+    are held back before they would exhaust the per-minute budgets.
+
+    Content too large for one call is analyzed map-reduce style when chunked
+    is enabled: chunks are analyzed in parallel, then a reduce call on the
+    (much smaller) candidate positions consolidates duplicates per topic.
+    Responses that hit max_tokens are continued with up to max_continuations
+    follow-up calls and merged.
+
+    With incremental enabled (and a cache), batch work with several sources
+    is analyzed one source at a time and each source's result is stored
+    under its content hash. Re-parsing a politician then only sends new or
+    changed sources to Claude; the reduce call consolidates their positions
+    with the stored ones of unchanged sources. Interactive parses take that
+    path only when stored results of some of their sources exist; otherwise
+    a single streamed call returns the first positions sooner and costs less.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrency: int = 4,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 300.0,
+        base_url: Optional[str] = None,
+        prompt_caching: bool = True,
+        chunked: bool = True,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+        reduce_model: Optional[str] = None,
+        structured_output: bool = True,
+        max_continuations: int = MAX_CONTINUATIONS,
+        incremental: bool = True,
+        cache: Optional[TieredCache] = None,
+        reserved_slots: int = 0,
+        rate_limits: Optional[RateLimits] = None,
+    ):
+        self.model = model
+        self.reduce_model = reduce_model or model
+        self.chunked = chunked
+        self.chunk_chars = chunk_chars
+        self.prompt_caching = prompt_caching
+        self.structured_output = structured_output
+        self.max_continuations = max_continuations
+        self.incremental = incremental
+        self.cache = cache
+        self.usage = UsageStats()
+        self.scheduler = PriorityScheduler("llm", max_concurrency, reserved=reserved_slots, rate_limits=rate_limits)
+        http_client = None
+        if rate_limits is not None:
+            http_client = anthropic.DefaultAsyncHttpxClient(event_hooks={"response": [rate_limits.observe]})
+        self._client = anthropic.AsyncAnthropic(
+            api_key=api_key, timeout=timeout, base_url=base_url, http_client=http_client
+        )
+
+    def cache_key(self, content_map: dict[str, str], raw_map: Optional[dict[str, str]] = None) -> str:
+        """
+        Cache key for analyzing content_map with this analyzer's configuration.
+
+        The key is derived from the sources' unfiltered text (see
+        unfiltered_sources). Multi-source analyses share one key whether they
+        ran per source or as one call (see per_source).
+        """
+        sources = unfiltered_sources(content_map, raw_map)
+        if self.is_incremental(content_map):
+            return analysis_cache_key(sources, f"{self.model}/{self.reduce_model}/incremental")
+        if self.chunked and needs_chunking(content_map):
+            return analysis_cache_key(sources, f"{self.model}/{self.reduce_model}/{self.chunk_chars}")
+        return analysis_cache_key(sources, self.model)
+
+    async def analyze(self, content_map: dict[str, str]) -> dict[str, Any]:
+        """
+        Analyze scraped content using Claude API to extract policy positions.
+
+        Args:
+            content_map: Dict mapping URLs to their scraped text content
+
+        Returns:
+            Parsed JSON response with policy positions
+
+        Raises:
+            anthropic.APIError: If the API call fails
+        """
+        if await self.per_source(content_map):
+            return await self.analyze_incremental(content_map)
+        if self.chunked and needs_chunking(content_map):
+            return await self.analyze_chunked(content_map)
+        return await self._analyze_single(content_map)
+
+    def is_incremental(self, content_map: dict[str, str]) -> bool:
+        """Whether content_map may be analyzed source by source (see per_source)."""
+        return self.incremental and self.cache is not None and len(content_map) > 1
+
+    async def per_source(self, content_map: dict[str, str]) -> bool:
+        """
+        Whether to analyze content_map source by source.
+
+        Batch work always is, so its per-source results build up for later
+        re-parses. Interactive work only is when a stored result of one of
+        its sources can be reused: on a cold cache a call per source plus a
+        reduce call costs more than one call and cannot be streamed. Stored
+        results are looked up under the keys analyze_incremental stores them
+        under, those of the text each source would be analyzed as.
+        """
+        if not self.is_incremental(content_map):
+            return False
+        if current_priority() == BATCH:
+            return True
+        keys = [self.cache_key({url: content}) for url, content in content_map.items()]
+        entries = await asyncio.gather(*[self.cache.get(ANALYSES, key) for key in keys])
+        return any(entry is not None for entry in entries)
+
+    async def analyze_incremental(self, content_map: dict[str, str]) -> dict[str, Any]:
+        """
+        Analyze each source on its own, reusing stored results of unchanged sources.
+
+        A source's result is cached under a content-addressed key of the text
+        that was analyzed, after pre-analysis filtering: filtering drops lines
+        repeated in other sources of the request, so the same page can be
+        analyzed as different text depending on what it was parsed with. When
+        nothing was filtered out, the key is that of a single-URL request for
+        the page, so results from either kind of request are reused, whatever
+        URL the content was reached through.
+
+        Args:
+            content_map: Dict mapping URLs to the (filtered) text to analyze
+
+        Returns:
+            Consolidated response with policy positions from every source
+
+        Raises:
+            anthropic.APIError: If analyzing a changed source fails
+        """
+        urls = list(content_map)
+        sources = {url: {url: content} for url, content in content_map.items()}
+        keys = {url: self.cache_key(sources[url]) for url in urls}
+        entries = await asyncio.gather(*[self.cache.get(ANALYSES, keys[url]) for url in urls])
+
+        partials: dict[str, dict[str, Any]] = {}
+        for url, entry in zip(urls, entries):
+            if entry is not None:
+                partials[url] = rebase_source_urls(entry["result"], entry["sources"], sources[url])
+        changed = [url for url in urls if url not in partials]
+        logger.info(f"Incremental analysis: {len(changed)} of {len(urls)} source(s) new or changed")
+        SOURCE_ANALYSES.labels(result="reused").inc(len(partials))
+        SOURCE_ANALYSES.labels(result="analyzed").inc(len(changed))
+
+        results = await asyncio.gather(*[self.analyze(sources[url]) for url in changed])
+        for url, result in zip(changed, results):
+            partials[url] = result
+            # A source may legitimately hold no positions, but failed parses are not stored
+            if result.get("positions") or not result.get("warnings"):
+                entry = {"result": result, "sources": source_hashes(sources[url])}
+                await self.cache.set(ANALYSES, keys[url], entry, url=url)
+
+        return await self._reduce([partials[url] for url in urls], urls)
+
+    async def score_sources(self, excerpts: dict[str, str], model: str) -> dict[str, float]:
+        """
+        Score source excerpts for policy content in one call to a small, fast model.
+
+        Args:
+            excerpts: Dict mapping URLs to the start of their scraped text
+            model: Triage model
+
+        Returns:
+            Dict mapping URLs to scores from 0 to 10; sources the model skipped are missing
+
+        Raises:
+            anthropic.APIError: If the API call fails
+        """
+        params = build_request_params(model, build_triage_message(excerpts), False, system_prompt=TRIAGE_PROMPT)
+        params.update(
+            max_tokens=TRIAGE_MAX_TOKENS,
+            tools=[TRIAGE_TOOL],
+            tool_choice={"type": "tool", "name": TRIAGE_TOOL_NAME},
+        )
+
+        async with self.scheduler.slot(estimate_input_tokens(params)):
+            logger.info(f"Scoring {len(excerpts)} source(s) for policy content with {model}")
+            with LLM_IN_FLIGHT.track_inprogress(), stage("llm.triage", LLM_SECONDS, call="triage", model=model):
+                message = await self._client.messages.create(**params)
+
+        self.usage.record(message.usage, label="Triage response")
+        return parse_triage_scores(message, list(excerpts))
+
+    async def analyze_chunked(self, content_map: dict[str, str]) -> dict[str, Any]:
+        """
+        Analyze large content map-reduce style instead of truncating it.
+
+        Args:
+            content_map: Dict mapping URLs to their scraped text content
+
+        Returns:
+            Consolidated response with policy positions from every chunk
+
+        Raises:
+            anthropic.APIError: If a map call fails
+        """
+        chunks = split_sources(content_map, self.chunk_chars)
+        logger.info(f"Map-reduce analysis: {len(chunks)} chunk(s) from {len(content_map)} URL(s)")
+
+        partials = await asyncio.gather(*[self._analyze_single(chunk) for chunk in chunks])
+        return await self._reduce(list(partials), list(content_map.keys()))
+
+    async def _reduce(self, partials: list[dict[str, Any]], urls: list[str]) -> dict[str, Any]:
+        """Consolidate partial results into one, falling back to concatenation on failure."""
+        merged = merge_results(partials)
+        if len(partials) < 2 or len(merged["positions"]) < 2:
+            return merged
+
+        candidates = {"politician_name": merged["politician_name"], "positions": merged["positions"]}
+        params = build_request_params(
+            self.reduce_model,
+            build_reduce_message(candidates, urls),
+            self.prompt_caching,
+            system_prompt=REDUCE_PROMPT,
+            structured_output=self.structured_output,
+        )
+
+        logger.info(f"Reducing {len(merged['positions'])} candidate positions with {self.reduce_model}")
+        try:
+            reduced, truncated = await self._complete(params, "reduce", self.reduce_model, label="Reduce response")
+        except anthropic.APIError as e:
+            logger.error(f"Reduce call failed, returning unconsolidated positions: {type(e).__name__}: {e}")
+            return merged
+
+        if truncated:
+            # A cut-off reduce output lacks the positions after the cut
+            logger.warning("Reduce step was cut off, returning unconsolidated positions")
+            merged["warnings"] = (merged.get("warnings") or []) + [
+                "Consolidating positions across sources was cut off; some may be duplicates."
+            ]
+            return merged
+
+        if not reduced.get("positions"):
+            logger.warning("Reduce step returned no positions, returning unconsolidated positions")
+            return merged
+
+        reduced["politician_name"] = reduced.get("politician_name") or merged["politician_name"]
+        if merged.get("warnings"):
+            reduced["warnings"] = (reduced.get("warnings") or []) + merged["warnings"]
+        return reduced
+
+    async def _analyze_single(self, content_map: dict[str, str]) -> dict[str, Any]:
+        """Analyze content in one Claude call."""
+        user_message = build_user_message(content_map)
+        params = build_request_params(
+            self.model, user_message, self.prompt_caching, structured_output=self.structured_output
+        )
+        logger.info(f"Calling Claude API with {len(user_message)} chars from {len(content_map)} URL(s)")
+        try:
+            result, _ = await self._complete(params, "analyze", self.model)
+            return result
+        except anthropic.APIError as e:
+            logger.error(f"Claude API error: {type(e).__name__}: {e}")
+            raise
+
+    async def _complete(
+        self,
+        params: Optional[dict[str, Any]],
+        call: str,
+        model: str,
+        label: str = "Claude API response",
+    ) -> tuple[dict[str, Any], bool]:
+        """
+        Run a call to completion, continuing it while it hits max_tokens.
+
+        The call is streamed (though not forwarded) so a response cut off
+        mid-tool-call keeps its partial input to salvage positions from.
+
+        Returns:
+            The merged result, and whether the last call still hit max_tokens
+        """
+        continuation = Continuation(params, self.max_continuations)
+
+        while params is not None:
+            async with self.scheduler.slot(estimate_input_tokens(params)):
+                output = []
+                with LLM_IN_FLIGHT.track_inprogress(), stage(f"llm.{call}", LLM_SECONDS, call=call, model=model):
+                    async with self._client.messages.stream(**params) as stream:
+                        async for event in stream:
+                            text = stream_delta(event)
+                            if text is not None:
+                                output.append(text)
+                        message = await stream.get_final_message()
+
+            self.usage.record(message.usage, label=label, continuation=continuation.count > 0)
+            params = continuation.next_params(message, "".join(output))
+
+        result = continuation.merge(parse_output(message, "".join(output)))
+        return result, message.stop_reason == "max_tokens"
+
+    async def analyze_stream(self, content_map: dict[str, str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Analyze scraped content, yielding positions as soon as Claude finishes each one.
+
+        The model output is fed through an incremental JSON parser while it
+        streams, so callers can forward positions long before generation ends.
+
+        Args:
+            content_map: Dict mapping URLs to their scraped text content
+
+        Yields:
+            ("position", position_dict) for each completed position, then
+            ("result", result_dict) once the full response has been parsed
+
+        Raises:
+            anthropic.APIError: If the API call fails
+        """
+        if await self.per_source(content_map) or (self.chunked and needs_chunking(content_map)):
+            # Per-source and chunk results are only final after the reduce step
+            result = await self.analyze(content_map)
+            for position in result.get("positions", []):
+                yield "position", position
+            yield "result", result
+            return
+
+        user_message = build_user_message(content_map)
+        params: Optional[dict[str, Any]] = build_request_params(
+            self.model, user_message, self.prompt_caching, structured_output=self.structured_output
+        )
+        continuation = Continuation(params, self.max_continuations)
+
+        while params is not None:
+            parser = PositionStreamParser()
+            async with self.scheduler.slot(estimate_input_tokens(params)):
+                logger.info(f"Streaming Claude API call with {len(user_message)} chars from {len(content_map)} URL(s)")
+                try:
+                    with LLM_IN_FLIGHT.track_inprogress(), stage("llm.stream", LLM_SECONDS, call="stream", model=self.model):
+                        started = time.perf_counter()
+                        first_token = True
+                        async with self._client.messages.stream(**params) as stream:
+                            async for event in stream:
+                                # Tool input arrives as partial JSON, plain answers as text
+                                text = stream_delta(event)
+                                if text is None:
+                                    continue
+                                if first_token:
+                                    LLM_FIRST_TOKEN_SECONDS.labels(model=self.model).observe(time.perf_counter() - started)
+                                    first_token = False
+                                for item in parser.feed(text):
+                                    try:
+                                        position = PolicyPosition.model_validate(item)
+                                    except ValidationError:
+                                        logger.debug(f"Skipping malformed streamed position: {item}")
+                                        continue
+                                    yield "position", position.model_dump(exclude_none=True)
+                            message = await stream.get_final_message()
+                except anthropic.APIError as e:
+                    logger.error(f"Claude API error: {type(e).__name__}: {e}")
+                    raise
+
+            self.usage.record(message.usage, continuation=continuation.count > 0)
+            # The raw stream keeps every completed position, even mid-tool-call
+            params = continuation.next_params(message, parser.text)
+
+        yield "result", continuation.merge(parse_output(message, parser.text))
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.close()
+
+
+class BatchAnalyzer:
+    """
+    Offline analysis backend built on the Message Batches API.
+
+    Exposes the same analyze() interface as AsyncAnalyzer. Concurrent calls
+    are collected into one Message Batch, which is submitted once it reaches
+    max_batch_size requests or flush_interval seconds after the first request.
+    Each call resolves when the batch ends and its result has been matched
+    back by custom_id. Batches trade latency (minutes to hours) for lower
+    cost and higher throughput, so this backend suits bulk re-audits.
+
+    Batch requests ask for free-text JSON rather than a record_positions
+    tool call: a result cut off at max_tokens arrives whole, not streamed,
+    and a truncated tool call has no input to recover positions from.
+    Requests whose result hit max_tokens are continued in the next batch.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DEFAULT_MODEL,
+        max_batch_size: int = 100,
+        flush_interval: float = 10.0,
+        poll_interval: float = 30.0,
+        base_url: Optional[str] = None,
+        prompt_caching: bool = True,
+        max_continuations: int = MAX_CONTINUATIONS,
+    ):
+        self.model = model
+        self.prompt_caching = prompt_caching
+        self.max_continuations = max_continuations
+        self.usage = UsageStats("message_batch")
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self._client = anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url)
+        self._pending: dict[str, tuple[dict[str, Any], asyncio.Future]] = {}
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def cache_key(self, content_map: dict[str, str], raw_map: Optional[dict[str, str]] = None) -> str:
+        """Cache key for analyzing content_map with this analyzer's configuration (see AsyncAnalyzer.cache_key)."""
+        return analysis_cache_key(unfiltered_sources(content_map, raw_map), self.model)
+
+    async def analyze(self, content_map: dict[str, str]) -> dict[str, Any]:
+        """
+        Analyze scraped content as part of the next Message Batch.
+
+        Args:
+            content_map: Dict mapping URLs to their scraped text content
+
+        Returns:
+            Parsed JSON response with policy positions
+
+        Raises:
+            anthropic.APIError: If submitting or polling the batch fails
+            RuntimeError: If this request errored, expired or was canceled in the batch
+        """
+        params: Optional[dict[str, Any]] = build_request_params(
+            self.model, build_user_message(content_map), self.prompt_caching
+        )
+        continuation = Continuation(params, self.max_continuations)
+        while params is not None:
+            message = await self._submit(params)
+            self.usage.record(message.usage, label="Batch result", continuation=continuation.count > 0)
+            output = "".join(block.text for block in message.content if block.type == "text")
+            params = continuation.next_params(message, output)
+
+        return continuation.merge(parse_output(message, output))
+
+    async def _submit(self, params: dict[str, Any]) -> Any:
+        """Queue one request for the next batch and wait for its message."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending[uuid.uuid4().hex] = (params, future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.flush_interval, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Submit all pending requests as one batch."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+
+        requests, self._pending = self._pending, {}
+        task = asyncio.create_task(self._run_batch(requests))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, requests: dict[str, tuple[dict[str, Any], asyncio.Future]]) -> None:
+        """Submit a batch, wait for it to end and resolve each request's future."""
+        futures = {custom_id: future for custom_id, (_, future) in requests.items()}
+        try:
+            batch = await self._client.messages.batches.create(
+                requests=[
+                    {"custom_id": custom_id, "params": params}
+                    for custom_id, (params, _) in requests.items()
+                ]
+            )
+            logger.info(f"Submitted message batch {batch.id} with {len(requests)} request(s)")
+            submitted = time.perf_counter()
+
+            while batch.processing_status != "ended":
+                await asyncio.sleep(self.poll_interval)
+                batch = await self._client.messages.batches.retrieve(batch.id)
+
+            LLM_SECONDS.labels(call="batch", model=self.model).observe(time.perf_counter() - submitted)
+            counts = batch.request_counts
+            logger.info(
+                f"Message batch {batch.id} ended: {counts.succeeded} succeeded, {counts.errored} errored, "
+                f"{counts.expired} expired, {counts.canceled} canceled"
+            )
+
+            async for entry in await self._client.messages.batches.results(batch.id):
+                future = futures.pop(entry.custom_id, None)
+                if future is None or future.done():
+                    continue
+                if entry.result.type == "succeeded":
+                    future.set_result(entry.result.message)
+                else:
+                    future.set_exception(RuntimeError(f"Batch request {entry.result.type}"))
+
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch request missing from results"))
+
+        except Exception as e:
+            logger.error(f"Message batch failed: {type(e).__name__}: {e}")
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Only reached with unresolved futures if the batch task was cancelled
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch analyzer closed"))
+
+    async def close(self) -> None:
+        """Stop outstanding batches and close the underlying HTTP client."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Batch analyzer closed"))
+        self._pending = {}
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._client.close()
@@ -0,0 +1,148 @@
+"""
+Benchmark: recovery of responses cut off at max_tokens, on every analysis path.
+
+Starts two fake Anthropic APIs, one answering in full and one cutting every
+reply off after --truncate-after characters with stop_reason max_tokens (a
+truncated tool call arrives with empty input, as it can from the real API).
+Then runs each analysis path against both with structured output:
+
+  stream      AsyncAnalyzer.analyze_stream, one source in one call
+  single      AsyncAnalyzer.analyze, one source in one call
+  chunked     AsyncAnalyzer.analyze_chunked, a call per chunk plus a reduce
+  per_source  AsyncAnalyzer.analyze as batch work, a call per source plus a reduce
+  blocking    analyze_content, the blocking variant (text output), one source
+  batch       BatchAnalyzer.analyze, one source in a Message Batch (text output)
+
+and reports the positions each path returns with and without truncation,
+and how many calls were continued. Exits non-zero if a path recovers fewer
+positions from truncated replies than from full ones.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_continuation
+    python -m benchmarks.bench_continuation --truncate-after 200 --sources 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from analyzer import AsyncAnalyzer, BatchAnalyzer, analyze_content
+from cache import TieredCache
+from scheduler import BATCH, work_class
+from store import SQLiteStore
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+SOURCE_TEXT = (
+    "Senator Example supports expanding rural broadband, opposes new federal fuel taxes "
+    "and has sponsored bills to cap insulin prices for seniors. "
+) * 20
+
+PATHS = ("stream", "single", "chunked", "per_source", "blocking", "batch")
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def run_path(path: str, content_map: dict[str, str], base_url: str) -> dict[str, Any]:
+    """Analyze content_map once along one path, with a fresh analyzer and cache."""
+    first_source = dict(list(content_map.items())[:1])
+    if path == "blocking":
+        os.environ["ANTHROPIC_BASE_URL"] = base_url
+        result = await asyncio.to_thread(analyze_content, first_source, "test")
+        return {"positions": len(result.get("positions", [])), "continued": None}
+    if path == "batch":
+        batch_analyzer = BatchAnalyzer(api_key="test", base_url=base_url, flush_interval=0.05, poll_interval=0.1)
+        try:
+            result = await batch_analyzer.analyze(first_source)
+        finally:
+            await batch_analyzer.close()
+        return {"positions": len(result.get("positions", [])), "continued": batch_analyzer.usage.continuations}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = SQLiteStore(f"{cache_dir}/store.db")
+        analyzer = AsyncAnalyzer(
+            api_key="test",
+            base_url=base_url,
+            chunk_chars=len(SOURCE_TEXT) + 100,  # One source per chunk
+            incremental=path == "per_source",
+            cache=TieredCache(store),
+        )
+        try:
+            if path == "stream":
+                result = [data async for kind, data in analyzer.analyze_stream(first_source) if kind == "result"][0]
+            elif path == "single":
+                result = await analyzer.analyze(first_source)
+            elif path == "chunked":
+                result = await analyzer.analyze_chunked(content_map)
+            else:
+                with work_class(BATCH):
+                    result = await analyzer.analyze(content_map)
+        finally:
+            await analyzer.close()
+            store.close()
+    return {"positions": len(result.get("positions", [])), "continued": analyzer.usage.continuations}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--truncate-after", type=int, default=300, help="Characters before replies are cut off")
+    parser.add_argument("--sources", type=int, default=2, help="Sources for the chunked and per-source paths")
+    parser.add_argument("--port", type=int, default=9261, help="Ports for the fake APIs: full, +1 truncated")
+    args = parser.parse_args()
+
+    content_map = {f"https://example.org/source{index}": f"Source {index}\n{SOURCE_TEXT}" for index in range(args.sources)}
+    fakes = {}
+    for name, port, truncate_after in (("full", args.port, 0), ("truncated", args.port + 1, args.truncate_after)):
+        fakes[name] = (f"http://127.0.0.1:{port}", subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.fake_anthropic", "--port", str(port),
+                "--first-token-latency", "0.05", "--tokens-per-second", "5000",
+                "--truncate-after", str(truncate_after), "--batch-latency", "0.1",
+            ],
+            cwd=SERVER_DIR,
+            env=os.environ.copy(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ))
+    try:
+        for base_url, _ in fakes.values():
+            await wait_ready(f"{base_url}/stats")
+        report = {
+            path: {name: await run_path(path, content_map, base_url) for name, (base_url, _) in fakes.items()}
+            for path in PATHS
+        }
+    finally:
+        for _, process in fakes.values():
+            process.terminate()
+            process.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    short = [path for path, runs in report.items() if runs["truncated"]["positions"] < runs["full"]["positions"]]
+    if short:
+        raise SystemExit(f"Positions lost to truncation on: {', '.join(short)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
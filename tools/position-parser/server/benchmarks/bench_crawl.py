@@ -0,0 +1,127 @@
+"""
+Benchmark: discovery crawl from a homepage to its policy pages.
+
+Starts the fake site (benchmarks/fake_site.py), whose /site/ tree is a
+campaign site: a homepage linking to an issues index, six issue pages, an
+"on the record" page and pages without policy content (about, donate,
+news), plus a private area disallowed by robots.txt. Then scrapes the
+homepage once per mode:
+
+  homepage  the homepage alone, as without crawl
+  links     links followed breadth-first from the homepage
+  sitemap   policy pages taken from the sitemap (the fast path)
+
+and reports the pages found, whether every policy page was among them, the
+requests made to the site, whether robots.txt was honored and the latency.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_crawl
+    python -m benchmarks.bench_crawl --latency 0.2 --max-pages 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from crawler import SiteCrawler
+from scraper import Scraper
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+SITE_DIR = SERVER_DIR / "benchmarks" / "fixtures" / "site"
+
+POLICY_PAGES = [
+    f"site/issues/{path.stem}" for path in sorted((SITE_DIR / "issues").glob("*.html"))
+] + ["site/on-the-record"]
+
+MODES = ("homepage", "links", "sitemap")
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def site_stats(base_url: str) -> dict[str, int]:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{base_url}/stats")).json()
+
+
+async def run_mode(mode: str, args: argparse.Namespace, base_url: str) -> dict[str, Any]:
+    """Scrape the fake site's homepage once in one mode, with a fresh scraper."""
+    start_url = f"{base_url}/site/"
+    before = await site_stats(base_url)
+    async with Scraper() as scraper:
+        crawler = SiteCrawler(
+            scraper,
+            max_depth=args.max_depth,
+            max_pages=args.max_pages,
+            time_budget=args.time_budget,
+            use_sitemap=mode == "sitemap",
+        )
+        started = time.perf_counter()
+        if mode == "homepage":
+            content_map, errors = await scraper.scrape_urls([start_url])
+        else:
+            content_map, errors = await crawler.crawl(start_url)
+    elapsed = time.perf_counter() - started
+    after = await site_stats(base_url)
+
+    found = [url.removeprefix(f"{base_url}/").rstrip("/") for url in content_map]
+    return {
+        "pages": found,
+        "policy_pages_found": f"{len([page for page in POLICY_PAGES if page in found])}/{len(POLICY_PAGES)}",
+        "words": sum(len(content.split()) for content in content_map.values()),
+        "errors": [str(message) for _, message in errors],
+        "site_requests": after["requests"] - before["requests"],
+        "private_requests": after["private_requests"] - before["private_requests"],
+        "ms": round(elapsed * 1000, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-depth", type=int, default=2, help="Clicks away from the homepage to follow")
+    parser.add_argument("--max-pages", type=int, default=12, help="Pages scraped per crawl, homepage included")
+    parser.add_argument("--time-budget", type=float, default=20.0, help="Seconds per crawl")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake site latency per response")
+    parser.add_argument("--port", type=int, default=9241, help="Port for the fake site")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    site = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_site", "--port", str(args.port), "--latency", str(args.latency)],
+        cwd=SERVER_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(f"{base_url}/stats")
+        report = {mode: await run_mode(mode, args, base_url) for mode in MODES}
+    finally:
+        site.terminate()
+        site.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
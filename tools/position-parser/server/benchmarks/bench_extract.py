@@ -0,0 +1,70 @@
+"""
+Benchmark: HTML-to-text extraction backends.
+
+Times every installed backend (bs4, lxml and, if installed, selectolax) with
+and without main-content detection on the HTML fixtures, and reports the
+time per page and the size of the extracted text. Smaller output for the
+same positions means fewer input tokens sent to Claude.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_extract --iterations 200
+    python -m benchmarks.bench_extract --fixture path/to/page.html --show lxml
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from extractor import BACKENDS
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def bench(html: str, backend: str, main_content: bool, iterations: int) -> dict:
+    extract = BACKENDS[backend]
+    text = extract(html, main_content)  # Warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        extract(html, main_content)
+    elapsed = time.perf_counter() - started
+    return {
+        "backend": backend,
+        "main_content": main_content,
+        "ms_per_page": round(elapsed / iterations * 1000, 3),
+        "output_chars": len(text),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--fixture", action="append", help="HTML file to benchmark (default: all fixtures)")
+    parser.add_argument("--show", metavar="BACKEND", help="Print the extracted text for this backend and exit")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.fixture] if args.fixture else sorted(FIXTURES_DIR.glob("*.html"))
+
+    if args.show:
+        for path in paths:
+            print(f"===== {path.name} =====")
+            print(BACKENDS[args.show](path.read_text(), True))
+        return
+
+    results = []
+    for path in paths:
+        html = path.read_text()
+        for backend in BACKENDS:
+            # bs4 ignores main_content, so only measure it once
+            modes = (False,) if backend == "bs4" else (False, True)
+            for main_content in modes:
+                result = bench(html, backend, main_content, args.iterations)
+                results.append({"fixture": path.name, "html_chars": len(html), **result})
+
+    print(json.dumps({"iterations": args.iterations, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
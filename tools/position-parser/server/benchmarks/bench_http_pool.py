@@ -0,0 +1,149 @@
+"""
+Benchmark: shared pooled HTTP client vs. a new client per URL.
+
+Starts a local stand-in campaign site (optionally over TLS with a throwaway
+self-signed certificate) and scrapes the same set of pages both ways,
+reporting wall-clock time and how many TCP connections the server accepted.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_http_pool --pages 50 --rounds 3 --tls
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from extractor import extract_text_bs4
+from scraper import Scraper, USER_AGENT
+
+PAGE_HTML = (
+    "<html><head><title>Issues</title></head><body><nav>Home | Donate</nav><main>"
+    + "".join(f"<p>Position paragraph {i} on healthcare, taxes and energy policy.</p>" for i in range(50))
+    + "</main><footer>Paid for by the committee</footer></body></html>"
+).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        with _Handler.lock:
+            _Handler.connections += 1
+        super().setup()
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE_HTML)))
+        self.end_headers()
+        self.wfile.write(PAGE_HTML)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _self_signed_cert(directory: str) -> tuple[str, str]:
+    """Generate a throwaway certificate for 127.0.0.1 with openssl."""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def start_server(tls_dir: str | None) -> tuple[ThreadingHTTPServer, str]:
+    """Start the stand-in site on a free port, returning (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    scheme = "http"
+    if tls_dir:
+        cert, key = _self_signed_cert(tls_dir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        # Make httpx trust the throwaway certificate
+        os.environ["SSL_CERT_FILE"] = cert
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+
+async def per_request_clients(urls: list[str]) -> None:
+    """The previous behaviour: one AsyncClient (and handshake) per URL."""
+
+    async def fetch(url: str) -> None:
+        async with httpx.AsyncClient(follow_redirects=True, headers={"User-Agent": USER_AGENT}) as client:
+            response = await client.get(url)
+            extract_text_bs4(response.text)
+
+    await asyncio.gather(*[fetch(url) for url in urls])
+
+
+async def shared_client(scraper: Scraper, urls: list[str]) -> None:
+    """One application-lifetime client with pooled keep-alive connections."""
+    await scraper.scrape_urls(urls)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="URLs scraped per round")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds (parse requests) per strategy")
+    parser.add_argument("--batch", type=int, default=4, help="URLs fetched concurrently per round")
+    parser.add_argument("--tls", action="store_true", help="Serve over HTTPS to include TLS handshakes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tls_dir:
+        server, base_url = start_server(tls_dir if args.tls else None)
+        urls = [f"{base_url}/issues/{i}" for i in range(args.pages)]
+        batches = [urls[i:i + args.batch] for i in range(0, len(urls), args.batch)]
+        results = {}
+
+        _Handler.connections = 0
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for batch in batches:
+                await per_request_clients(batch)
+        results["per_request_client"] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "connections": _Handler.connections,
+        }
+
+        _Handler.connections = 0
+        started = time.perf_counter()
+        async with Scraper() as scraper:
+            for _ in range(args.rounds):
+                for batch in batches:
+                    await shared_client(scraper, batch)
+        results["shared_client"] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "connections": _Handler.connections,
+        }
+
+        server.shutdown()
+
+    results["requests"] = args.pages * args.rounds
+    results["tls"] = args.tls
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""
+Benchmark: per-source reuse when sources repeat each other's content.
+
+Starts a fake Anthropic API (benchmarks/fake_anthropic.py) that reports each
+source's "I support ..." and "I oppose ..." lines as its positions, then
+parses, the way the server does (lines repeated across sources are dropped
+before analysis, cache keys of whole requests come from the scraped text):
+
+  batch        pages A and B as batch work, analyzed source by source;
+               B repeats A's position, so B is analyzed without it
+  single       page B alone, interactively
+  interactive  pages B and C interactively, reusing stored per-source results
+
+and reports each parse's positions per page, the calls made to the API and
+whether it was served from the cache. Exits non-zero if a parse is missing
+a position stated on its pages.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_incremental
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from analyzer import AsyncAnalyzer, rebase_source_urls, source_hashes, unfiltered_sources
+from cache import ANALYSES, TieredCache
+from dedup import strip_repeats
+from scheduler import BATCH, INTERACTIVE, work_class
+from store import SQLiteStore
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+PAGES = {
+    "https://example.org/a": "Intro A\nI support expanding Medicare to every senior",
+    "https://example.org/b": "I support expanding Medicare to every senior\nBio of candidate",
+    "https://example.org/c": "Intro C\nI oppose new federal fuel taxes",
+}
+
+PARSES = {
+    "batch": (BATCH, ["https://example.org/a", "https://example.org/b"]),
+    "single": (INTERACTIVE, ["https://example.org/b"]),
+    "interactive": (INTERACTIVE, ["https://example.org/b", "https://example.org/c"]),
+}
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def api_calls(base_url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        stats = (await client.get(f"{base_url}/stats")).json()
+    return stats["messages"] + stats["streams"]
+
+
+def expected_stances(urls: list[str]) -> set[str]:
+    """The positions stated on the pages, which a parse of them should return."""
+    return {line for url in urls for line in PAGES[url].split("\n") if line.startswith("I ")}
+
+
+async def parse(analyzer: AsyncAnalyzer, urls: list[str], base_url: str) -> dict[str, Any]:
+    """Parse urls as run_pipeline does, with repeated lines dropped before analysis."""
+    raw_map = {url: PAGES[url] for url in urls}
+    content_map = strip_repeats(raw_map)
+    unfiltered = unfiltered_sources(content_map, raw_map)
+    key = analyzer.cache_key(content_map, raw_map)
+    calls = await api_calls(base_url)
+
+    cached = await analyzer.cache.get(ANALYSES, key)
+    if cached is not None:
+        result = rebase_source_urls(cached["result"], cached["sources"], unfiltered)
+    else:
+        result = [data async for kind, data in analyzer.analyze_stream(content_map) if kind == "result"][0]
+        await analyzer.cache.set(ANALYSES, key, {"result": result, "sources": source_hashes(unfiltered)})
+
+    found: dict[str, list[str]] = {url: [] for url in urls}
+    for position in result.get("positions", []):
+        for url in position["source_urls"]:
+            found.setdefault(url, []).append(position["stance"])
+    stances = {position["stance"] for position in result.get("positions", [])}
+    return {
+        "positions": found,
+        "missing": sorted(expected_stances(urls) - stances),
+        "api_calls": await api_calls(base_url) - calls,
+        "cached": cached is not None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9271, help="Port for the fake API")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_anthropic", "--port", str(args.port),
+            "--first-token-latency", "0.05", "--tokens-per-second", "5000", "--stances-from-text",
+        ],
+        cwd=SERVER_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(f"{base_url}/stats")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            store = SQLiteStore(f"{cache_dir}/store.db")
+            analyzer = AsyncAnalyzer(api_key="test", base_url=base_url, cache=TieredCache(store))
+            report = {}
+            try:
+                for name, (priority, urls) in PARSES.items():
+                    with work_class(priority):
+                        report[name] = await parse(analyzer, urls, base_url)
+            finally:
+                await analyzer.close()
+                store.close()
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    short = [name for name, run in report.items() if run["missing"]]
+    if short:
+        raise SystemExit(f"Positions missing from: {', '.join(short)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
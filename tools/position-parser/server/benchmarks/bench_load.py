@@ -0,0 +1,285 @@
+"""
+Load test: concurrent /api/parse requests against the real server.
+
+Starts three local processes (the fake politician site, the fake Anthropic
+API and the FastAPI app pointed at both), then drives the app with
+concurrent /api/parse requests and reports throughput, latency percentiles,
+time to the first SSE event and first streamed position, and the server's
+memory use. Results are printed (and optionally saved) as JSON, tagged
+with the current git commit, so runs can be compared across commits.
+
+By default every request parses distinct page variants, so each one does
+the full scrape and analysis. --shared sends identical requests instead, to
+measure caching and request coalescing.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_load --requests 200 --concurrency 20 --output before.json
+    python -m benchmarks.bench_load --requests 200 --concurrency 20 --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+FIXTURES = sorted(path.stem for path in (SERVER_DIR / "benchmarks" / "fixtures").glob("*.html"))
+
+
+def percentiles(values: list[float]) -> dict[str, Optional[float]]:
+    """Summarize durations in seconds as milliseconds."""
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "p50": round(rank(0.50) * 1000, 1),
+        "p90": round(rank(0.90) * 1000, 1),
+        "p99": round(rank(0.99) * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 1),
+    }
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_process(args: list[str], env: Optional[dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=SERVER_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def parse_request(client: httpx.AsyncClient, server_url: str, urls: list[str]) -> dict[str, Any]:
+    """Run one /api/parse request, timing its SSE events."""
+    started = time.perf_counter()
+    timings: dict[str, Any] = {"first_event": None, "first_position": None, "ok": False}
+    async with client.stream("POST", f"{server_url}/api/parse", json={"urls": urls}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            elapsed = time.perf_counter() - started
+            event = json.loads(line[len("data: "):])
+            if timings["first_event"] is None:
+                timings["first_event"] = elapsed
+            if event["type"] == "position" and timings["first_position"] is None:
+                timings["first_position"] = elapsed
+            elif event["type"] == "result":
+                timings["ok"] = True
+                if timings["first_position"] is None:
+                    timings["first_position"] = elapsed
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+async def run_load(args: argparse.Namespace, server_url: str, site_url: str, server_pid: int) -> dict[str, Any]:
+    """Send args.requests parse requests with args.concurrency in flight."""
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(args.requests):
+        queue.put_nowait(index)
+    results: list[dict[str, Any]] = []
+    rss_samples: list[float] = []
+
+    async def sample_memory() -> None:
+        while True:
+            rss = rss_mb(server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(0.1)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while not queue.empty():
+            index = queue.get_nowait()
+            variant = "shared" if args.shared else str(index)
+            urls = [
+                f"{site_url}/{variant}/{FIXTURES[(index + offset) % len(FIXTURES)]}"
+                for offset in range(args.urls_per_request)
+            ]
+            try:
+                results.append(await parse_request(client, server_url, urls))
+            except httpx.HTTPError as e:
+                results.append({"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    timeout = httpx.Timeout(args.request_timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        baseline_rss = rss_mb(server_pid)
+        sampler = asyncio.create_task(sample_memory())
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(args.concurrency)])
+        duration = time.perf_counter() - started
+        sampler.cancel()
+
+    succeeded = [r for r in results if r["ok"]]
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(succeeded),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(succeeded) / duration, 2) if duration else None,
+        "latency_ms": percentiles([r["total"] for r in succeeded]),
+        "first_event_ms": percentiles([r["first_event"] for r in succeeded if r["first_event"] is not None]),
+        "first_position_ms": percentiles([r["first_position"] for r in succeeded if r["first_position"] is not None]),
+        "rss_mb": {
+            "baseline": baseline_rss,
+            "peak": max(rss_samples, default=None),
+            "end": rss_mb(server_pid),
+        },
+    }
+
+
+def compare(current: dict[str, Any], previous: dict[str, Any]) -> dict[str, Any]:
+    """Relative change of the headline numbers against a previous run."""
+
+    def change(new: Optional[float], old: Optional[float]) -> Optional[str]:
+        if new is None or not old:
+            return None
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    now, before = current["results"], previous["results"]
+    return {
+        "baseline_commit": previous.get("commit"),
+        "throughput_rps": change(now["throughput_rps"], before["throughput_rps"]),
+        "latency_p50": change(now["latency_ms"]["p50"], before["latency_ms"]["p50"]),
+        "latency_p99": change(now["latency_ms"]["p99"], before["latency_ms"]["p99"]),
+        "first_event_p50": change(now["first_event_ms"]["p50"], before["first_event_ms"]["p50"]),
+        "first_position_p50": change(now["first_position_ms"]["p50"], before["first_position_ms"]["p50"]),
+        "rss_peak": change(now["rss_mb"]["peak"], before["rss_mb"]["peak"]),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="Total parse requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    parser.add_argument("--urls-per-request", type=int, default=2, choices=range(1, 5))
+    parser.add_argument("--shared", action="store_true", help="Send identical requests (exercises caching)")
+    parser.add_argument("--site-latency", type=float, default=0.1, help="Fake site response latency in seconds")
+    parser.add_argument("--site-jitter", type=float, default=0.05)
+    parser.add_argument("--first-token-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--base-port", type=int, default=9200, help="Ports used: base (Anthropic), +1 (site), +2 (app)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server setting")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    anthropic_port, site_port, server_port = args.base_port, args.base_port + 1, args.base_port + 2
+    anthropic_url = f"http://127.0.0.1:{anthropic_port}"
+    site_url = f"http://127.0.0.1:{site_port}"
+    server_url = f"http://127.0.0.1:{server_port}"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server_env = {
+            "ANTHROPIC_API_KEY": "test",
+            "ANTHROPIC_BASE_URL": anthropic_url,
+            "API_KEY": "",
+            "DEV_MODE": "false",
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "JOBS_DIR": os.path.join(workdir, "jobs"),
+            **dict(item.split("=", 1) for item in args.env),
+        }
+        processes = [
+            start_process([
+                "-m", "benchmarks.fake_anthropic", "--port", str(anthropic_port),
+                "--first-token-latency", str(args.first_token_latency),
+                "--tokens-per-second", str(args.tokens_per_second),
+            ]),
+            start_process([
+                "-m", "benchmarks.fake_site", "--port", str(site_port),
+                "--latency", str(args.site_latency), "--jitter", str(args.site_jitter),
+            ]),
+        ]
+        server = start_process(
+            ["-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(server_port), "--log-level", "warning"],
+            env=server_env,
+        )
+        processes.append(server)
+
+        try:
+            async with httpx.AsyncClient() as client:
+                await wait_ready(client, f"{anthropic_url}/stats")
+                await wait_ready(client, f"{site_url}/stats")
+                await wait_ready(client, f"{server_url}/health")
+
+            results = await run_load(args, server_url, site_url, server.pid)
+
+            async with httpx.AsyncClient() as client:
+                upstream = {
+                    "anthropic": (await client.get(f"{anthropic_url}/stats")).json(),
+                    "site": (await client.get(f"{site_url}/stats")).json(),
+                }
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=10)
+
+    report: dict[str, Any] = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "compare", "base_port")
+        },
+        "results": results,
+        "upstream_requests": upstream,
+    }
+    if args.compare:
+        report["comparison"] = compare(report, json.loads(Path(args.compare).read_text()))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
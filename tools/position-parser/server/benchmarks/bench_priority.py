@@ -0,0 +1,171 @@
+"""
+Benchmark: interactive parse latency while batch jobs saturate the Claude slots.
+
+Starts the fake Anthropic API and runs an AsyncAnalyzer against it with
+several batch jobs queueing far more analyses than there are slots, while
+interactive analyses arrive at a steady interval. Each scenario is run
+twice:
+
+  fifo      every call competes for the same slots in arrival order
+  priority  batch jobs run under work_class(BATCH) with reserved slots
+            and, with --rpm, rate-limit headroom kept for interactive calls
+
+Reports interactive latency percentiles, batch items completed per job
+(round-robin fairness) and how many calls the fake API rejected with 429.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_priority --jobs 3 --items 40 --interactive 10
+    python -m benchmarks.bench_priority --rpm 60 --rate-window 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+from analyzer import AsyncAnalyzer
+from scheduler import BATCH, RateLimits, work_class
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+SOURCE_TEXT = (
+    "Senator Example supports expanding rural broadband, opposes new federal fuel taxes "
+    "and has sponsored bills to cap insulin prices for seniors. "
+) * 20
+
+
+def percentile(values: list[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1)
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def fake_stats(base_url: str) -> dict[str, int]:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{base_url}/stats")).json()
+
+
+async def run_scenario(args: argparse.Namespace, base_url: str, prioritized: bool) -> dict[str, Any]:
+    """Run the batch jobs and interactive arrivals against one analyzer configuration."""
+    analyzer = AsyncAnalyzer(
+        api_key="test",
+        base_url=base_url,
+        max_concurrency=args.concurrency,
+        chunked=False,
+        incremental=False,
+        reserved_slots=args.reserved if prioritized else 0,
+        rate_limits=RateLimits(headroom=args.headroom) if prioritized and args.rpm else None,
+    )
+    rejected_before = (await fake_stats(base_url))["rate_limited"]
+    completed: dict[str, int] = {}
+    stop = asyncio.Event()
+
+    async def batch_job(job: str) -> None:
+        async def item(index: int) -> None:
+            await analyzer.analyze({f"https://example.org/{job}/{index}": f"{job} {index}\n{SOURCE_TEXT}"})
+            if not stop.is_set():
+                completed[job] += 1
+
+        completed[job] = 0
+        if prioritized:
+            with work_class(BATCH, group=job):
+                await asyncio.gather(*[item(index) for index in range(args.items)], return_exceptions=True)
+        else:
+            await asyncio.gather(*[item(index) for index in range(args.items)], return_exceptions=True)
+
+    async def interactive(index: int) -> float:
+        started = time.perf_counter()
+        await analyzer.analyze({f"https://example.org/interactive/{index}": f"interactive {index}\n{SOURCE_TEXT}"})
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = [asyncio.create_task(batch_job(f"job{number}")) for number in range(args.jobs)]
+    await asyncio.sleep(args.interval)  # Let the batch jobs fill every slot first
+    latencies = []
+    for index in range(args.interactive):
+        latencies.append(await interactive(index))
+        await asyncio.sleep(args.interval)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    for task in batch:
+        task.cancel()
+    await asyncio.gather(*batch, return_exceptions=True)
+    await analyzer.close()
+
+    return {
+        "interactive_ms": {
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "max": percentile(latencies, 1.0),
+        },
+        "batch_completed": completed,
+        "batch_items_per_s": round(sum(completed.values()) / elapsed, 2),
+        "rejected_429": (await fake_stats(base_url))["rate_limited"] - rejected_before,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=3, help="Concurrent batch jobs")
+    parser.add_argument("--items", type=int, default=40, help="Analyses queued per batch job")
+    parser.add_argument("--interactive", type=int, default=10, help="Interactive analyses, one at a time")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between interactive analyses")
+    parser.add_argument("--concurrency", type=int, default=4, help="Claude calls in flight")
+    parser.add_argument("--reserved", type=int, default=1, help="Slots kept for interactive calls")
+    parser.add_argument("--headroom", type=float, default=0.2, help="Rate-limit share kept for interactive calls")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per rate window on the fake API (0: unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="Rate window of the fake API in seconds")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake API first-token latency")
+    parser.add_argument("--port", type=int, default=9221, help="Port for the fake Anthropic API")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_anthropic", "--port", str(args.port),
+            "--first-token-latency", str(args.latency), "--tokens-per-second", "2000",
+            "--rpm", str(args.rpm), "--rate-window", str(args.rate_window),
+        ],
+        cwd=SERVER_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(f"{base_url}/stats")
+        report = {
+            "fifo": await run_scenario(args, base_url, prioritized=False),
+            "priority": await run_scenario(args, base_url, prioritized=True),
+        }
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
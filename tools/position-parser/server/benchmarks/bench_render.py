@@ -0,0 +1,187 @@
+"""
+Benchmark: the headless-browser rendering fallback on pages built by JavaScript.
+
+Starts the fake site and first scrapes each JavaScript fixture
+(benchmarks/fixtures/js) on the fast httpx path alone, checking that it
+finds too little text there and so falls back to the browser. Then starts
+from those fast-path-empty pages and scrapes them, and each static
+fixture, through the Scraper with a BrowserRenderer. Reports the text the
+fast path extracts, whether the page fell back to the browser, the
+rendered text size and whether the expected phrases made it into the
+text, plus render latency and the browser's memory use. Exits non-zero if
+a JavaScript fixture is not recovered by rendering.
+
+Needs playwright and its Chromium build for the render run:
+    pip install playwright && playwright install --with-deps chromium
+
+Without them only the fast-path check runs, and the report says the
+render run was skipped.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_render --repeat 5 --concurrency 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+from extractor import Extractor
+from renderer import BrowserRenderer
+from scraper import MIN_CONTENT_CHARS, Scraper
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = SERVER_DIR / "benchmarks" / "fixtures"
+
+# Phrases each JavaScript fixture only contains once its scripts have run
+EXPECTED = {
+    "inline_render": ["Where Sam Stands", "teacher pay", "grocery tax"],
+    "fetch_render": ["Maria's Priorities", "Dreamers", "meatpacking"],
+}
+
+
+def percentile(values: list[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1)
+
+
+def browser_rss_mb() -> Optional[float]:
+    """Total resident memory of running Chromium processes in MB (Linux only)."""
+    try:
+        output = subprocess.run(["ps", "-eo", "rss,comm"], capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    kb = sum(int(line.split()[0]) for line in output.splitlines()[1:] if "chrom" in line.lower())
+    return round(kb / 1024, 1)
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def fast_path(site_url: str) -> dict[str, dict[str, Any]]:
+    """Scrape each JavaScript fixture without a browser: the text the fallback has to recover."""
+    report = {}
+    async with Scraper(extractor=Extractor()) as scraper:
+        for path in sorted((FIXTURES_DIR / "js").glob("*.html")):
+            text, _ = await scraper.scrape_url(f"{site_url}/fast/js/{path.stem}")
+            report[f"js/{path.stem}"] = {
+                "chars": len(text),
+                "empty": len(text) < MIN_CONTENT_CHARS,
+                "expected_found": any(phrase in text for phrase in EXPECTED.get(path.stem, [])),
+            }
+    return report
+
+
+async def run(args: argparse.Namespace, site_url: str, renderer: BrowserRenderer) -> dict[str, Any]:
+    pages = {f"js/{path.stem}": f"{site_url}/{{variant}}/js/{path.stem}" for path in (FIXTURES_DIR / "js").glob("*.html")}
+    pages.update({path.stem: f"{site_url}/{{variant}}/{path.stem}" for path in FIXTURES_DIR.glob("*.html")})
+
+    results: list[dict[str, Any]] = []
+    async with Scraper(extractor=Extractor(), renderer=renderer) as scraper, \
+            Scraper(extractor=Extractor()) as static_scraper:
+        for name, template in sorted(pages.items()):
+            fixture = name.removeprefix("js/")
+            static_text, _ = await static_scraper.scrape_url(template.format(variant="static"))
+            durations = []
+            text = ""
+            for index in range(args.repeat):
+                started = time.perf_counter()
+                text, error = await scraper.scrape_url(template.format(variant=index))
+                durations.append(time.perf_counter() - started)
+            expected = EXPECTED.get(fixture, [])
+            results.append({
+                "fixture": name,
+                "static_chars": len(static_text),
+                "rendered": len(static_text) < MIN_CONTENT_CHARS,
+                "chars": len(text),
+                "expected_found": all(phrase in text for phrase in expected),
+                "scrape_ms": {"p50": percentile(durations, 0.5), "max": percentile(durations, 1.0)},
+            })
+
+        # Concurrent renders share the pool of warm contexts
+        js_urls = [
+            template.format(variant=f"c{index}")
+            for index in range(args.repeat)
+            for name, template in pages.items()
+            if name.startswith("js/")
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*[scraper.scrape_url(url) for url in js_urls])
+        concurrent = {
+            "pages": len(js_urls),
+            "concurrency": args.concurrency,
+            "duration_s": round(time.perf_counter() - started, 3),
+            "browser_rss_mb": browser_rss_mb(),
+        }
+
+    return {"results": results, "concurrent": concurrent}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Scrapes per fixture")
+    parser.add_argument("--concurrency", type=int, default=2, help="Browser contexts in the pool")
+    parser.add_argument("--timeout", type=float, default=20.0, help="Page load timeout in seconds")
+    parser.add_argument("--port", type=int, default=9211, help="Port for the fake site")
+    args = parser.parse_args()
+
+    site_url = f"http://127.0.0.1:{args.port}"
+    site = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_site", "--port", str(args.port), "--latency", "0"],
+        cwd=SERVER_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    renderer = BrowserRenderer(max_concurrency=args.concurrency, timeout=args.timeout)
+    try:
+        await wait_ready(f"{site_url}/stats")
+        report: dict[str, Any] = {"fast_path": await fast_path(site_url)}
+        await renderer.start()
+        if renderer.available:
+            report.update(await run(args, site_url, renderer))
+        else:
+            report["render"] = "skipped: headless Chromium is not available (see the install instructions above)"
+    finally:
+        await renderer.aclose()
+        site.terminate()
+        site.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    if not all(page["empty"] for page in report["fast_path"].values()):
+        raise SystemExit("A JavaScript fixture has content on the fast path, so it does not exercise rendering")
+    if "results" not in report:
+        raise SystemExit("Render run skipped, rendering was not verified")
+    if not renderer_recovered(report):
+        raise SystemExit("Rendering did not recover every JavaScript fixture")
+
+
+def renderer_recovered(report: dict[str, Any]) -> bool:
+    """Whether every JavaScript fixture fell back to the browser and its expected phrases were found."""
+    js_results = [result for result in report.get("results", []) if result["fixture"].startswith("js/")]
+    return bool(js_results) and all(result["rendered"] and result["expected_found"] for result in js_results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
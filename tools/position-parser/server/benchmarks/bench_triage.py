@@ -0,0 +1,132 @@
+"""
+Benchmark: triage of sources before the extraction call.
+
+Extracts the text of every fixture, policy pages (benchmarks/fixtures) and
+pages without policy content (benchmarks/fixtures/triage: a bio, a donate
+page and a news listing), adds a long article whose only positions section
+is buried in eight copies of the other pages (which must be kept), and
+reports each one's heuristic score. Then
+analyzes them as one request against the fake Anthropic API with each
+triage mode (off, heuristic, model) and reports which sources were kept,
+the input tokens spent on triage and on extraction, and the latency.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_triage
+    python -m benchmarks.bench_triage --min-score 3 --latency 1.0
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from analyzer import AsyncAnalyzer
+from extractor import Extractor
+from triage import MODES, SourceTriage, heuristic_score
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = SERVER_DIR / "benchmarks" / "fixtures"
+
+TRIAGE_MODEL = "claude-3-5-haiku-20241022"
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def load_sources() -> dict[str, tuple[str, bool]]:
+    """Extracted text of every fixture, keyed by URL, with whether it holds policy content."""
+    extractor = Extractor()
+    sources = {}
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        sources[f"https://example.org/{path.stem}"] = (await extractor.extract(path.read_text()), True)
+    for path in sorted((FIXTURES_DIR / "triage").glob("*.html")):
+        sources[f"https://example.org/{path.stem}"] = (await extractor.extract(path.read_text()), False)
+    extractor.shutdown()
+
+    filler = "\n".join(text for text, policy in sources.values() if not policy)
+    section = sources["https://example.org/house_gov_issues"][0]
+    sources["https://example.org/long_article"] = ("\n".join([filler] * 4 + [section] + [filler] * 4), True)
+    return sources
+
+
+async def run_mode(mode: str, content_map: dict[str, str], args: argparse.Namespace, base_url: str) -> dict[str, Any]:
+    """Triage and analyze content_map once with a triage mode."""
+    analyzer = AsyncAnalyzer(api_key="test", base_url=base_url, chunked=False, incremental=False)
+    triage = SourceTriage(mode, min_score=args.min_score, analyzer=analyzer, model=TRIAGE_MODEL)
+    try:
+        started = time.perf_counter()
+        kept, dropped = await triage.filter(content_map)
+        triaged = time.perf_counter()
+        triage_tokens = analyzer.usage.input_tokens
+        result = await analyzer.analyze(kept)
+        finished = time.perf_counter()
+    finally:
+        await analyzer.close()
+
+    return {
+        "kept": list(kept),
+        "dropped": dropped,
+        "positions": len(result.get("positions", [])),
+        "triage_input_tokens": triage_tokens,
+        "extraction_input_tokens": analyzer.usage.input_tokens - triage_tokens,
+        "triage_ms": round((triaged - started) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-score", type=float, default=2.0, help="Sources scoring below this are dropped")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake API first-token latency")
+    parser.add_argument("--port", type=int, default=9231, help="Port for the fake Anthropic API")
+    args = parser.parse_args()
+
+    sources = await load_sources()
+    scores = {
+        url: {"policy": policy, "words": len(text.split()), "heuristic_score": heuristic_score(text)}
+        for url, (text, policy) in sources.items()
+    }
+    content_map = {url: text for url, (text, _) in sources.items() if text.strip()}
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_anthropic", "--port", str(args.port),
+            "--first-token-latency", str(args.latency),
+        ],
+        cwd=SERVER_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(f"{base_url}/stats")
+        modes = {mode: await run_mode(mode, content_map, args, base_url) for mode in MODES}
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    print(json.dumps({"sources": scores, "modes": modes}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,422 @@
+"""
+Local stand-in for the Anthropic API, for benchmarks and manual testing.
+
+Implements the parts of the API the server uses:
+  POST /v1/messages                         (plain and streamed responses)
+  POST /v1/messages/batches                 (Message Batches)
+  GET  /v1/messages/batches/{id}
+  GET  /v1/messages/batches/{id}/results
+  GET  /stats                               (request counters)
+
+Responses are generated from the request: each source URL listed in the
+user message yields a few positions attributed to it, wrapped in a
+```json``` block like a real reply, or returned as tool input when the
+request forces a tool call (with --stances-from-text, a source's positions
+are instead its lines starting with "I support" or "I oppose", so they
+follow its content). Triage requests (a forced score_sources call)
+get a score per source from how often it mentions policy words. Latency, token rate, batch processing time and
+truncation (as if max_tokens were hit) are configurable. With --rpm or
+--input-tpm, responses carry anthropic-ratelimit-* headers for a fixed
+window (--rate-window seconds) and requests over a limit get a 429 with
+retry-after, like the real API.
+
+Usage (from the server directory):
+    python -m benchmarks.fake_anthropic --port 9100 --tokens-per-second 200
+    ANTHROPIC_BASE_URL=http://127.0.0.1:9100 ANTHROPIC_API_KEY=test uvicorn main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# Rough characters per token, used to pace streaming and report usage
+CHARS_PER_TOKEN = 4
+
+# Words that make the fake triage model score a source as policy content
+POLICY_WORDS = re.compile(
+    r"\b(?:support|oppose|against|bill|legislation|tax|healthcare|immigration|energy|education|police|gun)\w*",
+    re.IGNORECASE,
+)
+
+# Lines that --stances-from-text reports as positions
+STANCE_LINE = re.compile(r"^I (?:support|oppose) .+$", re.MULTILINE)
+
+
+class FakeConfig:
+    """Tunable behaviour of the fake API."""
+
+    first_token_latency: float = 0.5
+    tokens_per_second: float = 200.0
+    positions_per_source: int = 3
+    stances_from_text: bool = False  # One position per "I support/oppose ..." line
+    batch_latency: float = 2.0
+    truncate_after: int = 0
+    rpm: int = 0  # Requests per rate window (0: unlimited)
+    input_tpm: int = 0  # Input tokens per rate window (0: unlimited)
+    rate_window: float = 60.0
+
+
+config = FakeConfig()
+stats: dict[str, int] = {"messages": 0, "streams": 0, "batches": 0, "batch_requests": 0, "rate_limited": 0}
+batches: dict[str, dict[str, Any]] = {}
+cached_prefixes: set[str] = set()
+# Current rate window: start time, requests and input tokens used
+rate_usage: dict[str, float] = {"start": 0.0, "requests": 0, "input-tokens": 0}
+
+app = FastAPI(title="Fake Anthropic API")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _user_text(params: dict[str, Any]) -> str:
+    """Concatenate the text of all user messages."""
+    parts = []
+    for message in params.get("messages", []):
+        if message.get("role") != "user":
+            continue
+        content = message["content"]
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get("text", "") for block in content if block.get("type") == "text")
+    return "\n".join(parts)
+
+
+def _system_text(params: dict[str, Any]) -> str:
+    system = params.get("system", "")
+    if isinstance(system, str):
+        return system
+    return "\n".join(block.get("text", "") for block in system)
+
+
+def _recorded_positions(params: dict[str, Any]) -> int:
+    """Positions already returned in earlier turns of a continuation request."""
+    for message in reversed(params.get("messages", [])):
+        if message.get("role") != "assistant":
+            continue
+        content = message["content"]
+        if isinstance(content, str):
+            return len(json.loads(content).get("positions", []))
+        for block in content:
+            if block.get("type") == "tool_use":
+                return len(block["input"].get("positions", []))
+    return 0
+
+
+def triage_scores(text: str) -> dict[str, Any]:
+    """Score each source of a triage request by its density of policy words."""
+    scores = []
+    for index, body in re.findall(r"=== Source (\d+): \S+ ===\n(.*?)(?=\n\n=== Source |\Z)", text, re.S):
+        words = max(1, len(body.split()))
+        scores.append({"index": int(index), "score": min(10, round(100 * len(POLICY_WORDS.findall(body)) / words))})
+    return {"scores": scores}
+
+
+def generate_body(params: dict[str, Any]) -> dict[str, Any]:
+    """Build a plausible ParserResponse for a messages request (or the rest of one, when continued)."""
+    text = _user_text(params)
+    if _tool_name(params) == "score_sources":
+        return triage_scores(text)
+
+    if "Candidate positions:" in text:
+        # Reduce step: merge candidates with the same stance
+        candidates = json.loads(text.split("Candidate positions:", 1)[1])
+        merged: dict[str, dict[str, Any]] = {}
+        for position in candidates.get("positions", []):
+            entry = merged.setdefault(position["stance"], {**position, "source_urls": []})
+            entry["source_urls"] += [u for u in position["source_urls"] if u not in entry["source_urls"]]
+        positions = list(merged.values())[_recorded_positions(params):]
+        return {"politician_name": candidates.get("politician_name"), "positions": positions}
+    urls = re.findall(r"=== Source: (\S+) ===", text)
+    if not urls:
+        match = re.search(r"Source URLs: (.*)", text)
+        urls = [u.strip() for u in match.group(1).split(",")] if match else []
+
+    if config.stances_from_text:
+        sections = re.findall(r"=== Source: (\S+) ===\n(.*?)(?=\n\n=== Source: |\Z)", text, re.S)
+        positions = [
+            {"stance": stance, "source_urls": [url], "note": None}
+            for url, body in sections
+            for stance in STANCE_LINE.findall(body)
+        ]
+        return {"politician_name": "Test Politician", "positions": positions[_recorded_positions(params):]}
+
+    positions = [
+        {
+            "stance": f"For policy {i + 1} described on {url}",
+            "source_urls": [url],
+            "note": None,
+        }
+        for url in urls
+        for i in range(config.positions_per_source)
+    ]
+    return {"politician_name": "Test Politician", "positions": positions[_recorded_positions(params):]}
+
+
+def _tool_name(params: dict[str, Any]) -> Optional[str]:
+    """The tool the request forces Claude to call, if any."""
+    choice = params.get("tool_choice") or {}
+    return choice.get("name") if choice.get("type") == "tool" else None
+
+
+def generate_reply(params: dict[str, Any]) -> tuple[str, str]:
+    """
+    Build the reply text and stop reason for a messages request.
+
+    The reply is a ```json``` block, or bare JSON tool input when the request
+    forces a tool call. With --truncate-after it is cut off like a response
+    that hit max_tokens.
+    """
+    body = generate_body(params)
+    if _tool_name(params):
+        reply = json.dumps(body)
+    else:
+        reply = "```json\n" + json.dumps(body, indent=2) + "\n```"
+    if config.truncate_after and len(reply) > config.truncate_after:
+        return reply[:config.truncate_after], "max_tokens"
+    return reply, "end_turn"
+
+
+def _usage(params: dict[str, Any], reply: str) -> dict[str, int]:
+    """Approximate usage, simulating the prompt cache for a cache_control system prompt."""
+    system = params.get("system", "")
+    system_tokens = len(_system_text(params)) // CHARS_PER_TOKEN
+    cache_read = cache_creation = 0
+    if isinstance(system, list) and any("cache_control" in block for block in system):
+        if _system_text(params) in cached_prefixes:
+            cache_read = system_tokens
+        else:
+            cached_prefixes.add(_system_text(params))
+            cache_creation = system_tokens
+        system_tokens = 0
+    return {
+        "input_tokens": system_tokens + len(_user_text(params)) // CHARS_PER_TOKEN,
+        "output_tokens": len(reply) // CHARS_PER_TOKEN,
+        "cache_creation_input_tokens": cache_creation,
+        "cache_read_input_tokens": cache_read,
+    }
+
+
+def _content_block(params: dict[str, Any], reply: str) -> dict[str, Any]:
+    tool_name = _tool_name(params)
+    if tool_name is None:
+        return {"type": "text", "text": reply}
+    try:
+        tool_input = json.loads(reply) if reply else {}
+    except json.JSONDecodeError:
+        tool_input = {}  # Truncated tool input
+    return {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tool_name, "input": tool_input}
+
+
+def _message(params: dict[str, Any], reply: str, stop_reason: str = "end_turn") -> dict[str, Any]:
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params["model"],
+        "content": [_content_block(params, reply)],
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": _usage(params, reply),
+    }
+
+
+async def _stream_events(params: dict[str, Any], reply: str, stop_reason: str) -> AsyncIterator[str]:
+    def event(name: str, data: dict[str, Any]) -> str:
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    message = _message(params, "")
+    message["content"] = []
+    message["stop_reason"] = None
+    yield event("message_start", {"type": "message_start", "message": message})
+    content_block = _content_block(params, "")
+    yield event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": content_block})
+
+    await asyncio.sleep(config.first_token_latency)
+    chunk_chars = CHARS_PER_TOKEN * 4
+    delay = (chunk_chars / CHARS_PER_TOKEN) / config.tokens_per_second
+    for i in range(0, len(reply), chunk_chars):
+        chunk = reply[i:i + chunk_chars]
+        if content_block["type"] == "tool_use":
+            delta = {"type": "input_json_delta", "partial_json": chunk}
+        else:
+            delta = {"type": "text_delta", "text": chunk}
+        yield event("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": delta})
+        await asyncio.sleep(delay)
+
+    yield event("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield event("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+        "usage": {"output_tokens": len(reply) // CHARS_PER_TOKEN},
+    })
+    yield event("message_stop", {"type": "message_stop"})
+
+
+def _rate_limit(params: dict[str, Any]) -> tuple[bool, dict[str, str]]:
+    """Charge a request to the current rate window; returns (allowed, rate-limit headers)."""
+    now = time.time()
+    if now - rate_usage["start"] >= config.rate_window:
+        rate_usage.update(start=now, requests=0, **{"input-tokens": 0})
+    reset = datetime.fromtimestamp(rate_usage["start"] + config.rate_window, timezone.utc).isoformat()
+    input_tokens = (len(_system_text(params)) + len(_user_text(params))) // CHARS_PER_TOKEN
+    needed = {"requests": 1, "input-tokens": input_tokens}
+    limits = {"requests": config.rpm, "input-tokens": config.input_tpm}
+
+    allowed = all(not limit or rate_usage[kind] + needed[kind] <= limit for kind, limit in limits.items())
+    if allowed:
+        for kind in needed:
+            rate_usage[kind] += needed[kind]
+    headers = {}
+    for kind, limit in limits.items():
+        if limit:
+            headers[f"anthropic-ratelimit-{kind}-limit"] = str(limit)
+            headers[f"anthropic-ratelimit-{kind}-remaining"] = str(max(0, int(limit - rate_usage[kind])))
+            headers[f"anthropic-ratelimit-{kind}-reset"] = reset
+    if not allowed:
+        headers["retry-after"] = str(max(1, int(rate_usage["start"] + config.rate_window - now + 0.999)))
+    return allowed, headers
+
+
+@app.post("/v1/messages")
+async def create_message(request: Request):
+    params = await request.json()
+    allowed, headers = _rate_limit(params)
+    if not allowed:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit exceeded"}},
+            status_code=429,
+            headers=headers,
+        )
+    reply, stop_reason = generate_reply(params)
+
+    if params.get("stream"):
+        stats["streams"] += 1
+        return StreamingResponse(
+            _stream_events(params, reply, stop_reason), media_type="text/event-stream", headers=headers
+        )
+
+    stats["messages"] += 1
+    output_tokens = len(reply) // CHARS_PER_TOKEN
+    await asyncio.sleep(config.first_token_latency + output_tokens / config.tokens_per_second)
+    return JSONResponse(_message(params, reply, stop_reason), headers=headers)
+
+
+def _batch_view(batch: dict[str, Any], base_url: str) -> dict[str, Any]:
+    ended = time.time() >= batch["ends_at"]
+    total = len(batch["requests"])
+    return {
+        "id": batch["id"],
+        "type": "message_batch",
+        "archived_at": None,
+        "cancel_initiated_at": None,
+        "created_at": batch["created_at"],
+        "ended_at": _now() if ended else None,
+        "expires_at": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": {
+            "canceled": 0,
+            "errored": 0,
+            "expired": 0,
+            "processing": 0 if ended else total,
+            "succeeded": total if ended else 0,
+        },
+        "results_url": f"{base_url}v1/messages/batches/{batch['id']}/results" if ended else None,
+    }
+
+
+@app.post("/v1/messages/batches")
+async def create_batch(request: Request):
+    body = await request.json()
+    batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+    batches[batch_id] = {
+        "id": batch_id,
+        "created_at": _now(),
+        "ends_at": time.time() + config.batch_latency,
+        "requests": body["requests"],
+    }
+    stats["batches"] += 1
+    stats["batch_requests"] += len(body["requests"])
+    return _batch_view(batches[batch_id], str(request.base_url))
+
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def retrieve_batch(batch_id: str, request: Request):
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _batch_view(batches[batch_id], str(request.base_url))
+
+
+@app.get("/v1/messages/batches/{batch_id}/results")
+async def batch_results(batch_id: str):
+    batch = batches.get(batch_id)
+    if batch is None or time.time() < batch["ends_at"]:
+        raise HTTPException(status_code=404, detail="Results not available")
+
+    lines = []
+    for entry in batch["requests"]:
+        params = entry["params"]
+        message = _message(params, *generate_reply(params))
+        lines.append(json.dumps({"custom_id": entry["custom_id"], "result": {"type": "succeeded", "message": message}}))
+    return Response("\n".join(lines) + "\n", media_type="application/binary")
+
+
+@app.get("/stats")
+async def get_stats():
+    return JSONResponse(stats)
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--first-token-latency", type=float, default=config.first_token_latency)
+    parser.add_argument("--tokens-per-second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--positions-per-source", type=int, default=config.positions_per_source)
+    parser.add_argument(
+        "--stances-from-text", action="store_true",
+        help="Report each source's lines starting with 'I support' or 'I oppose' as its positions",
+    )
+    parser.add_argument("--batch-latency", type=float, default=config.batch_latency)
+    parser.add_argument(
+        "--truncate-after", type=int, default=config.truncate_after,
+        help="Cut replies off after this many characters with stop_reason max_tokens (0: never)",
+    )
+    parser.add_argument("--rpm", type=int, default=config.rpm, help="Requests allowed per rate window (0: unlimited)")
+    parser.add_argument(
+        "--input-tpm", type=int, default=config.input_tpm,
+        help="Input tokens allowed per rate window (0: unlimited)",
+    )
+    parser.add_argument("--rate-window", type=float, default=config.rate_window)
+    args = parser.parse_args()
+
+    config.first_token_latency = args.first_token_latency
+    config.tokens_per_second = args.tokens_per_second
+    config.positions_per_source = args.positions_per_source
+    config.stances_from_text = args.stances_from_text
+    config.batch_latency = args.batch_latency
+    config.truncate_after = args.truncate_after
+    config.rpm = args.rpm
+    config.input_tpm = args.input_tpm
+    config.rate_window = args.rate_window
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Local stand-in for politician websites, for benchmarks and manual testing.
+
+Serves the saved HTML fixtures in benchmarks/fixtures:
+  GET /{variant}/{fixture}   (e.g. /7/campaign_issues)
+  GET /{variant}/js/{name}   (pages built by JavaScript, and their JSON data)
+  GET /site/{path}           (a small campaign site, for the discovery crawler)
+  GET /robots.txt            (disallows /site/private/, points to the sitemap)
+  GET /sitemap.xml           (every /site page)
+  GET /stats                 (request counters)
+
+The variant is echoed into the page text, so distinct variants produce
+distinct content (defeating the page and analysis caches) while repeated
+variants produce identical pages. Response latency is configurable.
+
+Usage (from the server directory):
+    python -m benchmarks.fake_site --port 9101 --latency 0.2 --jitter 0.1
+    python -m benchmarks.fake_site --no-sitemap   (robots.txt without a sitemap, /sitemap.xml 404s)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, Response
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+JS_FIXTURES_DIR = FIXTURES_DIR / "js"
+SITE_FIXTURES_DIR = FIXTURES_DIR / "site"
+
+
+class SiteConfig:
+    """Tunable behaviour of the fake site."""
+
+    latency: float = 0.1
+    jitter: float = 0.0
+    sitemap: bool = True
+
+
+config = SiteConfig()
+stats: dict[str, int] = {"requests": 0, "not_found": 0, "site_requests": 0, "private_requests": 0}
+fixtures: dict[str, str] = {path.stem: path.read_text() for path in FIXTURES_DIR.glob("*.html")}
+
+app = FastAPI(title="Fake politician site")
+
+
+@app.get("/stats")
+async def get_stats():
+    return JSONResponse(stats)
+
+
+@app.get("/robots.txt")
+async def robots(request: Request):
+    body = (SITE_FIXTURES_DIR / "robots.txt").read_text()
+    if config.sitemap:
+        body += f"Sitemap: {request.base_url}sitemap.xml\n"
+    return PlainTextResponse(body)
+
+
+@app.get("/sitemap.xml")
+async def sitemap(request: Request):
+    if not config.sitemap:
+        raise HTTPException(status_code=404, detail="No sitemap")
+    locs = []
+    for path in sorted(SITE_FIXTURES_DIR.rglob("*.html")):
+        relative = path.relative_to(SITE_FIXTURES_DIR).with_suffix("").as_posix()
+        locs.append(f"<url><loc>{request.base_url}site/{'' if relative == 'index' else relative}</loc></url>")
+    body = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    return Response(body + "\n".join(locs) + "\n</urlset>\n", media_type="application/xml")
+
+
+@app.get("/site/{path:path}")
+async def site_page(path: str):
+    stats["requests"] += 1
+    stats["site_requests"] += 1
+    if path.startswith("private/"):
+        stats["private_requests"] += 1
+    file = (SITE_FIXTURES_DIR / f"{path.strip('/') or 'index'}.html").resolve()
+    if not file.is_relative_to(SITE_FIXTURES_DIR.resolve()) or not file.is_file():
+        stats["not_found"] += 1
+        raise HTTPException(status_code=404, detail="Unknown page")
+    if config.latency > 0:
+        await asyncio.sleep(config.latency)
+    return FileResponse(file)
+
+
+@app.get("/{variant}/js/{name}")
+async def js_page(variant: str, name: str):
+    stats["requests"] += 1
+    path = JS_FIXTURES_DIR / (name if "." in name else f"{name}.html")
+    if path.parent != JS_FIXTURES_DIR or not path.is_file():
+        stats["not_found"] += 1
+        raise HTTPException(status_code=404, detail="Unknown fixture")
+    if config.latency > 0:
+        await asyncio.sleep(config.latency)
+    return FileResponse(path)
+
+
+@app.get("/{variant}/{fixture}")
+async def page(variant: str, fixture: str):
+    stats["requests"] += 1
+    html = fixtures.get(fixture)
+    if html is None:
+        stats["not_found"] += 1
+        raise HTTPException(status_code=404, detail="Unknown fixture")
+
+    delay = config.latency + random.uniform(0, config.jitter)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    # Inside the main content, so it survives main-content extraction
+    return HTMLResponse(html.replace("<h1", f"<p>Page variant {variant}</p><h1", 1))
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9101)
+    parser.add_argument("--latency", type=float, default=config.latency, help="Seconds before each response")
+    parser.add_argument("--jitter", type=float, default=config.jitter, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--no-sitemap", action="store_true", help="Serve no sitemap and leave it out of robots.txt")
+    args = parser.parse_args()
+
+    config.latency = args.latency
+    config.jitter = args.jitter
+    config.sitemap = not args.no_sitemap
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,224 @@
-"""File-based response caching for development."""
+"""Two-tier response caching: an in-process LRU in front of the SQLite (or Redis) store."""
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
-from pathlib import Path
-from typing import Any, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
 
+from metrics import CACHE_REQUESTS
+from store import SQLiteStore
 
-class ResponseCache:
-    """Simple file-based cache for API responses during development."""
+# Cache namespaces
+PAGES = "pages"  # Extracted page text, keyed by URL and validators
+ANALYSES = "analyses"  # Claude results, keyed by content hash, prompt and model
+VALIDATORS = "validators"  # Last ETag/Last-Modified/body hash seen per URL
+BOILERPLATE = "boilerplate"  # Pages each line was seen on, per domain
+TRIAGE = "triage"  # Policy-content scores of sources, keyed by content hash and triage model
 
-    def __init__(self, cache_dir: str = "./cache"):
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
 
-    def _get_key(self, urls: list[str]) -> str:
-        """Generate a cache key from a list of URLs."""
-        content = json.dumps(sorted(urls))
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+def content_hash(text: str) -> str:
+    """Hash text content for content-addressed cache keys."""
+    return hashlib.sha256(text.encode()).hexdigest()
 
-    def get(self, urls: list[str]) -> Optional[dict[str, Any]]:
+
+def make_key(*parts: Any) -> str:
+    """Generate a cache key from JSON-serializable parts."""
+    content = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+def page_key(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    body_hash: Optional[str] = None,
+    extractor: str = "",
+) -> str:
+    """
+    Generate the cache key for a scraped page.
+
+    Args:
+        url: Page URL
+        etag: ETag response header, if any
+        last_modified: Last-Modified response header, if any
+        body_hash: Hash of the raw body, used when the server sends no validators
+        extractor: Extractor version, so switching extractors never serves stale text
+
+    Returns:
+        Cache key that changes whenever the page changes
+    """
+    if etag or last_modified:
+        return make_key(url, etag, last_modified, extractor)
+    return make_key(url, body_hash, extractor)
+
+
+class MemoryLRU:
+    """Size-bounded in-process LRU holding serialized entries."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._size = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the serialized entry for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: str, payload: str, expires_at: float) -> None:
+        """Store a serialized entry, evicting least recently used entries if needed."""
+        if len(payload) > self.max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = (payload, expires_at)
+        self._size += len(payload)
+        while self._size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def clear(self, prefix: str = "") -> None:
+        """Remove all entries whose key starts with prefix."""
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self.delete(key)
+
+
+class TieredCache:
+    """
+    Two-tier cache: a bounded in-process LRU backed by the bounded SQLite store.
+
+    Hits in the memory tier cost no I/O. Database access runs in a worker
+    thread so the event loop never blocks on the disk. Values are stored
+    serialized, so callers always receive a fresh copy they may mutate.
+
+    When several worker processes share the store (a SQLiteStore file or a
+    RedisStore), pass sync_interval: entries deleted by invalidate() or
+    clear() are logged to the store, and every process drops them from its
+    memory tier within sync_interval seconds. Namespaces whose entries are
+    rewritten in place by other processes (shared_namespaces) bypass the
+    memory tier altogether.
+    """
+
+    def __init__(
+        self,
+        disk: SQLiteStore,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        default_ttls: Optional[dict[str, float]] = None,
+        shared_namespaces: Iterable[str] = (),
+        sync_interval: Optional[float] = None,
+    ):
+        self.memory = MemoryLRU(memory_max_bytes)
+        self.disk = disk
+        self.default_ttls = default_ttls or {}
+        self.shared_namespaces = set(shared_namespaces)
+        self.sync_interval = sync_interval
+        self._cursor: Optional[str] = None
+        self._synced_at = float("-inf")
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
         """
-        Get cached response for given URLs.
+        Get a cached value.
 
         Args:
-            urls: List of URLs that were parsed
+            namespace: Cache namespace (PAGES or ANALYSES)
+            key: Entry key within the namespace
 
         Returns:
-            Cached response dict if found, None otherwise
+            Cached value if found and not expired, None otherwise
         """
-        key = self._get_key(urls)
-        cache_file = self.cache_dir / f"{key}.json"
-
-        if cache_file.exists():
-            try:
-                return json.loads(cache_file.read_text())
-            except (json.JSONDecodeError, IOError):
+        await self._sync()
+        memory_key = f"{namespace}:{key}"
+        in_memory = namespace not in self.shared_namespaces
+        payload = self.memory.get(memory_key) if in_memory else None
+        if payload is None:
+            entry = await asyncio.to_thread(self.disk.get, namespace, key)
+            if entry is None:
+                CACHE_REQUESTS.labels(namespace=namespace, result="miss").inc()
                 return None
-        return None
+            CACHE_REQUESTS.labels(namespace=namespace, result="disk").inc()
+            payload, expires_at = entry
+            if in_memory:
+                self.memory.set(memory_key, payload, expires_at)
+        else:
+            CACHE_REQUESTS.labels(namespace=namespace, result="memory").inc()
+        return json.loads(payload)
 
-    def set(self, urls: list[str], data: dict[str, Any]) -> None:
+    async def set(
+        self,
+        namespace: str,
+        key: str,
+        data: Any,
+        ttl: Optional[float] = None,
+        url: Optional[str] = None,
+    ) -> None:
         """
-        Cache a response for given URLs.
+        Cache a value in both tiers.
 
         Args:
-            urls: List of URLs that were parsed
-            data: Response data to cache
+            namespace: Cache namespace (PAGES or ANALYSES)
+            key: Entry key within the namespace
+            data: JSON-serializable value
+            ttl: Time to live in seconds (defaults to the namespace TTL, else 1 day)
+            url: Page the value was scraped from, for invalidation by URL or domain
+        """
+        ttl = ttl if ttl is not None else self.default_ttls.get(namespace, 86400)
+        expires_at = time.time() + ttl
+        payload = json.dumps(data)
+        if namespace not in self.shared_namespaces:
+            self.memory.set(f"{namespace}:{key}", payload, expires_at)
+        await asyncio.to_thread(self.disk.set, namespace, key, payload, expires_at, url)
+
+    async def invalidate(self, url: Optional[str] = None, domain: Optional[str] = None) -> dict[str, int]:
         """
-        key = self._get_key(urls)
-        cache_file = self.cache_dir / f"{key}.json"
+        Drop cached pages of a URL or domain, and the analyses built from them.
 
-        try:
-            cache_file.write_text(json.dumps(data, indent=2))
-        except IOError:
-            pass  # Silently fail on cache write errors
+        Returns:
+            Number of cache "entries" deleted and stored "results" marked invalidated
+        """
+        deleted = await asyncio.to_thread(self.disk.invalidate, url, domain, ANALYSES)
+        for namespace, key in deleted["keys"]:
+            self.memory.delete(f"{namespace}:{key}")
+        if self.sync_interval is not None and deleted["keys"]:
+            await asyncio.to_thread(self.disk.publish_invalidations, deleted["keys"])
+        return {"entries": len(deleted["keys"]), "results": deleted["results"]}
 
-    def clear(self) -> int:
+    async def clear(self, namespace: Optional[str] = None) -> int:
         """
-        Clear all cached responses.
+        Clear cached entries, optionally only one namespace.
 
         Returns:
-            Number of cache files deleted
+            Number of stored entries deleted
         """
-        count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                cache_file.unlink()
-                count += 1
-            except IOError:
-                pass
+        self.memory.clear(f"{namespace}:" if namespace else "")
+        count = await asyncio.to_thread(self.disk.clear, namespace)
+        if self.sync_interval is not None:
+            await asyncio.to_thread(self.disk.publish_invalidations, [(namespace, None)])
         return count
+
+    async def _sync(self) -> None:
+        """Drop memory entries that other worker processes deleted, at most every sync_interval seconds."""
+        if self.sync_interval is None or time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = time.monotonic()
+        self._cursor, entries = await asyncio.to_thread(self.disk.invalidations_since, self._cursor)
+        for namespace, key in entries:
+            if key is not None:
+                self.memory.delete(f"{namespace}:{key}")
+            else:
+                self.memory.clear(f"{namespace}:" if namespace else "")
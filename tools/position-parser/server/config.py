@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -13,6 +14,95 @@ class Settings(BaseSettings):
     dev_mode: bool = False
     cache_enabled: bool = True
     cache_dir: str = "./cache"
+    cache_memory_max_mb: int = 64
+    cache_disk_max_mb: int = 512
+    cache_page_ttl: int = 7 * 86400
+    cache_analysis_ttl: int = 30 * 86400
+
+    # Analysis settings
+    anthropic_model: str = "claude-sonnet-4-20250514"
+    anthropic_base_url: Optional[str] = None
+    analysis_max_concurrency: int = 4
+    # Claude call slots batch jobs leave free for interactive parses
+    analysis_reserved_slots: int = 1
+    # Share of Anthropic's per-minute request and token limits batch jobs leave for interactive parses
+    rate_limit_headroom: float = 0.2
+    analysis_timeout: float = 300.0
+    prompt_caching: bool = True
+    analysis_chunked: bool = True
+    analysis_chunk_chars: int = 40000
+    reduce_model: str = "claude-3-5-haiku-20241022"
+    # Return realtime results through a schema-enforced tool call instead of free-text JSON
+    # (Message Batch results are always free text, so truncated ones can be continued)
+    structured_output: bool = True
+    # Follow-up calls when a response hits max_tokens (0 keeps only the completed positions)
+    analysis_max_continuations: int = 3
+    # Analyze multi-URL batch items per source, re-analyzing only changed sources (needs the cache);
+    # interactive parses do so only when stored per-source results exist
+    analysis_incremental: bool = True
+    # Drop text repeated across sources, and lines seen on this many pages of a domain
+    boilerplate_filter: bool = True
+    boilerplate_min_pages: int = 3
+    # Score sources for policy content before extraction and skip those below
+    # triage_min_score (0-10): "heuristic" scores locally, "model" asks triage_model;
+    # interactive parses only demote the URLs they were given, dropping crawl-found pages
+    triage_mode: str = "heuristic"
+    triage_model: str = "claude-3-5-haiku-20241022"
+    triage_min_score: float = 2.0
+    triage_excerpt_chars: int = 4000  # Excerpt of each source the triage model reads (start and densest section)
+
+    # Scraper settings
+    scrape_timeout: float = 30.0
+    scrape_max_connections: int = 100
+    scrape_max_keepalive_connections: int = 20
+    scrape_keepalive_expiry: float = 30.0
+    scrape_http2: bool = True
+    scrape_max_bytes: int = 5 * 1024 * 1024  # Stop reading a page body after this many bytes
+    scrape_max_text_chars: int = 400_000  # Stop reading once this much text is extracted
+    scrape_retries: int = 2  # Retries for timeouts, 5xx and 429 responses
+    scrape_retry_base_delay: float = 0.5
+    scrape_retry_max_delay: float = 10.0
+    scrape_max_retry_after: float = 30.0  # Give up instead of honoring a longer Retry-After
+    scrape_breaker_threshold: int = 5  # Consecutive host failures that open a domain's circuit
+    scrape_breaker_cooldown: float = 60.0
+    scrape_max_concurrency: int = 64  # Pages downloaded at once, interactive parses first
+    scrape_reserved_slots: int = 8  # Download slots batch jobs leave free for interactive parses
+
+    # Headless-browser fallback for pages built by JavaScript (needs playwright and Chromium)
+    render_enabled: bool = False
+    render_concurrency: int = 2
+    render_timeout: float = 20.0
+    render_settle_time: float = 2.0  # Extra wait for scripts' network requests to finish
+    render_block_resources: str = "image,font,media"
+
+    # Discovery crawl of a homepage's policy pages (requested per parse or batch job)
+    crawl_max_depth: int = 2  # Clicks away from the homepage
+    crawl_max_pages: int = 12  # Pages per site, including the homepage
+    crawl_time_budget: float = 20.0  # Seconds per site; slower pages are left out
+    crawl_sitemap: bool = True  # Take policy pages from sitemap.xml when it lists any
+
+    # HTML extraction settings ("auto" picks lxml, falling back to bs4)
+    extractor_backend: str = "auto"
+    extractor_main_content: bool = True
+    extractor_executor: str = "thread"
+    extractor_workers: int = 4
+
+    # Batch job settings
+    jobs_dir: str = "./cache/jobs"
+    batch_concurrency: int = 4
+    batch_max_politicians: int = 1000
+    batch_domain_concurrency: int = 2
+    batch_domain_interval: float = 1.0
+    batch_domain_burst: int = 3
+
+    # Message Batches analysis backend (selectable per batch job)
+    message_batch_max_size: int = 100
+    message_batch_flush_interval: float = 10.0
+    message_batch_poll_interval: float = 30.0
+
+    # Observability: Prometheus metrics at /metrics. OpenTelemetry spans are
+    # emitted when opentelemetry-api is installed and an SDK is configured.
+    metrics_enabled: bool = True
 
     # CORS settings
     allowed_origins: str = "http://localhost:3000"
@@ -20,6 +110,14 @@ class Settings(BaseSettings):
     # Server settings
     host: str = "0.0.0.0"
     port: int = 8001
+    workers: int = 1
+
+    # Backend shared by worker processes: "local" (a single process), "sqlite"
+    # (workers on one host sharing cache_dir) or "redis" (workers on several hosts)
+    shared_backend: str = "local"
+    redis_url: str = "redis://localhost:6379/0"
+    redis_prefix: str = "position-parser:"
+    lease_ttl: float = 30.0  # A crashed worker's in-flight work is taken over after this long
 
     class Config:
         env_file = ".env"
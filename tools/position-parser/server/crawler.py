@@ -0,0 +1,392 @@
+"""Discovery of a campaign site's policy pages, starting from its homepage."""
+
+from __future__ import annotations
+
+import asyncio
+import html
+import logging
+import re
+import time
+from html.parser import HTMLParser
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+from cache import content_hash
+from metrics import CRAWL_PAGES, SCRAPE_ERRORS
+from scraper import DomainThrottle, Scraper, ScrapeErrorType, get_domain, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Product token matched against robots.txt User-agent lines
+ROBOTS_AGENT = "PositionParser"
+
+# Link text or path words suggesting policy content ("issues", "on the record", ...)
+POLICY_PATTERN = re.compile(
+    r"\b(?:issues?|priorit(?:y|ies)|polic(?:y|ies)|platform|positions?|agenda|plans?|on[\s_-]the[\s_-]record"
+    r"|record|where[\s_-]i[\s_-]stand|stances?|vision|legislation|votes?|voting)\b",
+    re.IGNORECASE,
+)
+
+# Paths never worth following, even when their link text sounds like policy
+SKIP_PATTERN = re.compile(
+    r"\b(?:donate|contribute|volunteer|shop|store|events?|login|sign[\s_-]?up|privacy|cookies?|careers?|contact)\b"
+    r"|\.(?:pdf|jpe?g|png|gif|svg|webp|zip|docx?|xlsx?|pptx?|mp[34]|mov|css|js|json|xml|ics|gz)$",
+    re.IGNORECASE,
+)
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+# Limits on the sitemap fast path
+MAX_SITEMAPS = 5
+SITEMAP_MAX_BYTES = 2 * 1024 * 1024
+ROBOTS_MAX_BYTES = 512 * 1024
+SITEMAP_LOC_PATTERN = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+
+# Longest robots.txt Crawl-delay honored; the time budget caps the crawl anyway
+MAX_CRAWL_DELAY = 10.0
+
+
+def clean_url(url: str) -> str:
+    """URL without fragment or tracking parameters, as it is scraped."""
+    parsed = urlparse(urldefrag(url)[0])
+    query = urlencode([
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ])
+    return urlunparse(parsed._replace(query=query, fragment=""))
+
+
+def canonical_url(url: str) -> str:
+    """URL without fragment, tracking parameters or trailing slash, for deduplication."""
+    parsed = urlparse(clean_url(url))
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, "", parsed.query, ""))
+
+
+def same_site(url: str, site: str) -> bool:
+    """Whether url is on host site, with or without "www."."""
+    host = (urlparse(url).hostname or "").lower().removeprefix("www.")
+    return urlparse(url).scheme in ("http", "https") and host == site
+
+
+def link_score(url: str, text: str = "") -> int:
+    """How strongly a link's text and path suggest policy content (0: not at all)."""
+    path = urlparse(url).path
+    if SKIP_PATTERN.search(path):
+        return 0
+    return len(POLICY_PATTERN.findall(text)) + 2 * len(POLICY_PATTERN.findall(path))
+
+
+class LinkParser(HTMLParser):
+    """Collects the href and text of every link in a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: list[tuple[str, str]] = []
+        self.base: Optional[str] = None
+        self._href: Optional[str] = None
+        self._text: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        attributes = dict(attrs)
+        if tag == "base" and self.base is None:
+            self.base = attributes.get("href")
+        elif tag == "a":
+            self.finish_link()
+            self._href = attributes.get("href")
+        elif tag == "img" and self._href is not None and attributes.get("alt"):
+            self._text.append(attributes["alt"])
+
+    def handle_data(self, data: str) -> None:
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a":
+            self.finish_link()
+
+    def finish_link(self) -> None:
+        if self._href:
+            self.links.append((self._href.strip(), " ".join(" ".join(self._text).split())))
+        self._href = None
+        self._text = []
+
+
+def extract_links(page_html: str, page_url: str) -> list[tuple[str, str]]:
+    """
+    Find the links in a page.
+
+    Args:
+        page_html: HTML of the page
+        page_url: URL the page was served from, for resolving relative links
+
+    Returns:
+        (absolute URL, link text) pairs in document order
+    """
+    parser = LinkParser()
+    parser.feed(page_html)
+    parser.close()
+    parser.finish_link()
+    base = urljoin(page_url, parser.base) if parser.base else page_url
+    return [
+        (urljoin(base, href), text)
+        for href, text in parser.links
+        if not href.lower().startswith(("#", "mailto:", "tel:", "javascript:"))
+    ]
+
+
+class SiteCrawler:
+    """
+    Expands a homepage into the policy pages of its site.
+
+    Pages are taken from the site's sitemap when it lists any whose path
+    looks like policy content (the fast path). Otherwise links are followed
+    breadth-first from the homepage, up to max_depth clicks away, but only
+    same-site links whose text or path looks like policy content ("issues",
+    "priorities", "on the record", ...), most promising first.
+
+    robots.txt is honored for every discovered page, including its
+    Crawl-delay when no throttle is given; the homepage itself was asked
+    for, so it is always scraped. Pages are scraped through the Scraper as
+    soon as they are found, concurrently and with its cache, so a crawl
+    costs little more than its slowest page. Link discovery downloads the
+    homepage and index pages once more without the cache.
+
+    The crawl stops at max_pages pages (including the homepage) or after
+    time_budget seconds; pages still loading then are dropped, except the
+    homepage. Pages reached through several URLs, or serving identical
+    text, are kept once.
+    """
+
+    def __init__(
+        self,
+        scraper: Scraper,
+        max_depth: int = 2,
+        max_pages: int = 12,
+        time_budget: float = 20.0,
+        use_sitemap: bool = True,
+    ):
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.use_sitemap = use_sitemap
+
+    async def crawl_urls(
+        self,
+        urls: list[str],
+        throttle: Optional[DomainThrottle] = None,
+    ) -> tuple[dict[str, str], list[tuple[ScrapeErrorType, str]]]:
+        """
+        Crawl several homepages concurrently (see crawl()).
+
+        Returns:
+            Tuple of (content_map, errors), as from Scraper.scrape_urls()
+        """
+        results = await asyncio.gather(*[self.crawl(url, throttle) for url in urls])
+        content_map: dict[str, str] = {}
+        seen: set[str] = set()
+        errors: list[tuple[ScrapeErrorType, str]] = []
+        for pages, page_errors in results:
+            errors.extend(page_errors)
+            for url, content in pages.items():
+                digest = content_hash(content)
+                if url not in content_map and digest not in seen:
+                    content_map[url] = content
+                    seen.add(digest)
+        return content_map, errors
+
+    async def crawl(
+        self,
+        start_url: str,
+        throttle: Optional[DomainThrottle] = None,
+    ) -> tuple[dict[str, str], list[tuple[ScrapeErrorType, str]]]:
+        """
+        Discover and scrape the policy pages of start_url's site.
+
+        Args:
+            start_url: Homepage (or any page) of the site
+            throttle: Optional per-domain politeness limiter
+
+        Returns:
+            Tuple of (content_map, errors): the scraped text of the start page
+            and discovered pages, start page first, and the start page's
+            error if it failed (failed discovered pages are only logged)
+        """
+        start_url = normalize_url(start_url)
+        deadline = time.monotonic() + self.time_budget
+        parsed = urlparse(start_url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        site = (parsed.hostname or "").lower().removeprefix("www.")
+
+        robots = await self._robots(origin, throttle)
+        delay = robots.crawl_delay(ROBOTS_AGENT)
+        if throttle is None and delay:
+            throttle = DomainThrottle(max_concurrency=1, min_interval=min(float(delay), MAX_CRAWL_DELAY))
+
+        pages: dict[str, str] = {}  # Canonical URL -> URL, in discovery order
+        scrapes: dict[str, asyncio.Task] = {}
+
+        def add(url: str, found_by: str) -> bool:
+            """Queue a page for scraping unless it is known, disallowed or over budget."""
+            url = clean_url(url) if pages else url  # The start page is scraped as asked for
+            key = canonical_url(url)
+            if key in pages or len(pages) >= self.max_pages:
+                return False
+            if pages and not robots.can_fetch(ROBOTS_AGENT, url):
+                CRAWL_PAGES.labels(result="disallowed").inc()
+                return False
+            pages[key] = url
+            scrapes[url] = asyncio.create_task(self.scraper.scrape_url(url, throttle))
+            CRAWL_PAGES.labels(result=found_by).inc()
+            return True
+
+        add(start_url, "start")
+        try:
+            found = 0
+            if self.use_sitemap:
+                for url in await self._sitemap_pages(origin, site, robots, throttle, deadline):
+                    found += add(url, "sitemap")
+            if not found:
+                await self._follow_links(start_url, site, add, throttle, deadline)
+            return await self._collect(start_url, scrapes, deadline)
+        finally:
+            for task in scrapes.values():
+                task.cancel()
+
+    async def _follow_links(
+        self,
+        start_url: str,
+        site: str,
+        add: Callable[[str, str], bool],
+        throttle: Optional[DomainThrottle],
+        deadline: float,
+    ) -> None:
+        """Follow policy links breadth-first from start_url, queueing each new page with add()."""
+        frontier = [start_url]
+        for depth in range(1, self.max_depth + 1):
+            remaining = deadline - time.monotonic()
+            if not frontier or remaining <= 0:
+                return
+            tasks = [asyncio.create_task(self._links(url, throttle)) for url in frontier]
+            done, pending = await asyncio.wait(tasks, timeout=remaining)
+            for task in pending:
+                task.cancel()
+
+            # Best-scoring links first, each URL once, in document order among equals
+            candidates: dict[str, tuple[int, str]] = {}
+            for task in tasks:
+                if task not in done:
+                    continue
+                for url, text in task.result():
+                    if not same_site(url, site):
+                        continue
+                    score = link_score(url, text)
+                    key = canonical_url(url)
+                    if score and score > candidates.get(key, (0, ""))[0]:
+                        candidates[key] = (score, url)
+            ranked = sorted(candidates.values(), key=lambda candidate: -candidate[0])
+            frontier = [url for _, url in ranked if add(url, "link")]
+            logger.info(f"Crawl depth {depth} from {start_url}: {len(frontier)} new page(s) of {len(ranked)} candidate link(s)")
+
+    async def _links(self, url: str, throttle: Optional[DomainThrottle]) -> list[tuple[str, str]]:
+        """Download a page and return its links ([] if it failed)."""
+        response = await self.scraper.fetch_raw(url, throttle)
+        if response is None or response[0] >= 400:
+            return []
+        _, final_url, body = response
+        return await asyncio.to_thread(extract_links, body, final_url)
+
+    async def _robots(self, origin: str, throttle: Optional[DomainThrottle]) -> RobotFileParser:
+        """Fetch and parse the site's robots.txt (RFC 9309: missing allows all, unreachable allows none)."""
+        robots = RobotFileParser(f"{origin}/robots.txt")
+        response = await self.scraper.fetch_raw(f"{origin}/robots.txt", throttle, max_bytes=ROBOTS_MAX_BYTES)
+        if response is None or response[0] >= 500:
+            logger.warning(f"robots.txt of {origin} is unreachable, only scraping the pages asked for")
+            robots.disallow_all = True
+        elif response[0] >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(response[2].splitlines())
+        robots.modified()  # can_fetch() allows nothing until the file is marked as read
+        return robots
+
+    async def _sitemap_pages(
+        self,
+        origin: str,
+        site: str,
+        robots: RobotFileParser,
+        throttle: Optional[DomainThrottle],
+        deadline: float,
+    ) -> list[str]:
+        """Policy pages listed in the site's sitemaps, most promising first."""
+        queue = list(robots.site_maps() or [f"{origin}/sitemap.xml"])
+        urls: list[str] = []
+        fetched = 0
+        while queue and fetched < MAX_SITEMAPS and time.monotonic() < deadline:
+            sitemap = queue.pop(0)
+            fetched += 1
+            response = await self.scraper.fetch_raw(sitemap, throttle, max_bytes=SITEMAP_MAX_BYTES)
+            if response is None or response[0] >= 400:
+                continue
+            body = response[2]
+            locs = [html.unescape(loc) for loc in SITEMAP_LOC_PATTERN.findall(body)]
+            if "<sitemapindex" in body:
+                # WordPress-style indexes: page sitemaps before post and tag sitemaps
+                queue.extend(sorted(locs, key=lambda loc: "page" not in loc.lower()))
+            else:
+                urls.extend(locs)
+
+        scored = [(link_score(url), url) for url in urls if same_site(url, site)]
+        ranked = sorted(
+            ((score, url) for score, url in scored if score),
+            key=lambda candidate: (-candidate[0], urlparse(candidate[1]).path.count("/")),
+        )
+        if urls:
+            logger.info(f"Sitemap of {origin}: {len(ranked)} policy page(s) of {len(urls)} listed")
+        return [url for _, url in ranked]
+
+    async def _collect(
+        self,
+        start_url: str,
+        scrapes: dict[str, asyncio.Task],
+        deadline: float,
+    ) -> tuple[dict[str, str], list[tuple[ScrapeErrorType, str]]]:
+        """Wait for the queued scrapes until the deadline (the start page's without one)."""
+        others = [task for url, task in scrapes.items() if url != start_url]
+        if others:
+            _, pending = await asyncio.wait(others, timeout=max(0.0, deadline - time.monotonic()))
+            if pending:
+                logger.info(f"Crawl time budget of {self.time_budget}s used up, dropping {len(pending)} page(s)")
+                CRAWL_PAGES.labels(result="over_budget").inc(len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
+        await asyncio.wait([scrapes[start_url]])
+
+        content_map: dict[str, str] = {}
+        seen: set[str] = set()
+        errors: list[tuple[ScrapeErrorType, str]] = []
+        for url, task in scrapes.items():
+            if not task.done() or task.cancelled() or task.exception() is not None:
+                continue
+            content, error = task.result()
+            if error is not None:
+                SCRAPE_ERRORS.labels(error_type=error[0].value).inc()
+                if url == start_url:
+                    errors.append(error)
+                else:
+                    logger.info(f"Skipping discovered page {url}: {error[0].value}")
+                continue
+            digest = content_hash(content)
+            if digest in seen:
+                CRAWL_PAGES.labels(result="duplicate").inc()
+                continue
+            seen.add(digest)
+            content_map[url] = content
+
+        logger.info(f"Crawled {get_domain(start_url)}: {len(content_map)} page(s) from {start_url}")
+        return content_map, errors
@@ -0,0 +1,145 @@
+"""Pre-analysis removal of text repeated across sources and across pages of a site."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from typing import Optional
+
+from cache import BOILERPLATE, TieredCache
+from metrics import BOILERPLATE_CHARS
+from scraper import get_domain
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token, for logging estimated savings
+CHARS_PER_TOKEN = 4
+
+# Learned boilerplate is not stripped from a page it would mostly empty: such
+# a page is more likely the same content reached through several URLs
+MAX_BOILERPLATE_SHARE = 0.5
+
+
+def line_hash(line: str) -> str:
+    """Hash a line of text, ignoring case and whitespace differences."""
+    normalized = " ".join(line.split()).casefold()
+    return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+
+
+def strip_repeats(content_map: dict[str, str], boilerplate: Optional[set[str]] = None) -> dict[str, str]:
+    """
+    Drop repeated lines from scraped text.
+
+    A line (one extracted block) already seen earlier in the request, in the
+    same source or an earlier one, is dropped, so repeated content is sent
+    once. Lines whose hash is in boilerplate are dropped everywhere, unless
+    they make up more than MAX_BOILERPLATE_SHARE of a source's text.
+
+    Args:
+        content_map: Dict mapping URLs to their scraped text content
+        boilerplate: Hashes of lines known to be site chrome
+
+    Returns:
+        Content map with repeated lines removed; sources left empty are omitted
+    """
+    boilerplate = boilerplate or set()
+    seen: set[str] = set()
+    stripped: dict[str, str] = {}
+    for url, content in content_map.items():
+        lines = [(line, line_hash(line)) for line in content.split("\n") if line.strip()]
+        chrome = sum(len(line) for line, digest in lines if digest in boilerplate)
+        skip = boilerplate if chrome <= MAX_BOILERPLATE_SHARE * len(content) else set()
+
+        kept = []
+        for line, digest in lines:
+            if digest in skip or digest in seen:
+                continue
+            seen.add(digest)
+            kept.append(line)
+        if kept:
+            stripped[url] = "\n".join(kept)
+    return stripped
+
+
+class BoilerplateFilter:
+    """
+    Removes repeated lines before analysis and learns each domain's boilerplate.
+
+    For every domain, the filter remembers which pages each line was seen on
+    (in the BOILERPLATE cache namespace). Lines found on at least min_pages
+    distinct pages of a domain, such as menus, donate banners and footers,
+    are treated as site chrome and dropped from every page of that domain.
+    At least one of those pages must be outside the current request, so a
+    paragraph repeated only within the request keeps its first copy.
+
+    The current request's pages are recorded before filtering, so repeating
+    a request filters its pages the same way and keeps hitting the cache.
+    """
+
+    def __init__(self, cache: Optional[TieredCache] = None, min_pages: int = 3, max_lines: int = 5000):
+        self.cache = cache
+        self.min_pages = min_pages
+        self.max_lines = max_lines
+        # Pages remembered per line: the threshold plus room for a full request's pages
+        self.max_pages = min_pages + 4
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def strip(self, content_map: dict[str, str]) -> dict[str, str]:
+        """
+        Remove repeated lines and known boilerplate from scraped content.
+
+        Args:
+            content_map: Dict mapping URLs to their scraped text content
+
+        Returns:
+            Content map with repeated lines removed; sources left empty are omitted
+        """
+        boilerplate: set[str] = set()
+        if self.cache is not None:
+            by_domain: defaultdict[str, dict[str, str]] = defaultdict(dict)
+            for url, content in content_map.items():
+                by_domain[get_domain(url)][url] = content
+            for domain, pages in by_domain.items():
+                boilerplate |= await self._learn(domain, pages)
+
+        # A page made up entirely of known boilerplate is analyzed as it is
+        stripped = strip_repeats(content_map, boilerplate) or content_map
+
+        before = sum(len(content) for content in content_map.values())
+        removed = before - sum(len(content) for content in stripped.values())
+        BOILERPLATE_CHARS.inc(removed)
+        if removed:
+            dropped = [url for url in content_map if url not in stripped]
+            logger.info(
+                f"Removed {removed} of {before} chars of repeated text (~{removed // CHARS_PER_TOKEN} tokens) "
+                f"from {len(content_map)} source(s)"
+                + (f", dropped fully repeated source(s) {dropped}" if dropped else "")
+            )
+        return stripped
+
+    async def _learn(self, domain: str, pages: dict[str, str]) -> set[str]:
+        """Record the lines of pages and return the domain's boilerplate line hashes."""
+        async with self._locks[domain]:
+            lines: dict[str, list[str]] = await self.cache.get(BOILERPLATE, domain) or {}
+            changed = False
+            for url, content in pages.items():
+                for digest in {line_hash(line) for line in content.split("\n") if line.strip()}:
+                    urls = lines.setdefault(digest, [])
+                    if url not in urls and len(urls) < self.max_pages:
+                        urls.append(url)
+                        changed = True
+
+            if changed:
+                if len(lines) > self.max_lines:
+                    # Keep the lines seen on the most pages
+                    ranked = sorted(lines.items(), key=lambda item: len(item[1]), reverse=True)
+                    lines = dict(ranked[:self.max_lines])
+                await self.cache.set(BOILERPLATE, domain, lines)
+
+        return {
+            digest
+            for digest, urls in lines.items()
+            if len(urls) >= self.min_pages and any(url not in pages for url in urls)
+        }
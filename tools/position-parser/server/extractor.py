@@ -0,0 +1,413 @@
+"""HTML-to-text extraction with pluggable parser backends and main-content detection."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from bs4 import BeautifulSoup
+
+from metrics import EXTRACT_SECONDS, stage
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+# Elements that never contain page content
+BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header", "aside"]
+EXTRA_BOILERPLATE_TAGS = ["noscript", "form", "iframe", "svg", "button", "select", "template"]
+
+# Block-level elements: text on either side belongs on separate lines
+BLOCK_TAGS = frozenset([
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section",
+    "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+])
+
+# Containers whose class/id marks them as site chrome rather than content
+NEGATIVE_PATTERN = re.compile(
+    r"\b(breadcrumbs?|cookie|consent|comments?|footer|menu|modal|navbar|newsletter|"
+    r"popup|references|share|sharing|sidebar|skip-link|social|subscribe|widget)\b",
+    re.IGNORECASE,
+)
+POSITIVE_PATTERN = re.compile(
+    r"\b(article|content|entry|issues?|main|platform|policy|policies|post|priorities|text)\b",
+    re.IGNORECASE,
+)
+CHROME_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search"}
+CANDIDATE_TAGS = {"article", "div", "main", "section", "td"}
+PARAGRAPH_TAGS = {"p", "li", "pre", "blockquote", "td", "h2", "h3", "h4", "dd"}
+
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+# Main-content candidates covering less than this share of the page text are ignored
+MIN_MAIN_CONTENT_SHARE = 0.5
+
+
+def clean_lines(text: str) -> str:
+    """Collapse whitespace within lines and drop empty lines."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_text_bs4(html: str, main_content: bool = False) -> str:
+    """
+    Extract readable text with BeautifulSoup's pure-Python html.parser.
+
+    This is the original extraction path and the fallback when no faster
+    parser is installed. main_content is not supported and ignored.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove script, style, nav, footer, header elements
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+
+    # Get text content
+    text = soup.get_text(separator="\n", strip=True)
+
+    # Clean up excessive whitespace
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "\n".join(lines)
+
+
+def _lxml_text(element) -> str:
+    """Serialize an lxml element to text, breaking lines only at block elements."""
+    pieces: list[str] = []
+    for event, node in etree.iterwalk(element, events=("start", "end")):
+        if not isinstance(node.tag, str):
+            # Comments and processing instructions: keep only their tail text
+            if event == "end" and node.tail:
+                pieces.append(node.tail)
+            continue
+        if event == "start":
+            if node.tag in BLOCK_TAGS:
+                pieces.append("\n")
+            if node.text:
+                pieces.append(node.text)
+        else:
+            if node.tag in BLOCK_TAGS:
+                pieces.append("\n")
+            elif node.tag == "th":
+                pieces.append(" ")
+            if node is not element and node.tail:
+                pieces.append(node.tail)
+    return clean_lines("".join(pieces))
+
+
+def _is_chrome(element) -> bool:
+    """Whether an element's role, class or id marks it as site chrome."""
+    if element.get("role") in CHROME_ROLES:
+        return True
+    names = f"{element.get('class', '')} {element.get('id', '')}"
+    return bool(NEGATIVE_PATTERN.search(names)) and not POSITIVE_PATTERN.search(names)
+
+
+def _link_density(element, text_length: int) -> float:
+    if not text_length:
+        return 0.0
+    link_chars = sum(len(link.text_content()) for link in element.iter("a"))
+    return min(link_chars / text_length, 1.0)
+
+
+def _strip_chrome(body) -> None:
+    """Remove chrome containers and link-heavy blocks such as leftover menus."""
+    for element in list(body.iter(*CANDIDATE_TAGS, "ul", "ol")):
+        if element.getparent() is None or element is body:
+            continue
+        if _is_chrome(element):
+            element.drop_tree()
+            continue
+        text_length = len(element.text_content().strip())
+        if text_length < 1000 and _link_density(element, text_length) > 0.6:
+            element.drop_tree()
+
+
+def _find_main_content(body, page_length: int):
+    """
+    Pick the element holding the page's main content, readability-style.
+
+    Prefers an explicit <main>/role=main landmark or a single <article>.
+    Otherwise scores containers by the paragraphs they hold (longer, comma-rich
+    paragraphs score higher), weighted by class/id hints and penalized by link
+    density. Returns None when no candidate covers most of the page text,
+    since campaign issue pages often spread positions over many sections.
+    """
+    landmarks = body.xpath(".//main | .//*[@role='main']")
+    articles = body.xpath(".//article")
+    if len(landmarks) == 1:
+        candidate = landmarks[0]
+    elif not landmarks and len(articles) == 1:
+        candidate = articles[0]
+    else:
+        scores: dict = {}
+        for paragraph in body.iter(*PARAGRAPH_TAGS):
+            text = paragraph.text_content().strip()
+            if len(text) < 25:
+                continue
+            score = 1 + text.count(",") + min(len(text) / 100, 3)
+            parent = paragraph.getparent()
+            if parent is not None:
+                scores[parent] = scores.get(parent, 0) + score
+                grandparent = parent.getparent()
+                if grandparent is not None:
+                    scores[grandparent] = scores.get(grandparent, 0) + score / 2
+
+        best, best_score = None, 0.0
+        for element, score in scores.items():
+            if element.tag not in CANDIDATE_TAGS:
+                continue
+            names = f"{element.get('class', '')} {element.get('id', '')}"
+            if POSITIVE_PATTERN.search(names):
+                score *= 1.25
+            score *= 1 - _link_density(element, len(element.text_content()))
+            if score > best_score:
+                best, best_score = element, score
+        candidate = best
+
+    if candidate is None:
+        return None
+    if len(candidate.text_content().strip()) < page_length * MIN_MAIN_CONTENT_SHARE:
+        return None
+    return candidate
+
+
+def extract_text_lxml(html: str, main_content: bool = True) -> str:
+    """
+    Extract readable text with lxml's C parser.
+
+    Args:
+        html: Raw HTML
+        main_content: Strip site chrome and narrow to the main content element
+
+    Returns:
+        Text content, one line per block element
+    """
+    if not html.strip():
+        return ""
+    try:
+        # lxml rejects str input that carries an XML encoding declaration
+        document = lxml.html.document_fromstring(XML_DECLARATION.sub("", html, count=1))
+    except (etree.ParserError, ValueError):
+        return ""
+    return _document_text(document, main_content)
+
+
+def _document_text(document, main_content: bool) -> str:
+    """Extract readable text from a parsed lxml document."""
+    etree.strip_elements(document, *BOILERPLATE_TAGS, *EXTRA_BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+    body = document.find("body")
+    if body is None:
+        body = document
+
+    if main_content:
+        _strip_chrome(body)
+        main = _find_main_content(body, len(body.text_content().strip()))
+        if main is not None:
+            return _lxml_text(main)
+    return _lxml_text(body)
+
+
+def extract_text_selectolax(html: str, main_content: bool = True) -> str:
+    """
+    Extract readable text with selectolax (lexbor), the fastest backend.
+
+    Main-content detection is limited to <main>/role=main landmarks.
+    """
+    tree = SelectolaxParser(html)
+    tree.strip_tags(BOILERPLATE_TAGS + EXTRA_BOILERPLATE_TAGS)
+    root = tree.body or tree.root
+    if root is None:
+        return ""
+
+    if main_content:
+        main = tree.css_first("main, [role=main]")
+        if main is not None and len(main.text(strip=True)) >= len(root.text(strip=True)) * MIN_MAIN_CONTENT_SHARE:
+            root = main
+    return clean_lines(root.text(separator="\n", strip=True))
+
+
+class ExtractionSession:
+    """
+    Extracts text from one HTML document while it is still downloading.
+
+    With the lxml backend each chunk is fed to a pull parser as it arrives and
+    the text parsed so far is counted, so the caller can stop reading once
+    enough text has been collected. Other backends have no incremental parser
+    and buffer the chunks until close(). Output is capped at max_chars.
+    """
+
+    # Raw text collected before stopping, relative to max_chars, leaving room
+    # for the site chrome that extraction strips
+    READ_AHEAD = 2
+
+    def __init__(self, backend: str, main_content: bool, max_chars: int, incremental: bool = True):
+        self.backend = backend
+        self.main_content = main_content
+        self.max_chars = max_chars
+        self.incremental = incremental and backend == "lxml"
+        self.text_chars = 0
+        self.seconds = 0.0  # Time spent parsing, for metrics
+        self._chunks: list[str] = []
+        # Created on first feed(): lxml parser state belongs to the creating thread
+        self._parser = None
+        self.executor: Optional[Executor] = None
+
+    @property
+    def enough(self) -> bool:
+        """Whether enough text has been parsed to stop reading the document."""
+        return self.incremental and self.text_chars >= self.max_chars * self.READ_AHEAD
+
+    @property
+    def buffered_html(self) -> str:
+        """The document so far, for backends without incremental parsing."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> None:
+        """Feed the next chunk of the document."""
+        if not self.incremental:
+            self._chunks.append(chunk)
+            return
+        if self._parser is None:
+            self._parser = etree.HTMLPullParser(events=("end",))
+            self._parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+        self._parser.feed(chunk)
+        for _, element in self._parser.read_events():
+            if element.tag in ("script", "style"):
+                continue
+            # Children's tails are complete once their parent ends
+            self.text_chars += len(element.text or "") + sum(len(child.tail or "") for child in element)
+
+    def close(self) -> str:
+        """Finish parsing and return the extracted text."""
+        if not self.incremental:
+            return extract_html(self.buffered_html, self.backend, self.main_content)[:self.max_chars]
+        if self._parser is None:
+            return ""
+        try:
+            document = self._parser.close()
+        except (etree.ParserError, etree.XMLSyntaxError):
+            return ""
+        if document is None:
+            return ""
+        return _document_text(document, self.main_content)[:self.max_chars]
+
+
+BACKENDS: dict[str, Callable[[str, bool], str]] = {"bs4": extract_text_bs4}
+if lxml is not None:
+    BACKENDS["lxml"] = extract_text_lxml
+if SelectolaxParser is not None:
+    BACKENDS["selectolax"] = extract_text_selectolax
+
+
+def resolve_backend(name: str) -> str:
+    """Resolve "auto" (or an unavailable backend) to an installed backend name."""
+    if name in BACKENDS:
+        return name
+    if name != "auto":
+        logger.warning(f"Extractor backend {name!r} is not available, choosing automatically")
+    return "lxml" if "lxml" in BACKENDS else "bs4"
+
+
+def extract_html(html: str, backend: str = "auto", main_content: bool = True) -> str:
+    """
+    Extract readable text from an HTML document with the given backend.
+
+    Module-level so it can run in a process pool.
+    """
+    return BACKENDS[resolve_backend(backend)](html, main_content)
+
+
+class Extractor:
+    """
+    Runs HTML extraction off the event loop.
+
+    Parsing is CPU-bound, so it runs in a thread pool (lxml and selectolax
+    release the GIL while parsing) or a process pool (true parallelism for
+    the pure-Python bs4 backend) instead of blocking other requests.
+    """
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        main_content: bool = True,
+        executor: str = "thread",
+        max_workers: int = 4,
+    ):
+        self.backend = resolve_backend(backend)
+        self.main_content = main_content and self.backend != "bs4"
+        self._processes = executor == "process"
+        self._pools: list[Executor]
+        if self._processes:
+            self._pools = [ProcessPoolExecutor(max_workers=max_workers)]
+        else:
+            # lxml parsers must stay on the thread that created them, so each
+            # thread is its own single-worker lane and a session keeps its lane
+            self._pools = [
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"extract-{i}")
+                for i in range(max_workers)
+            ]
+        self._next_pool = itertools.cycle(self._pools)
+        logger.info(f"HTML extractor: {self.backend} ({executor} pool, main_content={self.main_content})")
+
+    @property
+    def version(self) -> str:
+        """Identifies the extraction output format, for cache keys."""
+        return f"{self.backend}:{int(self.main_content)}"
+
+    async def extract(self, html: str) -> str:
+        """Extract readable text from HTML in the worker pool."""
+        loop = asyncio.get_running_loop()
+        with stage("extract", EXTRACT_SECONDS, backend=self.backend):
+            return await loop.run_in_executor(next(self._next_pool), extract_html, html, self.backend, self.main_content)
+
+    def session(self, max_chars: int) -> ExtractionSession:
+        """
+        Start extracting a document that arrives in chunks.
+
+        Parser state cannot move between processes, so with a process pool the
+        session buffers the document and extracts it in the pool at the end.
+        """
+        session = ExtractionSession(self.backend, self.main_content, max_chars, incremental=not self._processes)
+        session.executor = next(self._next_pool)
+        return session
+
+    async def feed(self, session: ExtractionSession, chunk: str) -> None:
+        """Feed a chunk to an extraction session, parsing it in the worker pool."""
+        if not session.incremental:
+            session.feed(chunk)
+            return
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(session.executor, session.feed, chunk)
+        session.seconds += time.perf_counter() - started
+
+    async def finish(self, session: ExtractionSession) -> str:
+        """Finish an extraction session and return its text."""
+        if session.incremental:
+            with stage("extract", backend=self.backend):
+                started = time.perf_counter()
+                text = await asyncio.get_running_loop().run_in_executor(session.executor, session.close)
+                session.seconds += time.perf_counter() - started
+            EXTRACT_SECONDS.labels(backend=self.backend).observe(session.seconds)
+            return text
+        text = await self.extract(session.buffered_html)
+        return text[:session.max_chars]
+
+    def shutdown(self) -> None:
+        """Shut down the worker pools."""
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,141 @@
+"""Incremental JSON parsing for streamed Claude responses."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+
+class PositionStreamParser:
+    """
+    Extract completed objects from a JSON array while the document is still streaming.
+
+    Text is fed in arbitrary chunks as it arrives from the model. Each call to
+    feed() returns the objects of the target array (by default the top-level
+    "positions" key) that were completed by that chunk. Anything before the
+    first "{" (such as a markdown code fence) is ignored.
+    """
+
+    def __init__(self, array_key: str = "positions"):
+        self.array_key = array_key
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        # Stack of open containers: ("{" or "[", key the container was opened under)
+        self._stack: list[tuple[str, Optional[str]]] = []
+        self._pending_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        # Completed top-level string values, e.g. "politician_name"
+        self.fields: dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """
+        Feed the next chunk of streamed text.
+
+        Args:
+            chunk: Newly received text
+
+        Returns:
+            Array items completed by this chunk, in order
+        """
+        self._text += chunk
+        completed: list[dict[str, Any]] = []
+        text = self._text
+
+        while self._pos < len(text):
+            i = self._pos
+            char = text[i]
+            self._pos += 1
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(("{", None))
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    try:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                    except json.JSONDecodeError:
+                        self._last_string = None
+                    if len(self._stack) == 1 and self._pending_key is not None and self._last_string is not None:
+                        self.fields[self._pending_key] = self._last_string
+                        self._pending_key = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":":
+                self._pending_key = self._last_string
+            elif char in "{[":
+                key = self._pending_key if self._stack and self._stack[-1][0] == "{" else None
+                self._stack.append((char, key))
+                self._pending_key = None
+                depth = len(self._stack)
+                if char == "[" and depth == 2 and key == self.array_key:
+                    self._array_depth = depth
+                elif char == "{" and self._array_depth is not None and depth == self._array_depth + 1:
+                    self._item_start = i
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                depth = len(self._stack)
+                self._stack.pop()
+                if char == "]" and depth == self._array_depth:
+                    self._array_depth = None
+                elif (
+                    char == "}"
+                    and self._item_start is not None
+                    and self._array_depth is not None
+                    and depth == self._array_depth + 1
+                ):
+                    try:
+                        item = json.loads(text[self._item_start:i + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        completed.append(item)
+                    self._item_start = None
+            elif char == ",":
+                self._pending_key = None
+
+        return completed
+
+
+def salvage_truncated(text: str, array_key: str = "positions") -> Optional[dict[str, Any]]:
+    """
+    Recover what is usable from a JSON document that was cut off.
+
+    Keeps every completed object of the target array and the top-level
+    string fields seen before the cut, which is what a response truncated at
+    max_tokens still holds.
+
+    Args:
+        text: Truncated JSON text (leading prose or code fences are ignored)
+        array_key: Top-level key of the array to salvage
+
+    Returns:
+        Dict with the salvaged fields and array, or None if no array items completed
+    """
+    parser = PositionStreamParser(array_key)
+    items = parser.feed(text)
+    if not items:
+        return None
+    return {**parser.fields, array_key: items}
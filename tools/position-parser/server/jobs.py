@@ -0,0 +1,413 @@
+"""Batch parse jobs: a persistent queue processed by a bounded worker pool."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from leases import LeaseManager
+from scheduler import BATCH, work_class
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+
+# Item statuses
+DONE = "done"
+ERROR = "error"
+
+DEFAULT_POOL = "default"
+
+# How often, with several worker processes, event streams check the job's
+# files for items other processes finished
+SYNC_INTERVAL = 2.0
+
+# First delay before re-checking an item another worker process holds the
+# lease for; it doubles on each check, up to the lease TTL
+LEASE_RETRY_INTERVAL = 1.0
+
+ProcessItem = Callable[[dict[str, Any], dict[str, Any]], Awaitable[dict[str, Any]]]
+
+
+class BatchItemError(Exception):
+    """Raised by a batch item processor when an item fails with a user-facing message."""
+
+
+class Job:
+    """In-memory state of a batch job, mirrored on disk."""
+
+    def __init__(self, spec: dict[str, Any], results: dict[int, dict[str, Any]]):
+        self.spec = spec
+        self.results = results
+        self.running: set[int] = set()
+        self.subscribers: list[asyncio.Queue] = []
+        self.lock = asyncio.Lock()
+
+    @property
+    def id(self) -> str:
+        return self.spec["id"]
+
+    @property
+    def total(self) -> int:
+        return len(self.spec["items"])
+
+    @property
+    def status(self) -> str:
+        if self.spec.get("cancelled"):
+            return CANCELLED
+        if len(self.results) == self.total:
+            return COMPLETED
+        if self.results or self.running:
+            return RUNNING
+        return PENDING
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, CANCELLED)
+
+    def pending_indexes(self) -> list[int]:
+        return [i for i in range(self.total) if i not in self.results]
+
+    def summary(self) -> dict[str, Any]:
+        """Job progress without per-item results."""
+        errors = sum(1 for r in self.results.values() if r["status"] == ERROR)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.spec["created_at"],
+            "total": self.total,
+            "completed": len(self.results) - errors,
+            "failed": errors,
+            "running": len(self.running),
+            "pending": self.total - len(self.results) - len(self.running),
+        }
+
+
+class JobManager:
+    """
+    Runs batch parse jobs through a bounded pool of workers.
+
+    Each job is stored as a directory holding job.json (the request) and
+    results.jsonl (one line appended per finished item), so progress
+    survives a restart: unfinished items are re-queued on start().
+
+    Items run in the BATCH scheduling class, grouped by job, so interactive
+    parses are served first and concurrent jobs share capacity fairly.
+
+    With leases, several worker processes share jobs_dir: each item is run
+    under a lease, so jobs resumed by every process on start() still run
+    each item once, and lookups read other processes' progress from disk
+    (see sync()). An item whose lease is held elsewhere is re-queued with
+    backoff until the holder has finished it, or until the lease expires
+    because the holder died and this process can run it.
+    """
+
+    def __init__(
+        self,
+        jobs_dir: str,
+        process_item: ProcessItem,
+        pools: Optional[dict[str, int]] = None,
+        leases: Optional[LeaseManager] = None,
+    ):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.process_item = process_item
+        # Worker pools by name -> number of workers. Items of a job run in its pool,
+        # so backends that mostly wait (e.g. Message Batches) can use many workers.
+        self.pools = pools or {DEFAULT_POOL: 4}
+        self._jobs: dict[str, Job] = {}
+        self._queues: dict[str, asyncio.Queue[tuple[str, int]]] = {
+            name: asyncio.Queue() for name in self.pools
+        }
+        self._workers: list[asyncio.Task] = []
+        self.leases = leases
+        # Times each item was found leased by another worker process, for backoff
+        self._lease_retries: dict[tuple[str, int], int] = {}
+
+    async def start(self) -> None:
+        """Load persisted jobs, re-queue unfinished items and start the workers."""
+        for job in await asyncio.to_thread(self._load_jobs):
+            self._jobs[job.id] = job
+            if not job.finished:
+                pending = job.pending_indexes()
+                logger.info(f"Resuming job {job.id}: {len(pending)}/{job.total} items remaining")
+                for index in pending:
+                    self._queue_for(job).put_nowait((job.id, index))
+
+        self._workers = [
+            asyncio.create_task(self._worker(self._queues[name]))
+            for name, size in self.pools.items()
+            for _ in range(size)
+        ]
+
+    def _queue_for(self, job: Job) -> asyncio.Queue:
+        return self._queues.get(job.spec.get("pool", DEFAULT_POOL), self._queues[DEFAULT_POOL])
+
+    async def stop(self) -> None:
+        """Stop the workers. Items in progress are retried on the next start()."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+        self,
+        items: list[dict[str, Any]],
+        options: Optional[dict[str, Any]] = None,
+        pool: str = DEFAULT_POOL,
+    ) -> Job:
+        """
+        Create a job and queue all of its items.
+
+        Args:
+            items: One dict per politician, each with at least a "urls" list
+            options: Job-wide options passed to the item processor
+            pool: Name of the worker pool that runs the job's items
+
+        Returns:
+            The new job
+        """
+        spec = {
+            "id": uuid.uuid4().hex[:12],
+            "created_at": time.time(),
+            "cancelled": False,
+            "pool": pool,
+            "options": options or {},
+            "items": items,
+        }
+        job = Job(spec, {})
+        await asyncio.to_thread(self._write_spec, job)
+        self._jobs[job.id] = job
+
+        queue = self._queue_for(job)
+        for index in range(job.total):
+            queue.put_nowait((job.id, index))
+        logger.info(f"Queued job {job.id} with {job.total} item(s)")
+        return job
+
+    async def sync(self, job_id: Optional[str] = None) -> None:
+        """
+        Load progress made by other worker processes from disk (no-op without leases).
+
+        Args:
+            job_id: Only this job; by default every job in jobs_dir
+        """
+        if self.leases is None:
+            return
+        if job_id is None:
+            loaded = await asyncio.to_thread(self._load_jobs)
+        elif job_id.isalnum():
+            job = await asyncio.to_thread(self._load_job, self._job_dir(job_id) / "job.json")
+            loaded = [job] if job is not None else []
+        else:
+            return
+
+        for job in loaded:
+            known = self._jobs.get(job.id)
+            if known is None:
+                self._jobs[job.id] = job  # Submitted to another worker process
+            else:
+                self._merge(known, job)
+
+    async def _refresh(self, job: Job) -> None:
+        """Pick up a cancellation and items finished by other worker processes."""
+        loaded = await asyncio.to_thread(self._load_job, self._job_dir(job.id) / "job.json")
+        if loaded is not None:
+            self._merge(job, loaded)
+
+    @staticmethod
+    def _merge(job: Job, loaded: Job) -> None:
+        job.spec["cancelled"] = job.spec.get("cancelled") or loaded.spec.get("cancelled", False)
+        job.results.update({index: record for index, record in loaded.results.items() if index not in job.results})
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID."""
+        return self._jobs.get(job_id)
+
+    def all_jobs(self) -> list[Job]:
+        """All known jobs, newest first."""
+        return sorted(self._jobs.values(), key=lambda job: job.spec["created_at"], reverse=True)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job; queued items are skipped, items in progress still finish."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.spec["cancelled"] = True
+        await asyncio.to_thread(self._write_spec, job)
+        self._publish(job, {"type": "status", "data": job.summary()})
+        return job
+
+    async def events(self, job_id: str) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream progress events for a job until it finishes.
+
+        Yields a "status" event with the current summary first, then an
+        "item" event per finished item and a final "status" event.
+        """
+        job = self._jobs[job_id]
+        queue: asyncio.Queue = asyncio.Queue()
+        job.subscribers.append(queue)
+        try:
+            yield {"type": "status", "data": job.summary()}
+            if job.finished:
+                return
+            reported = set(job.results)
+            while True:
+                if self.leases is None:
+                    events = [await queue.get()]
+                else:
+                    try:
+                        events = [await asyncio.wait_for(queue.get(), timeout=SYNC_INTERVAL)]
+                    except asyncio.TimeoutError:
+                        # Other worker processes may be running some of the items
+                        await self._refresh(job)
+                        events = [
+                            {"type": "item", "data": self._item_event(job, index)}
+                            for index in sorted(set(job.results) - reported)
+                        ]
+                        if job.finished:
+                            events.append({"type": "status", "data": job.summary()})
+
+                for event in events:
+                    if event["type"] == "item":
+                        if event["data"]["index"] in reported:
+                            continue
+                        reported.add(event["data"]["index"])
+                    yield event
+                    if event["type"] == "status" and job.finished:
+                        return
+        finally:
+            job.subscribers.remove(queue)
+
+    def _publish(self, job: Job, event: dict[str, Any]) -> None:
+        for queue in job.subscribers:
+            queue.put_nowait(event)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job_id, index = await queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is None or job.spec.get("cancelled") or index in job.results:
+                    self._lease_retries.pop((job_id, index), None)
+                    continue
+                if self.leases is None:
+                    await self._run_item(job, index)
+                    continue
+
+                # Every worker process resumes unfinished jobs; the lease holder runs the item
+                lease = await self.leases.acquire(f"job:{job_id}:{index}")
+                if lease is None:
+                    self._retry_later(queue, job_id, index)
+                    continue
+                self._lease_retries.pop((job_id, index), None)
+                try:
+                    await self._refresh(job)
+                    if not job.spec.get("cancelled") and index not in job.results:
+                        await self._run_item(job, index)
+                finally:
+                    await lease.release()
+            except Exception:
+                logger.exception(f"Worker failed on job {job_id} item {index}")
+            finally:
+                queue.task_done()
+
+    def _retry_later(self, queue: asyncio.Queue, job_id: str, index: int) -> None:
+        """Re-queue an item leased by another worker process, with exponential backoff."""
+        retries = self._lease_retries.get((job_id, index), 0)
+        self._lease_retries[(job_id, index)] = retries + 1
+        delay = min(LEASE_RETRY_INTERVAL * 2 ** retries, self.leases.ttl)
+        logger.debug(f"Job {job_id} item {index} is leased by another worker, checking again in {delay:.1f}s")
+        asyncio.get_running_loop().call_later(delay, queue.put_nowait, (job_id, index))
+
+    async def _run_item(self, job: Job, index: int) -> None:
+        item = job.spec["items"][index]
+        job.running.add(index)
+        started = time.monotonic()
+        try:
+            with work_class(BATCH, group=job.id):
+                result = await self.process_item(item, job.spec["options"])
+            record = {"index": index, "status": DONE, "result": result}
+        except BatchItemError as e:
+            record = {"index": index, "status": ERROR, "error": str(e)}
+        except Exception as e:
+            logger.exception(f"Job {job.id} item {index} failed")
+            record = {"index": index, "status": ERROR, "error": f"Analysis failed: {str(e)}"}
+        finally:
+            job.running.discard(index)
+
+        record["finished_at"] = time.time()
+        record["seconds"] = round(time.monotonic() - started, 2)
+        async with job.lock:
+            await asyncio.to_thread(self._append_result, job, record)
+            job.results[index] = record
+
+        logger.info(f"Job {job.id}: item {index} {record['status']} ({len(job.results)}/{job.total})")
+        self._publish(job, {"type": "item", "data": self._item_event(job, index)})
+        if job.finished:
+            logger.info(f"Job {job.id} {job.status}")
+            self._publish(job, {"type": "status", "data": job.summary()})
+
+    @staticmethod
+    def _item_event(job: Job, index: int) -> dict[str, Any]:
+        """Progress event data for a finished item."""
+        record = job.results[index]
+        event = {k: v for k, v in record.items() if k != "result"}
+        event["name"] = job.spec["items"][index].get("name")
+        if record.get("result"):
+            event["position_count"] = len(record["result"].get("positions", []))
+        return event
+
+    # Persistence (runs in worker threads)
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.jobs_dir / job_id
+
+    def _write_spec(self, job: Job) -> None:
+        job_dir = self._job_dir(job.id)
+        job_dir.mkdir(exist_ok=True)
+        tmp_path = job_dir / "job.json.tmp"
+        tmp_path.write_text(json.dumps(job.spec))
+        tmp_path.replace(job_dir / "job.json")
+
+    def _append_result(self, job: Job, record: dict[str, Any]) -> None:
+        with open(self._job_dir(job.id) / "results.jsonl", "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _load_jobs(self) -> list[Job]:
+        jobs = []
+        for spec_file in self.jobs_dir.glob("*/job.json"):
+            job = self._load_job(spec_file)
+            if job is not None:
+                jobs.append(job)
+        return jobs
+
+    def _load_job(self, spec_file: Path) -> Optional[Job]:
+        if not spec_file.exists():
+            return None
+        try:
+            spec = json.loads(spec_file.read_text())
+        except (json.JSONDecodeError, IOError):
+            logger.warning(f"Skipping unreadable job file {spec_file}")
+            return None
+
+        results: dict[int, dict[str, Any]] = {}
+        results_file = spec_file.parent / "results.jsonl"
+        if results_file.exists():
+            for line in results_file.read_text().splitlines():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from an interrupted write
+                results[record["index"]] = record
+        return Job(spec, results)
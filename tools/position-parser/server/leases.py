@@ -0,0 +1,89 @@
+"""Leases that let one worker process run a piece of work while the others wait for it."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Optional
+
+from metrics import LEASES
+
+logger = logging.getLogger(__name__)
+
+
+class Lease:
+    """A held lease, renewed in the background until released."""
+
+    def __init__(self, manager: LeaseManager, name: str, token: str):
+        self.manager = manager
+        self.name = name
+        self.token = token
+        self._renewal = asyncio.create_task(self._renew())
+
+    async def _renew(self) -> None:
+        backend = self.manager.backend
+        while True:
+            await asyncio.sleep(self.manager.ttl / 3)
+            if not await asyncio.to_thread(backend.renew_lease, self.name, self.token, self.manager.ttl):
+                logger.warning(f"Lost lease {self.name}; another worker may repeat this work")
+                return
+
+    async def release(self) -> None:
+        """Stop renewing and give up the lease."""
+        self._renewal.cancel()
+        await asyncio.to_thread(self.manager.backend.release_lease, self.name, self.token)
+
+
+class LeaseManager:
+    """
+    Named leases shared by all worker processes through the shared backend.
+
+    acquire() returns a Lease when nobody holds the name, or None when
+    another worker (or another task of this one) is already doing that work;
+    the caller can then wait() for it and reuse what it cached. Leases
+    expire ttl seconds after their last renewal, and a held Lease renews
+    itself every ttl / 3 seconds, so work abandoned by a crashed worker is
+    picked up within ttl.
+
+    The backend is a SQLiteStore (workers on one host) or a RedisStore
+    (workers on several hosts); its blocking methods run in worker threads.
+    """
+
+    def __init__(self, backend: Any, ttl: float = 30.0, poll_interval: float = 0.5):
+        self.backend = backend
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def acquire(self, name: str) -> Optional[Lease]:
+        """
+        Take a lease if nobody holds it.
+
+        Args:
+            name: Identifies the work, e.g. "parse:<key>"
+
+        Returns:
+            The held lease, or None if it is held elsewhere
+        """
+        token = f"{self.owner}:{uuid.uuid4().hex[:8]}"
+        if await asyncio.to_thread(self.backend.acquire_lease, name, token, self.ttl):
+            LEASES.labels(result="acquired").inc()
+            return Lease(self, name, token)
+        LEASES.labels(result="held").inc()
+        return None
+
+    async def wait(self, name: str) -> float:
+        """
+        Wait until nobody holds a lease.
+
+        Returns:
+            Seconds waited
+        """
+        started = time.monotonic()
+        while await asyncio.to_thread(self.backend.lease_held, name):
+            await asyncio.sleep(self.poll_interval)
+        return time.monotonic() - started
@@ -2,19 +2,35 @@
 
 import json
 import logging
+import os
+import sqlite3
 import sys
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Optional
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
 
-from analyzer import analyze_content
-from cache import ResponseCache
+from analyzer import AsyncAnalyzer, BatchAnalyzer, rebase_source_urls, source_hashes, unfiltered_sources
+from cache import ANALYSES, BOILERPLATE, PAGES, TRIAGE, VALIDATORS, TieredCache, content_hash, make_key
 from config import get_settings
+from crawler import SiteCrawler
+from dedup import BoilerplateFilter
+from extractor import Extractor
+from jobs import DEFAULT_POOL, BatchItemError, Job, JobManager
+from leases import LeaseManager
+from metrics import PARSE_IN_FLIGHT, PARSE_SECONDS, PIPELINES_IN_FLIGHT, forget_dead_workers, stage
 from mock_data import MOCK_RESPONSE
-from models import ParseRequest, ParserResponse
-from scraper import scrape_urls, ScrapeErrorType
+from models import BatchJobRequest, InvalidateRequest, ParseRequest, ParserResponse
+from redis_store import RedisStore
+from renderer import BrowserRenderer
+from scheduler import INTERACTIVE, PriorityScheduler, RateLimits, current_priority
+from scraper import CircuitBreaker, DomainThrottle, Scraper, ScrapeErrorType, normalize_url
+from singleflight import SingleFlight
+from store import SQLiteStore
+from triage import SourceTriage
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +53,10 @@ def get_user_friendly_error(error_type: ScrapeErrorType, domain: str) -> str:
             f"{domain} uses JavaScript to load its content, which the parser can't read. "
             "Please copy and paste the content manually."
         ),
+        ScrapeErrorType.UNSUPPORTED_CONTENT: (
+            f"{domain} returned a file (such as a PDF or image) rather than a web page. "
+            "Please copy and paste the content manually."
+        ),
         ScrapeErrorType.TIMEOUT: (
             f"{domain} took too long to respond. "
             "Try again, or if this persists, the site may be experiencing issues."
@@ -45,6 +65,10 @@ def get_user_friendly_error(error_type: ScrapeErrorType, domain: str) -> str:
             f"{domain} is experiencing server issues and may be temporarily down. "
             "Try again later."
         ),
+        ScrapeErrorType.RATE_LIMITED: (
+            f"{domain} is rate limiting our requests. "
+            "Try again in a few minutes."
+        ),
         ScrapeErrorType.NOT_FOUND: (
             f"The page on {domain} was not found (404). "
             "Please check the URL and try again."
@@ -60,14 +84,163 @@ def get_user_friendly_error(error_type: ScrapeErrorType, domain: str) -> str:
     }
     return messages.get(error_type, messages[ScrapeErrorType.UNKNOWN])
 
+settings = get_settings()
+
+# SQLite store: the cache's disk tier and the history of analysis results
+store = SQLiteStore(
+    os.path.join(settings.cache_dir, "store.db"),
+    max_cache_bytes=settings.cache_disk_max_mb * 1024 * 1024,
+)
+
+# Backend shared by worker processes, for the cache tier and leases on in-flight work
+if settings.shared_backend not in ("local", "sqlite", "redis"):
+    raise ValueError(f"Unknown SHARED_BACKEND {settings.shared_backend!r} (expected local, sqlite or redis)")
+shared = settings.shared_backend != "local"
+if settings.shared_backend == "redis":
+    shared_store = RedisStore(settings.redis_url, prefix=settings.redis_prefix, history=store)
+else:
+    shared_store = store
+
+# Initialize cache
+cache = TieredCache(
+    shared_store,
+    memory_max_bytes=settings.cache_memory_max_mb * 1024 * 1024,
+    default_ttls={
+        PAGES: settings.cache_page_ttl,
+        VALIDATORS: settings.cache_page_ttl,
+        BOILERPLATE: settings.cache_page_ttl,
+        ANALYSES: settings.cache_analysis_ttl,
+        TRIAGE: settings.cache_analysis_ttl,
+    },
+    # Other workers rewrite these in place, so each read goes to the shared store
+    shared_namespaces=(VALIDATORS, BOILERPLATE) if shared else (),
+    sync_interval=1.0 if shared else None,
+)
+
+# Only one worker process at a time parses a set of URLs or runs a batch item
+leases = LeaseManager(shared_store, ttl=settings.lease_ttl) if shared else None
+
+# Removes repeated text and learned site boilerplate before analysis
+boilerplate_filter = BoilerplateFilter(
+    cache if settings.cache_enabled else None,
+    min_pages=settings.boilerplate_min_pages,
+)
+
+# Initialize the shared analysis engine (one client for the app's lifetime)
+analyzer = AsyncAnalyzer(
+    settings.anthropic_api_key,
+    max_concurrency=settings.analysis_max_concurrency,
+    model=settings.anthropic_model,
+    timeout=settings.analysis_timeout,
+    base_url=settings.anthropic_base_url,
+    prompt_caching=settings.prompt_caching,
+    chunked=settings.analysis_chunked,
+    chunk_chars=settings.analysis_chunk_chars,
+    reduce_model=settings.reduce_model,
+    structured_output=settings.structured_output,
+    max_continuations=settings.analysis_max_continuations,
+    incremental=settings.analysis_incremental,
+    cache=cache if settings.cache_enabled else None,
+    reserved_slots=settings.analysis_reserved_slots,
+    rate_limits=RateLimits(headroom=settings.rate_limit_headroom),
+)
+
+# Drops sources without policy content before the extraction call
+source_triage = SourceTriage(
+    settings.triage_mode,
+    min_score=settings.triage_min_score,
+    analyzer=analyzer,
+    model=settings.triage_model,
+    excerpt_chars=settings.triage_excerpt_chars,
+    cache=cache if settings.cache_enabled else None,
+)
+
+# Offline Message Batches backend for bulk jobs
+batch_analyzer = BatchAnalyzer(
+    settings.anthropic_api_key,
+    model=settings.anthropic_model,
+    max_batch_size=settings.message_batch_max_size,
+    flush_interval=settings.message_batch_flush_interval,
+    poll_interval=settings.message_batch_poll_interval,
+    base_url=settings.anthropic_base_url,
+    prompt_caching=settings.prompt_caching,
+    max_continuations=settings.analysis_max_continuations,
+)
+
+# Shared scraper; its pooled HTTP client is opened and closed with the app
+scraper = Scraper(
+    timeout=settings.scrape_timeout,
+    max_connections=settings.scrape_max_connections,
+    max_keepalive_connections=settings.scrape_max_keepalive_connections,
+    keepalive_expiry=settings.scrape_keepalive_expiry,
+    http2=settings.scrape_http2,
+    max_bytes=settings.scrape_max_bytes,
+    max_text_chars=settings.scrape_max_text_chars,
+    retries=settings.scrape_retries,
+    retry_base_delay=settings.scrape_retry_base_delay,
+    retry_max_delay=settings.scrape_retry_max_delay,
+    max_retry_after=settings.scrape_max_retry_after,
+    breaker=CircuitBreaker(settings.scrape_breaker_threshold, settings.scrape_breaker_cooldown),
+    cache=cache if settings.cache_enabled else None,
+    extractor=Extractor(
+        backend=settings.extractor_backend,
+        main_content=settings.extractor_main_content,
+        executor=settings.extractor_executor,
+        max_workers=settings.extractor_workers,
+    ),
+    scheduler=PriorityScheduler(
+        "scrape", settings.scrape_max_concurrency, reserved=settings.scrape_reserved_slots
+    ),
+    renderer=BrowserRenderer(
+        max_concurrency=settings.render_concurrency,
+        timeout=settings.render_timeout,
+        settle_time=settings.render_settle_time,
+        blocked_resources=tuple(r.strip() for r in settings.render_block_resources.split(",") if r.strip()),
+    ) if settings.render_enabled else None,
+)
+
+# Expands homepages into their sites' policy pages, through the shared scraper
+crawler = SiteCrawler(
+    scraper,
+    max_depth=settings.crawl_max_depth,
+    max_pages=settings.crawl_max_pages,
+    time_budget=settings.crawl_time_budget,
+    use_sitemap=settings.crawl_sitemap,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage application-lifetime resources."""
+    if settings.workers > 1 and not shared:
+        logger.warning("WORKERS > 1 with SHARED_BACKEND=local: workers will repeat each other's scrapes and analyses")
+    await scraper.start()
+    if scraper.renderer is not None:
+        await scraper.renderer.start()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await scraper.aclose()
+    if scraper.renderer is not None:
+        await scraper.renderer.aclose()
+    scraper.extractor.shutdown()
+    await batch_analyzer.close()
+    await analyzer.close()
+    if shared_store is not store:
+        shared_store.close()
+    store.close()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
 app = FastAPI(
     title="Position Parser API",
     description="Extract politician policy positions from website URLs",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
-settings = get_settings()
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins.split(","),
@@ -76,9 +249,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize cache
-cache = ResponseCache(settings.cache_dir)
-
 
 def validate_api_key(request: Request) -> None:
     """Validate the API key from request headers."""
@@ -90,11 +260,65 @@ def validate_api_key(request: Request) -> None:
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 
-async def generate_sse(urls: list[str]) -> AsyncGenerator[str, None]:
+def urls_key(urls: list[str], crawl: bool = False) -> str:
+    """Key identifying requests for the same set of URLs (and crawl mode)."""
+    normalized = sorted({normalize_url(url) for url in urls})
+    return make_key(normalized, "crawl") if crawl else make_key(normalized)
+
+
+async def parse_events(
+    urls: list[str],
+    throttle: Optional[DomainThrottle] = None,
+    backend: Optional[BatchAnalyzer] = None,
+    crawl: bool = False,
+) -> AsyncGenerator[dict[str, Any], None]:
     """
-    Generate Server-Sent Events for the parsing process.
+    Run the scrape and analysis pipeline for one set of URLs, once across worker processes.
 
-    Yields SSE-formatted strings with progress updates and final results.
+    With a shared backend, a worker that finds another one already parsing
+    the same URLs waits for it, then runs the pipeline against the pages
+    and analysis it cached instead of repeating the work.
+
+    Args and events are those of run_pipeline().
+    """
+    if leases is None:
+        async for event in run_pipeline(urls, throttle, backend, crawl):
+            yield event
+        return
+
+    name = f"parse:{urls_key(urls, crawl)}"
+    lease = await leases.acquire(name)
+    if lease is None:
+        yield {"type": "progress", "message": "Another worker is parsing these URLs, waiting for its results..."}
+        while lease is None:
+            waited = await leases.wait(name)
+            logger.info(f"Waited {waited:.1f}s for another worker parsing {urls}")
+            lease = await leases.acquire(name)
+    try:
+        async for event in run_pipeline(urls, throttle, backend, crawl):
+            yield event
+    finally:
+        await lease.release()
+
+
+async def run_pipeline(
+    urls: list[str],
+    throttle: Optional[DomainThrottle] = None,
+    backend: Optional[BatchAnalyzer] = None,
+    crawl: bool = False,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """
+    Run the scrape and analysis pipeline for one set of URLs.
+
+    Args:
+        urls: URLs to parse
+        throttle: Optional per-domain politeness limiter for the scrape
+        backend: Alternative analysis backend; by default positions are
+            streamed from the shared AsyncAnalyzer
+        crawl: Also scrape the policy pages found by crawling each URL's site
+
+    Yields event dicts with progress updates, streamed positions and the
+    final result (or an error).
     """
     warnings: list[str] = []
     logger.info(f"Processing parse request for {len(urls)} URL(s): {urls}")
@@ -102,25 +326,21 @@ async def generate_sse(urls: list[str]) -> AsyncGenerator[str, None]:
     # Check for DEV_MODE
     if settings.dev_mode:
         logger.info("DEV_MODE enabled, returning mock data")
-        yield f"data: {json.dumps({'type': 'progress', 'message': 'DEV_MODE: Using mock data...'})}\n\n"
+        yield {"type": "progress", "message": "DEV_MODE: Using mock data..."}
         result = MOCK_RESPONSE.copy()
-        yield f"data: {json.dumps({'type': 'result', 'data': result})}\n\n"
+        yield {"type": "result", "data": result}
         return
 
-    # Check cache first
-    if settings.cache_enabled:
-        cached = cache.get(urls)
-        if cached:
-            logger.info("Returning cached response")
-            yield f"data: {json.dumps({'type': 'progress', 'message': 'Found cached response...'})}\n\n"
-            yield f"data: {json.dumps({'type': 'result', 'data': cached})}\n\n"
-            return
-
     # Scrape URLs
     total_urls = len(urls)
-    yield f"data: {json.dumps({'type': 'progress', 'message': f'Scraping {total_urls} URL(s)...'})}\n\n"
-
-    content_map, scrape_errors = await scrape_urls(urls)
+    if crawl:
+        yield {"type": "progress", "message": f"Finding policy pages on {total_urls} site(s)..."}
+        content_map, scrape_errors = await crawler.crawl_urls(urls, throttle=throttle)
+        if content_map:
+            yield {"type": "progress", "message": f"Scraped {len(content_map)} page(s) from {total_urls} site(s)"}
+    else:
+        yield {"type": "progress", "message": f"Scraping {total_urls} URL(s)..."}
+        content_map, scrape_errors = await scraper.scrape_urls(urls, throttle=throttle)
 
     # Convert structured errors to user-friendly warnings
     for error_type, domain in scrape_errors:
@@ -137,37 +357,135 @@ async def generate_sse(urls: list[str]) -> AsyncGenerator[str, None]:
         else:
             error_message = "Failed to scrape any content from provided URLs."
             logger.error("All URLs failed with no specific error")
-        yield f"data: {json.dumps({'type': 'error', 'message': error_message})}\n\n"
+        yield {"type": "error", "message": error_message}
         return
 
     successful_count = len(content_map)
     logger.info(f"Scraped {successful_count}/{total_urls} URLs successfully")
-    if successful_count < total_urls:
-        yield f"data: {json.dumps({'type': 'progress', 'message': f'Scraped {successful_count}/{total_urls} URLs successfully'})}\n\n"
+    if successful_count < total_urls and not crawl:
+        yield {"type": "progress", "message": f"Scraped {successful_count}/{total_urls} URLs successfully"}
+
+    # Cache keys come from the scraped text: filtering depends on what else was parsed
+    raw_map = content_map
+    if settings.boilerplate_filter:
+        content_map = await boilerplate_filter.strip(content_map)
+
+    # Triage may drop pages a crawl found, but an interactive parse keeps every page the user asked for
+    requested = {normalize_url(url) for url in urls} if current_priority() == INTERACTIVE else set()
+    content_map, skipped = await source_triage.filter(content_map, keep=requested)
+    for url in skipped:
+        warnings.append(f"Skipped {url}: no policy positions found on this page.")
+    unfiltered = unfiltered_sources(content_map, raw_map)
+
+    # Check the analysis cache (keyed by content, so unchanged pages skip Claude)
+    analysis_key = (backend or analyzer).cache_key(content_map, raw_map)
+    if settings.cache_enabled:
+        cached = await cache.get(ANALYSES, analysis_key)
+        if cached:
+            logger.info("Returning cached analysis")
+            result = rebase_source_urls(cached["result"], cached["sources"], unfiltered)
+            if warnings:
+                result["warnings"] = (result.get("warnings") or []) + warnings
+            yield {"type": "progress", "message": "Found cached response..."}
+            yield {"type": "result", "data": result}
+            return
 
     # Analyze with Claude
-    yield f"data: {json.dumps({'type': 'progress', 'message': 'Analyzing content with Claude...'})}\n\n"
+    yield {"type": "progress", "message": "Analyzing content with Claude..."}
 
     try:
-        result = analyze_content(content_map, settings.anthropic_api_key)
+        result: dict = {}
+        if backend is not None:
+            result = await backend.analyze(content_map)
+        else:
+            async for event_type, data in analyzer.analyze_stream(content_map):
+                if event_type == "position":
+                    yield {"type": "position", "data": data}
+                else:
+                    result = data
+
         politician_name = result.get("politician_name", "Unknown")
         position_count = len(result.get("positions", []))
         logger.info(f"Analysis complete: {politician_name}, {position_count} positions extracted")
 
+        # Cache and record the result (before scrape warnings, which are specific to this request)
+        if settings.cache_enabled and result.get("positions"):
+            await cache.set(ANALYSES, analysis_key, {"result": result, "sources": source_hashes(unfiltered)})
+        if result.get("positions"):
+            sources = {url: content_hash(content) for url, content in unfiltered.items()}
+            try:
+                await store.record_result(result, sources, analysis_key)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to record result in the store: {e}")
+
         # Add any scrape warnings to the result
         if warnings:
             existing_warnings = result.get("warnings", []) or []
             result["warnings"] = existing_warnings + warnings
 
-        # Cache the result
-        if settings.cache_enabled:
-            cache.set(urls, result)
-
-        yield f"data: {json.dumps({'type': 'result', 'data': result})}\n\n"
+        yield {"type": "result", "data": result}
 
     except Exception as e:
         logger.exception(f"Analysis failed for URLs: {urls}")
-        yield f"data: {json.dumps({'type': 'error', 'message': f'Analysis failed: {str(e)}'})}\n\n"
+        yield {"type": "error", "message": f"Analysis failed: {str(e)}"}
+
+
+# Concurrent /api/parse requests for the same URLs share one pipeline
+parse_flights = SingleFlight()
+
+
+async def counted_pipeline(urls: list[str], crawl: bool = False) -> AsyncGenerator[dict[str, Any], None]:
+    """parse_events, counted in PIPELINES_IN_FLIGHT while it runs."""
+    with PIPELINES_IN_FLIGHT.track_inprogress():
+        async for event in parse_events(urls, crawl=crawl):
+            yield event
+
+
+async def generate_sse(urls: list[str], crawl: bool = False) -> AsyncGenerator[str, None]:
+    """
+    Generate Server-Sent Events for the parsing process.
+
+    Identical requests already in flight (e.g. several editors opening the
+    same politician) attach to the running pipeline instead of scraping and
+    analyzing again, and receive the same events.
+
+    Yields SSE-formatted strings with progress updates and final results.
+    """
+    flight_key = urls_key(urls, crawl)
+    with PARSE_IN_FLIGHT.track_inprogress(), stage("parse", PARSE_SECONDS):
+        async for event in parse_flights.stream(flight_key, lambda: counted_pipeline(urls, crawl=crawl)):
+            yield f"data: {json.dumps(event)}\n\n"
+
+
+async def process_batch_item(item: dict[str, Any], options: dict[str, Any]) -> dict[str, Any]:
+    """Run the parse pipeline for one politician of a batch job."""
+    urls = [url.strip() for url in item["urls"] if url.strip()]
+    result: dict[str, Any] = {}
+    backend = batch_analyzer if options.get("analysis_backend") == "message_batch" else None
+    async for event in parse_events(urls, throttle=batch_throttle, backend=backend, crawl=options.get("crawl", False)):
+        if event["type"] == "error":
+            raise BatchItemError(event["message"])
+        if event["type"] == "result":
+            result = event["data"]
+    return result
+
+
+# Batch jobs: bounded worker pool, polite to each domain, persisted for resume
+batch_throttle = DomainThrottle(
+    max_concurrency=settings.batch_domain_concurrency,
+    min_interval=settings.batch_domain_interval,
+    burst=settings.batch_domain_burst,
+)
+job_manager = JobManager(
+    settings.jobs_dir,
+    process_batch_item,
+    pools={
+        DEFAULT_POOL: settings.batch_concurrency,
+        # Items waiting on a Message Batch hold a worker, so allow a full batch of them
+        "message_batch": settings.message_batch_max_size,
+    },
+    leases=leases,
+)
 
 
 @app.get("/health")
@@ -176,6 +494,20 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, cache and error counters, token usage."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several worker processes: merge the samples each one writes to the directory
+        forget_dead_workers(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post("/api/parse")
 async def parse_positions(request: Request, body: ParseRequest):
     """
@@ -198,7 +530,7 @@ async def parse_positions(request: Request, body: ParseRequest):
         raise HTTPException(status_code=400, detail="At least one valid URL is required")
 
     return StreamingResponse(
-        generate_sse(urls),
+        generate_sse(urls, body.crawl),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -208,15 +540,186 @@ async def parse_positions(request: Request, body: ParseRequest):
     )
 
 
+@app.get("/api/usage")
+async def get_usage(request: Request):
+    """Token usage totals since startup, including prompt cache reads and writes."""
+    validate_api_key(request)
+    return {"realtime": analyzer.usage.as_dict(), "message_batch": batch_analyzer.usage.as_dict()}
+
+
 @app.post("/api/clear-cache")
 async def clear_cache(request: Request):
     """Clear the response cache."""
     validate_api_key(request)
-    count = cache.clear()
+    count = await cache.clear()
     return {"message": f"Cleared {count} cached responses"}
 
 
+@app.post("/api/invalidate")
+async def invalidate(request: Request, body: InvalidateRequest):
+    """
+    Invalidate the cached pages of one URL or a whole domain, and the analyses built from them.
+
+    The next parse of an affected politician scrapes and analyzes again.
+    Stored results are kept in the history, marked as invalidated.
+    """
+    validate_api_key(request)
+    if bool(body.url) == bool(body.domain):
+        raise HTTPException(status_code=400, detail="Provide exactly one of url or domain")
+
+    url = normalize_url(body.url) if body.url else None
+    counts = await cache.invalidate(url=url, domain=body.domain)
+    logger.info(f"Invalidated {url or body.domain}: {counts['entries']} cache entries, {counts['results']} results")
+    return counts
+
+
+@app.get("/api/results")
+async def list_results(
+    request: Request,
+    politician: Optional[str] = None,
+    url: Optional[str] = None,
+    domain: Optional[str] = None,
+    before: Optional[int] = None,
+    limit: int = 20,
+    include_results: bool = False,
+):
+    """
+    Page through stored analysis results, newest first.
+
+    Filter by politician name, source URL or source domain. Pass the
+    returned next_before as before to fetch the next page.
+    """
+    validate_api_key(request)
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
+    results = await store.history(
+        politician_name=politician,
+        url=normalize_url(url) if url else None,
+        domain=domain,
+        before=before,
+        limit=limit,
+        include_results=include_results,
+    )
+    next_before = results[-1]["id"] if len(results) == limit else None
+    return {"results": results, "next_before": next_before}
+
+
+@app.get("/api/results/latest")
+async def latest_result(request: Request, politician: str):
+    """Get the most recent result for a politician (name matched case-insensitively)."""
+    validate_api_key(request)
+    result = await store.latest_result(politician)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No results for this politician")
+    return result
+
+
+@app.post("/api/jobs")
+async def create_job(request: Request, body: BatchJobRequest):
+    """
+    Queue a batch parse job for many politicians.
+
+    Returns the job summary; follow progress with GET /api/jobs/{job_id}
+    or the /api/jobs/{job_id}/events SSE stream.
+    """
+    validate_api_key(request)
+
+    if not body.politicians:
+        raise HTTPException(status_code=400, detail="At least one politician is required")
+
+    if len(body.politicians) > settings.batch_max_politicians:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.batch_max_politicians} politicians per job",
+        )
+
+    items = []
+    for index, politician in enumerate(body.politicians):
+        urls = [url.strip() for url in politician.urls if url.strip()]
+        if not urls:
+            raise HTTPException(status_code=400, detail=f"Politician {index} has no valid URLs")
+        if len(urls) > 4:
+            raise HTTPException(status_code=400, detail=f"Politician {index}: maximum 4 URLs allowed")
+        items.append({**politician.model_dump(), "urls": urls})
+
+    pool = "message_batch" if body.analysis_backend == "message_batch" else DEFAULT_POOL
+    job = await job_manager.submit(items, {"analysis_backend": body.analysis_backend, "crawl": body.crawl}, pool=pool)
+    return job.summary()
+
+
+@app.get("/api/jobs")
+async def list_jobs(request: Request):
+    """List batch jobs, newest first."""
+    validate_api_key(request)
+    await job_manager.sync()
+    return {"jobs": [job.summary() for job in job_manager.all_jobs()]}
+
+
+async def get_job_or_404(job_id: str) -> Job:
+    """Look up a batch job (with progress from other worker processes) or raise a 404."""
+    await job_manager.sync(job_id)
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(request: Request, job_id: str, include_results: bool = False):
+    """Get batch job progress, optionally with each item's result."""
+    validate_api_key(request)
+    job = await get_job_or_404(job_id)
+
+    items = []
+    for index, item in enumerate(job.spec["items"]):
+        record = job.results.get(index)
+        entry = {
+            "index": index,
+            "name": item.get("name"),
+            "politician_id": item.get("politician_id"),
+            "status": record["status"] if record else ("running" if index in job.running else "pending"),
+        }
+        if record and record.get("error"):
+            entry["error"] = record["error"]
+        if record and include_results and record.get("result"):
+            entry["result"] = record["result"]
+        items.append(entry)
+
+    return {**job.summary(), "items": items}
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """Stream batch job progress as Server-Sent Events."""
+    validate_api_key(request)
+    await get_job_or_404(job_id)
+
+    async def generate() -> AsyncGenerator[str, None]:
+        async for event in job_manager.events(job_id):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(request: Request, job_id: str):
+    """Cancel a batch job. Items already in progress still finish."""
+    validate_api_key(request)
+    await get_job_or_404(job_id)
+    job = await job_manager.cancel(job_id)
+    return job.summary()
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host=settings.host, port=settings.port)
+    uvicorn.run("main:app", host=settings.host, port=settings.port, workers=settings.workers)
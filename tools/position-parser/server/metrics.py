@@ -0,0 +1,210 @@
+"""Prometheus metrics and optional OpenTelemetry tracing for the parse pipeline."""
+
+from __future__ import annotations
+
+import glob
+import os
+import re
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+# Spans are no-ops unless an OpenTelemetry SDK is configured, e.g. by running
+# the server under `opentelemetry-instrument uvicorn main:app`
+tracer = trace.get_tracer("position-parser") if trace is not None else None
+
+# Latency buckets reaching Claude-scale durations (long generations take minutes)
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+PARSE_SECONDS = Histogram(
+    "position_parser_parse_seconds",
+    "End-to-end duration of /api/parse requests",
+    buckets=LATENCY_BUCKETS,
+)
+SCRAPE_SECONDS = Histogram(
+    "position_parser_scrape_seconds",
+    "Time to fetch one URL (DNS, connect, download and extraction)",
+    ["domain"],
+    buckets=LATENCY_BUCKETS,
+)
+RENDER_SECONDS = Histogram(
+    "position_parser_render_seconds",
+    "Time to render a JavaScript page in the headless browser",
+    ["domain"],
+    buckets=LATENCY_BUCKETS,
+)
+EXTRACT_SECONDS = Histogram(
+    "position_parser_extract_seconds",
+    "Time spent extracting text from one page in the worker pool",
+    ["backend"],
+    buckets=FAST_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "position_parser_llm_seconds",
+    "Duration of Claude calls",
+    ["call", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "position_parser_llm_first_token_seconds",
+    "Time to first streamed token of Claude calls",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "position_parser_scheduler_wait_seconds",
+    "Time outbound work waited for a scheduler slot",
+    ["resource", "priority"],
+    buckets=LATENCY_BUCKETS,
+)
+JSON_PARSE_SECONDS = Histogram(
+    "position_parser_json_parse_seconds",
+    "Time to parse (and repair) Claude's JSON output",
+    buckets=FAST_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    "position_parser_cache_requests_total",
+    "Cache lookups by namespace and result (memory, disk or miss)",
+    ["namespace", "result"],
+)
+SCRAPE_ERRORS = Counter(
+    "position_parser_scrape_errors_total",
+    "Failed scrapes by error type",
+    ["error_type"],
+)
+SCRAPE_RETRIES = Counter(
+    "position_parser_scrape_retries_total",
+    "Scrape retries by the error that triggered them",
+    ["error_type"],
+)
+RENDERS = Counter(
+    "position_parser_renders_total",
+    "Headless browser renders by result (ok, timeout or error)",
+    ["result"],
+)
+TOKENS = Counter(
+    "position_parser_tokens_total",
+    "Tokens reported by the API, by backend and token type",
+    ["backend", "type"],
+)
+CONTINUATIONS = Counter(
+    "position_parser_continuations_total",
+    "Follow-up Claude calls made because a response hit max_tokens",
+    ["backend"],
+)
+CONTINUATION_TOKENS = Counter(
+    "position_parser_continuation_tokens_total",
+    "Tokens spent on continuation calls, by backend and token type",
+    ["backend", "type"],
+)
+BOILERPLATE_CHARS = Counter(
+    "position_parser_boilerplate_chars_removed_total",
+    "Characters of repeated text and boilerplate removed before analysis",
+)
+SOURCE_ANALYSES = Counter(
+    "position_parser_source_analyses_total",
+    "Sources of incremental analyses, by whether their stored result was reused or they were analyzed",
+    ["result"],
+)
+TRIAGE_SOURCES = Counter(
+    "position_parser_triage_sources_total",
+    "Sources scored before analysis, by triage mode and whether they were kept, demoted or dropped",
+    ["mode", "result"],
+)
+CRAWL_PAGES = Counter(
+    "position_parser_crawl_pages_total",
+    "Pages seen by the discovery crawler, by how they were found or why they were not used",
+    ["result"],
+)
+LEASES = Counter(
+    "position_parser_leases_total",
+    "Attempts to take a lease shared by worker processes, by whether it was acquired or already held",
+    ["result"],
+)
+
+PARSE_IN_FLIGHT = Gauge(
+    "position_parser_parse_requests_in_flight",
+    "/api/parse requests currently streaming",
+    multiprocess_mode="livesum",
+)
+LLM_IN_FLIGHT = Gauge(
+    "position_parser_llm_calls_in_flight",
+    "Claude calls currently in progress",
+    multiprocess_mode="livesum",
+)
+PIPELINES_IN_FLIGHT = Gauge(
+    "position_parser_pipelines_in_flight",
+    "Distinct parse pipelines running (coalesced requests share one)",
+    multiprocess_mode="livesum",
+)
+SCHEDULER_QUEUED = Gauge(
+    "position_parser_scheduler_queued",
+    "Outbound work waiting for a scheduler slot",
+    ["resource", "priority"],
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REMAINING = Gauge(
+    "position_parser_anthropic_rate_limit_remaining",
+    "Remaining Anthropic per-minute budget reported by the last response",
+    ["kind"],
+    # Each worker reports what its own last response said; summing those would overstate the budget
+    multiprocess_mode="liveall",
+)
+
+
+def forget_dead_workers(path: str) -> None:
+    """
+    Drop the live gauge samples of worker processes that are gone.
+
+    In multiprocess mode each worker writes its samples to files named after
+    its pid. Live gauges only merge the files of running workers, which
+    relies on the files of exited workers being removed; a worker that
+    crashed never removed its own.
+
+    Args:
+        path: The PROMETHEUS_MULTIPROC_DIR directory
+    """
+    for file in glob.glob(os.path.join(path, "gauge_live*_*.db")):
+        match = re.search(r"_(\d+)\.db$", file)
+        if match is None:
+            continue
+        pid = int(match.group(1))
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            multiprocess.mark_process_dead(pid, path)
+        except PermissionError:
+            pass
+
+
+@contextmanager
+def stage(name: str, histogram: Optional[Histogram] = None, **labels: str) -> Iterator[None]:
+    """
+    Time one pipeline stage into a histogram and trace it as a span.
+
+    Args:
+        name: Span name, e.g. "scrape" or "llm.stream"
+        histogram: Histogram to observe the duration in, if any
+        labels: Histogram labels, also recorded as span attributes
+    """
+    span = tracer.start_as_current_span(name, attributes=labels) if tracer is not None else nullcontext()
+    started = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            if histogram is not None:
+                _observe(histogram, labels, time.perf_counter() - started)
+
+
+def _observe(histogram: Histogram, labels: dict[str, str], seconds: float) -> None:
+    (histogram.labels(**labels) if labels else histogram).observe(seconds)
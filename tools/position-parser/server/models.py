@@ -1,11 +1,38 @@
 from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from typing import Literal, Optional
 
 
 class ParseRequest(BaseModel):
     """Request body for the parse endpoint."""
 
     urls: list[str]
+    # Also scrape the policy pages found by crawling each URL's site
+    crawl: bool = False
+
+
+class BatchItem(BaseModel):
+    """One politician in a batch job."""
+
+    name: Optional[str] = None
+    politician_id: Optional[str] = None
+    urls: list[str]
+
+
+class BatchJobRequest(BaseModel):
+    """Request body for creating a batch parse job."""
+
+    politicians: list[BatchItem]
+    # "realtime" calls Claude per politician; "message_batch" uses the cheaper Message Batches API
+    analysis_backend: Literal["realtime", "message_batch"] = "realtime"
+    # Crawl each politician's URLs for their sites' policy pages
+    crawl: bool = False
+
+
+class InvalidateRequest(BaseModel):
+    """Request body for invalidating cached pages and analyses."""
+
+    url: Optional[str] = None
+    domain: Optional[str] = None
 
 
 class PolicyPosition(BaseModel):
@@ -38,6 +65,13 @@ class SSEResultEvent(BaseModel):
     data: ParserResponse
 
 
+class SSEPositionEvent(BaseModel):
+    """Server-sent event for a single position, sent as soon as it is extracted."""
+
+    type: str = "position"
+    data: PolicyPosition
+
+
 class SSEErrorEvent(BaseModel):
     """Server-sent event for errors."""
 
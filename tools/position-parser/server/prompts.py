@@ -80,3 +80,47 @@ IMPORTANT:
 - Do NOT categorize positions - just extract them
 - The user will categorize positions manually later
 </output_format>"""
+
+
+REDUCE_PROMPT = """ROLE: Policy Auditor. Consolidate candidate policy positions into a final structured JSON list.
+
+The candidates were extracted independently from separate chunks of one politician's sources, so the same topic may appear several times.
+
+<consolidation_rules>
+1. CONSOLIDATE: Merge all candidates on the same topic into ONE comprehensive entry that keeps every concrete detail
+2. FORMAT: Each stance still starts with "For" or "Against"
+3. SOURCES: The merged entry's source_urls is the union of the merged candidates' source_urls. Never invent URLs
+4. CONTRADICTIONS: If candidates on the same topic conflict, keep both with a note
+5. Do not add positions that are not among the candidates
+</consolidation_rules>
+
+<output_format>
+Return ONLY valid JSON with this exact structure:
+{
+  "politician_name": "Name if found, null otherwise",
+  "positions": [
+    {
+      "stance": "For/Against [specific position]",
+      "source_urls": ["url1", "url2"],
+      "note": "Optional - only for contradictions"
+    }
+  ]
+}
+</output_format>"""
+
+
+TRIAGE_PROMPT = """ROLE: Policy Auditor. Score how much concrete policy content each source excerpt contains, before a full extraction pass.
+
+<scoring>
+10: Issue or platform pages, voting records, legislation summaries: many clear stances on policy topics
+5: Mixed pages with a few stances among other material, such as speeches or long news articles
+1: Mentions policy topics only in passing
+0: No policy stances: biographies, donation and volunteer forms, event listings, news headline lists, contact pages
+</scoring>
+
+Judge only what the excerpt says, not what the rest of the page might contain. Score every source listed, using its index."""
+
+
+CONTINUE_PROMPT = """Your previous response hit the output token limit. The {count} positions above have been recorded.
+
+Continue with the remaining positions only: do not repeat any position already recorded, and use the same output format. If no positions remain, return an empty positions list."""
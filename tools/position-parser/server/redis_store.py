@@ -0,0 +1,268 @@
+"""Redis backend shared by worker processes on several hosts: the cache tier and leases."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Optional
+
+from store import SQLiteStore, url_domain
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Deleted cache keys kept in the stream other worker processes read
+INVALIDATION_LOG_LENGTH = 10000
+
+# Release or renew a lease only if the caller still holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return 0
+"""
+
+
+def _stream_id(entry_id: str) -> tuple[int, int]:
+    milliseconds, _, sequence = entry_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+class RedisStore:
+    """
+    Cache tier and leases in Redis, for worker processes spread over hosts.
+
+    A drop-in replacement for SQLiteStore's cache-tier, lease and
+    invalidation-log methods. Entries expire through Redis TTLs; bounding
+    total size is left to the server's maxmemory policy (allkeys-lru is a
+    good fit), so max_cache_bytes has no counterpart here. Entries stored
+    with a URL are indexed in per-URL and per-domain sets for invalidation.
+
+    The result history stays in the local SQLite store (history), which
+    also maps invalidated pages to the analyses built from them.
+
+    Like SQLiteStore, the methods are blocking and TieredCache and
+    LeaseManager call them from worker threads. Redis errors are logged
+    and treated as cache misses, and leases are granted, so an unreachable
+    server costs repeated work rather than failed requests.
+
+    Requires the optional redis package and Redis 7 or later:
+        pip install redis
+    """
+
+    def __init__(self, url: str, prefix: str = "position-parser:", history: Optional[SQLiteStore] = None):
+        if redis is None:
+            raise RuntimeError("SHARED_BACKEND=redis requires the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.history = history
+        self._release = self.client.register_script(RELEASE_SCRIPT)
+        self._renew = self.client.register_script(RENEW_SCRIPT)
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    # Cache tier
+
+    def get(self, namespace: str, key: str) -> Optional[tuple[str, float]]:
+        """Return (payload, expires_at) for a live entry, or None."""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self._key("cache", namespace, key))
+        pipe.pttl(self._key("cache", namespace, key))
+        try:
+            payload, ttl = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Cache read failed: {e}")
+            return None
+        if payload is None:
+            return None
+        return payload, time.time() + ttl / 1000 if ttl > 0 else float("inf")
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        payload: str,
+        expires_at: float,
+        url: Optional[str] = None,
+    ) -> None:
+        """Insert or replace an entry, indexing it by URL and domain when given."""
+        expires_ms = int(expires_at * 1000)
+        pipe = self.client.pipeline()
+        pipe.set(self._key("cache", namespace, key), payload, pxat=expires_ms)
+        if url:
+            for index in (self._key("index", "url", url), self._key("index", "domain", url_domain(url))):
+                pipe.sadd(index, f"{namespace}:{key}")
+                # Indexes live as long as their longest-lived entry
+                pipe.pexpireat(index, expires_ms, nx=True)
+                pipe.pexpireat(index, expires_ms, gt=True)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Cache write failed: {e}")
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove an entry if present."""
+        try:
+            self.client.delete(self._key("cache", namespace, key))
+        except redis.RedisError as e:
+            logger.warning(f"Cache delete failed: {e}")
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """
+        Remove all cache entries, or only those of one namespace.
+
+        Returns:
+            Number of entries deleted
+        """
+        try:
+            if namespace:
+                return self._unlink_matching(self._key("cache", namespace, "*"))
+            count = self._unlink_matching(self._key("cache", "*"))
+            self._unlink_matching(self._key("index", "*"))
+            return count
+        except redis.RedisError as e:
+            logger.warning(f"Cache clear failed: {e}")
+            return 0
+
+    def _unlink_matching(self, pattern: str) -> int:
+        """Delete all keys matching a glob pattern, in batches; returns how many were deleted."""
+        count = 0
+        batch: list[str] = []
+        for key in self.client.scan_iter(match=pattern, count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                count += self.client.unlink(*batch)
+                batch = []
+        if batch:
+            count += self.client.unlink(*batch)
+        return count
+
+    def invalidate(
+        self,
+        url: Optional[str] = None,
+        domain: Optional[str] = None,
+        analyses_namespace: str = "analyses",
+    ) -> dict[str, Any]:
+        """
+        Drop cached pages and analyses built from a URL or any page of a domain.
+
+        Returns:
+            Dict with the deleted cache "keys" as (namespace, key) pairs and
+            the number of "results" marked invalidated in the history
+        """
+        if url:
+            indexes = [self._key("index", "url", url)]
+        elif domain:
+            domain = domain.lower().removeprefix("www.")
+            indexes = [self._key("index", "domain", domain), self._key("index", "domain", f"www.{domain}")]
+        else:
+            raise ValueError("url or domain is required")
+
+        analysis_keys, marked = self.history.invalidate_results(url, domain) if self.history else ([], 0)
+        try:
+            members = set().union(*[self.client.smembers(index) for index in indexes])
+            entries = [tuple(member.split(":", 1)) for member in members]
+            entries += [
+                (analyses_namespace, key) for key in analysis_keys if f"{analyses_namespace}:{key}" not in members
+            ]
+
+            pipe = self.client.pipeline()
+            for namespace, key in entries:
+                pipe.delete(self._key("cache", namespace, key))
+            pipe.delete(*indexes)
+            counts = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Cache invalidation failed: {e}")
+            return {"keys": [], "results": marked}
+        return {"keys": [entry for entry, count in zip(entries, counts) if count], "results": marked}
+
+    # Coordination between worker processes
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the named lease for ttl seconds, unless another owner holds it and it has not expired."""
+        try:
+            return bool(self.client.set(self._key("lease", name), owner, nx=True, px=int(ttl * 1000)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not acquire lease {name}, proceeding without it: {e}")
+            return True
+
+    def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Extend a lease by ttl seconds; False if owner no longer holds it."""
+        try:
+            return bool(self._renew(keys=[self._key("lease", name)], args=[owner, int(ttl * 1000)]))
+        except redis.RedisError as e:
+            logger.warning(f"Could not renew lease {name}: {e}")
+            return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        """Give up a lease if owner still holds it."""
+        try:
+            self._release(keys=[self._key("lease", name)], args=[owner])
+        except redis.RedisError as e:
+            logger.warning(f"Could not release lease {name}, it expires on its own: {e}")
+
+    def lease_held(self, name: str) -> bool:
+        """Whether anyone holds an unexpired lease on name."""
+        try:
+            return bool(self.client.exists(self._key("lease", name)))
+        except redis.RedisError as e:
+            logger.warning(f"Could not check lease {name}: {e}")
+            return False
+
+    def publish_invalidations(self, entries: list[tuple[Optional[str], Optional[str]]]) -> None:
+        """Log deleted cache entries (see SQLiteStore.publish_invalidations) to a capped stream."""
+        pipe = self.client.pipeline(transaction=False)
+        for namespace, key in entries:
+            pipe.xadd(
+                self._key("invalidations"),
+                {"namespace": namespace or "", "key": key or ""},
+                maxlen=INVALIDATION_LOG_LENGTH,
+                approximate=True,
+            )
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish cache invalidations: {e}")
+
+    def invalidations_since(
+        self, cursor: Optional[str]
+    ) -> tuple[str, list[tuple[Optional[str], Optional[str]]]]:
+        """Read entries logged after cursor (see SQLiteStore.invalidations_since)."""
+        stream = self._key("invalidations")
+        try:
+            if cursor is None:
+                last = self.client.xrevrange(stream, count=1)
+                return (last[0][0] if last else "0-0"), []
+
+            if not self.client.exists(stream):
+                return cursor, []
+            info = self.client.xinfo_stream(stream)
+            if _stream_id(info.get("max-deleted-entry-id", "0-0")) > _stream_id(cursor):
+                # Entries were trimmed before this process read them: drop everything to be safe
+                return info["last-generated-id"], [(None, None)]
+
+            entries = []
+            while True:
+                batch = self.client.xread({stream: cursor}, count=1000)
+                if not batch:
+                    break
+                for entry_id, fields in batch[0][1]:
+                    entries.append((fields["namespace"] or None, fields["key"] or None))
+                    cursor = entry_id
+                if len(batch[0][1]) < 1000:
+                    break
+            return cursor, entries
+        except redis.RedisError as e:
+            logger.warning(f"Could not read cache invalidations: {e}")
+            return cursor, []
+
+    def close(self) -> None:
+        """Close the connection pool."""
+        self.client.close()
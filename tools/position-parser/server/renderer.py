@@ -0,0 +1,210 @@
+"""Headless-browser rendering for pages that build their content with JavaScript."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+from metrics import RENDERS
+from scheduler import PriorityScheduler
+
+try:
+    from playwright.async_api import Error as PlaywrightError
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+logger = logging.getLogger(__name__)
+
+# Resource types never needed to read a page's text
+DEFAULT_BLOCKED_RESOURCES = ("image", "font", "media")
+
+
+class BrowserRenderer:
+    """
+    Pool of warm headless Chromium contexts for rendering JavaScript pages.
+
+    One browser is launched on start() with max_concurrency contexts ready,
+    so a render only opens a page. Taking a context from the pool bounds the
+    number of pages rendering at once. Requests for blocked resource types
+    (images, fonts, media by default) are aborted to save time and memory,
+    and contexts are replaced after max_renders_per_context pages so
+    long-lived ones do not accumulate memory or cookies. Renders waiting
+    for a context are admitted interactive first (see PriorityScheduler).
+
+    Requires the optional playwright package and its Chromium build:
+        pip install playwright && playwright install --with-deps chromium
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        timeout: float = 20.0,
+        settle_time: float = 2.0,
+        blocked_resources: tuple[str, ...] = DEFAULT_BLOCKED_RESOURCES,
+        max_renders_per_context: int = 50,
+        user_agent: Optional[str] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.settle_time = settle_time
+        self.blocked_resources = set(blocked_resources)
+        self.max_renders_per_context = max_renders_per_context
+        self.user_agent = user_agent
+        self._playwright: Any = None
+        self._browser: Any = None
+        # Pooled (context, renders, generation); generation changes when the browser is relaunched.
+        # A None context is a slot whose context could not be replaced; the next render opens one.
+        self._contexts: asyncio.Queue[Optional[tuple[Optional[Any], int, int]]] = asyncio.Queue()
+        self._generation = 0
+        self._restart_lock = asyncio.Lock()
+        self._scheduler = PriorityScheduler("render", max_concurrency, reserved=0)
+
+    @property
+    def available(self) -> bool:
+        """Whether the browser is running."""
+        return self._browser is not None
+
+    async def start(self) -> None:
+        """Launch the browser and warm up the context pool, if playwright is installed."""
+        if async_playwright is None:
+            logger.warning("Rendering is enabled but playwright is not installed; JS pages will not be rendered")
+            return
+        try:
+            self._playwright = await async_playwright().start()
+            await self._launch()
+        except PlaywrightError as e:
+            logger.warning(f"Could not launch headless Chromium, JS pages will not be rendered: {e}")
+            await self.aclose()
+            return
+        logger.info(f"Headless browser ready with {self.max_concurrency} context(s)")
+
+    async def _launch(self) -> None:
+        self._browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=["--disable-dev-shm-usage", "--disable-gpu"],
+        )
+        self._generation += 1
+        for _ in range(self.max_concurrency):
+            self._contexts.put_nowait((await self._new_context(), 0, self._generation))
+
+    async def _new_context(self) -> Any:
+        context = await self._browser.new_context(
+            user_agent=self.user_agent,
+            java_script_enabled=True,
+            service_workers="block",
+        )
+        context.set_default_navigation_timeout(self.timeout * 1000)
+        context.set_default_timeout(self.timeout * 1000)
+        await context.route("**/*", self._route)
+        return context
+
+    async def _route(self, route: Any) -> None:
+        """Abort requests for resources that do not contribute text."""
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def render(self, url: str) -> Optional[str]:
+        """
+        Load a page in the browser and return its HTML after scripts have run.
+
+        Waits for the DOM, then up to settle_time seconds for network activity
+        to stop, so content fetched by scripts has arrived.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Rendered HTML, or None if the browser is unavailable or the page failed to load
+        """
+        if self._browser is None:
+            return None
+
+        async with self._scheduler.slot():
+            return await self._render(url)
+
+    async def _render(self, url: str) -> Optional[str]:
+        entry = await self._contexts.get()
+        if entry is None:
+            self._contexts.put_nowait(None)  # Rendering was disabled while waiting; wake the next waiter
+            return None
+        context, renders, generation = entry
+        try:
+            if context is None:
+                context, renders = await self._new_context(), 0
+            page = await context.new_page()
+            try:
+                await page.goto(url, wait_until="domcontentloaded")
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=self.settle_time * 1000)
+                except PlaywrightTimeoutError:
+                    pass  # Pages that keep polling never go idle; render what is there
+                html = await page.content()
+            finally:
+                await page.close()
+            RENDERS.labels(result="ok").inc()
+            return html
+        except PlaywrightTimeoutError:
+            logger.warning(f"Timed out rendering {url} after {self.timeout}s")
+            RENDERS.labels(result="timeout").inc()
+            return None
+        except PlaywrightError as e:
+            logger.warning(f"Failed to render {url}: {e}")
+            RENDERS.labels(result="error").inc()
+            return None
+        finally:
+            await self._release(context, renders + 1, generation)
+
+    async def _release(self, context: Optional[Any], renders: int, generation: int) -> None:
+        """Return a context to the pool, replacing it if it is worn out or the browser died."""
+        if self._browser is None:
+            return
+        if not self._browser.is_connected():
+            await self._restart()
+        if generation != self._generation:
+            return  # Belonged to a browser that has been replaced
+        if context is not None and renders >= self.max_renders_per_context:
+            try:
+                await context.close()
+            except PlaywrightError as e:
+                logger.warning(f"Failed to close worn-out browser context: {e}")
+            context, renders = None, 0
+        if context is None:
+            try:
+                context = await self._new_context()
+            except PlaywrightError as e:
+                # Keep the slot; the next render that takes it tries again
+                logger.warning(f"Failed to open a browser context: {e}")
+        self._contexts.put_nowait((context, renders, generation))
+
+    async def _restart(self) -> None:
+        """Relaunch a crashed browser with a fresh context pool."""
+        async with self._restart_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            logger.warning("Headless browser disconnected, relaunching")
+            while not self._contexts.empty():
+                self._contexts.get_nowait()
+            try:
+                await self._launch()
+            except PlaywrightError as e:
+                logger.error(f"Could not relaunch headless Chromium, disabling rendering: {e}")
+                self._browser = None
+                for _ in range(self.max_concurrency):
+                    self._contexts.put_nowait(None)
+
+    async def aclose(self) -> None:
+        """Close the browser and stop playwright."""
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except PlaywrightError:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
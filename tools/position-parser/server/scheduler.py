@@ -0,0 +1,248 @@
+"""Priority scheduling of outbound scrape and Claude work, aware of Anthropic rate limits."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import AsyncIterator, Iterator, Optional
+
+import httpx
+
+from metrics import RATE_LIMIT_REMAINING, SCHEDULER_QUEUED, SCHEDULER_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Priority class and fairness group (e.g. batch job) of the work running in
+# the current task; tasks started from it inherit both
+_current_class: ContextVar[tuple[str, str]] = ContextVar("scheduler_class", default=(INTERACTIVE, ""))
+
+
+def current_priority() -> str:
+    """Priority class of the work running in the current task."""
+    return _current_class.get()[0]
+
+
+@contextmanager
+def work_class(priority: str, group: str = "") -> Iterator[None]:
+    """
+    Run the enclosed work, and tasks it starts, in a priority class.
+
+    Args:
+        priority: INTERACTIVE or BATCH
+        group: Work sharing a class is admitted round-robin across groups
+    """
+    token = _current_class.set((priority, group))
+    try:
+        yield
+    finally:
+        _current_class.reset(token)
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Convert an RFC 3339 reset time header to a time.time() timestamp."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class RateLimits:
+    """
+    Anthropic per-minute budgets, tracked from rate-limit response headers.
+
+    Every response carries anthropic-ratelimit-{requests,input-tokens,
+    output-tokens}-{limit,remaining,reset}; observe() is installed as an
+    httpx response hook to read them, and a 429's retry-after pauses all
+    admissions. Between responses, admitted calls are charged against the
+    last known budgets so a burst of admissions cannot overshoot them.
+
+    Batch work keeps headroom (a share of each limit) free for interactive
+    work; interactive work may use the whole budget.
+    """
+
+    KINDS = ("requests", "input-tokens", "output-tokens")
+
+    def __init__(self, headroom: float = 0.2):
+        self.headroom = headroom
+        # kind -> (limit, remaining, reset timestamp)
+        self._budgets: dict[str, tuple[int, float, float]] = {}
+        self._paused_until = 0.0
+
+    async def observe(self, response: httpx.Response) -> None:
+        """Record the budgets reported by a response (an httpx response event hook)."""
+        now = time.time()
+        for kind in self.KINDS:
+            limit = response.headers.get(f"anthropic-ratelimit-{kind}-limit")
+            remaining = response.headers.get(f"anthropic-ratelimit-{kind}-remaining")
+            if limit is None or remaining is None:
+                continue
+            reset = _parse_reset(response.headers.get(f"anthropic-ratelimit-{kind}-reset")) or now + 60
+            self._budgets[kind] = (int(limit), float(remaining), reset)
+            RATE_LIMIT_REMAINING.labels(kind=kind).set(float(remaining))
+
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("retry-after", "1"))
+            except ValueError:
+                retry_after = 1.0
+            self._paused_until = max(self._paused_until, now + retry_after)
+            logger.warning(f"Anthropic rate limit hit, holding new calls for {retry_after:.0f}s")
+
+    def wait_time(self, priority: str, input_tokens: float) -> float:
+        """Seconds until a call of this priority and size fits the budgets (0: admit now)."""
+        now = time.time()
+        wait = max(0.0, self._paused_until - now)
+        needed = {"requests": 1.0, "input-tokens": input_tokens, "output-tokens": 0.0}
+        for kind, (limit, remaining, reset) in self._budgets.items():
+            if reset <= now:
+                continue  # Replenished since the last response
+            reserve = self.headroom * limit if priority != INTERACTIVE else 0.0
+            # A call larger than the whole reserve-free budget is let through once the budget is full
+            if remaining - needed[kind] < reserve and remaining < limit:
+                wait = max(wait, reset - now)
+        return wait
+
+    def charge(self, input_tokens: float) -> None:
+        """Count an admitted call against the budgets until its response reports the real ones."""
+        for kind, needed in (("requests", 1.0), ("input-tokens", input_tokens)):
+            if kind in self._budgets:
+                limit, remaining, reset = self._budgets[kind]
+                self._budgets[kind] = (limit, remaining - needed, reset)
+
+
+class PriorityScheduler:
+    """
+    Admits outbound work into a fixed number of slots by priority class.
+
+    Waiting interactive work is always admitted before batch work, and
+    batch work never takes the last reserved slots, so an editor's request
+    finds a free slot at once even while bulk jobs keep every other slot
+    busy (a running call cannot be preempted, so this is what keeps
+    interactive latency flat). Within a class, waiting work is admitted
+    round-robin across groups, so one large batch job cannot starve
+    another. The class and group come from work_class() in the calling
+    task; work outside it counts as interactive.
+
+    With rate_limits, each slot is also charged its estimated input tokens
+    and admission waits while the Anthropic budgets (less the headroom
+    kept for interactive work, for batch) are exhausted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        reserved: int = 1,
+        rate_limits: Optional[RateLimits] = None,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        # Never reserve every slot: batch work must always be able to run
+        self.reserved = min(reserved, max_concurrency - 1)
+        self.rate_limits = rate_limits
+        self._active = {priority: 0 for priority in PRIORITIES}
+        # priority -> group -> waiting (future, input tokens), in arrival order
+        self._waiters: dict[str, OrderedDict[str, deque[tuple[asyncio.Future, float]]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @asynccontextmanager
+    async def slot(self, input_tokens: float = 0.0) -> AsyncIterator[None]:
+        """
+        Hold one slot for the enclosed call, waiting for admission.
+
+        Args:
+            input_tokens: Estimated input tokens of the call, for rate-limit budgeting
+        """
+        priority, group = _current_class.get()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].setdefault(group, deque()).append((future, input_tokens))
+        SCHEDULER_QUEUED.labels(resource=self.name, priority=priority).inc()
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(priority)  # Admitted just as the caller gave up
+            else:
+                self._remove(priority, group, future)
+            raise
+        SCHEDULER_WAIT_SECONDS.labels(resource=self.name, priority=priority).observe(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _release(self, priority: str) -> None:
+        self._active[priority] -= 1
+        self._dispatch()
+
+    def _remove(self, priority: str, group: str, future: asyncio.Future) -> None:
+        queue = self._waiters[priority].get(group)
+        if queue is None:
+            return
+        for entry in queue:
+            if entry[0] is future:
+                queue.remove(entry)
+                SCHEDULER_QUEUED.labels(resource=self.name, priority=priority).dec()
+                break
+        if not queue:
+            del self._waiters[priority][group]
+
+    def _dispatch(self) -> None:
+        """Admit waiting work into free slots, highest priority first."""
+        while sum(self._active.values()) < self.max_concurrency:
+            for priority in PRIORITIES:
+                groups = self._waiters[priority]
+                if not groups:
+                    continue
+                if priority != INTERACTIVE and self._active[priority] >= self.max_concurrency - self.reserved:
+                    continue
+                group, queue = next(iter(groups.items()))
+                future, input_tokens = queue[0]
+                if self.rate_limits is not None:
+                    wait = self.rate_limits.wait_time(priority, input_tokens)
+                    if wait > 0:
+                        self._retry_in(wait)
+                        return  # Lower classes must not jump ahead of a rate-limited higher one
+                queue.popleft()
+                # Round-robin: the group goes to the back of its class
+                del groups[group]
+                if queue:
+                    groups[group] = queue
+                SCHEDULER_QUEUED.labels(resource=self.name, priority=priority).dec()
+                if future.done():
+                    break  # Cancelled while waiting
+                if self.rate_limits is not None:
+                    self.rate_limits.charge(input_tokens)
+                self._active[priority] += 1
+                future.set_result(None)
+                break
+            else:
+                return  # Nothing admissible
+
+    def _retry_in(self, seconds: float) -> None:
+        """Run _dispatch again once a rate-limit window has reset."""
+        if self._timer is not None:
+            return
+        logger.info(f"{self.name}: holding queued work for {seconds:.1f}s to stay within Anthropic rate limits")
+
+        def fire() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(seconds, fire)
@@ -1,17 +1,37 @@
-"""Web scraping module using httpx and BeautifulSoup."""
+"""Web scraping module using httpx and a pluggable HTML extractor."""
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import random
+import time
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from enum import Enum
-from typing import Optional
+from typing import AsyncIterator, Optional
 from urllib.parse import urlparse
 
 import httpx
-from bs4 import BeautifulSoup
+
+from cache import PAGES, VALIDATORS, TieredCache, make_key, page_key
+from extractor import ExtractionSession, Extractor
+from metrics import RENDER_SECONDS, SCRAPE_ERRORS, SCRAPE_RETRIES, SCRAPE_SECONDS, stage
+from renderer import BrowserRenderer
+from scheduler import PriorityScheduler
 
 logger = logging.getLogger(__name__)
 
+# Content types parsed as HTML; a missing Content-Type header is also accepted
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Less extracted text than this means the page is empty or built by JavaScript
+MIN_CONTENT_CHARS = 200
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
 
 class ScrapeErrorType(Enum):
     """Types of scraping errors for user-friendly messaging."""
@@ -21,9 +41,18 @@ class ScrapeErrorType(Enum):
     NOT_FOUND = "not_found"       # 404
     INVALID_URL = "invalid_url"   # DNS failure, malformed URL
     EMPTY_CONTENT = "empty_content"  # JS-rendered or no content
+    UNSUPPORTED_CONTENT = "unsupported_content"  # Not an HTML page (PDF, image, ...)
+    RATE_LIMITED = "rate_limited"  # 429 - too many requests
     UNKNOWN = "unknown"           # Other errors
 
 
+# Errors worth retrying: the same request may well succeed shortly
+TRANSIENT_ERRORS = {ScrapeErrorType.TIMEOUT, ScrapeErrorType.SERVER_ERROR, ScrapeErrorType.RATE_LIMITED}
+
+# Errors that count towards a domain's circuit breaker
+HOST_FAILURES = TRANSIENT_ERRORS | {ScrapeErrorType.BLOCKED}
+
+
 def get_domain(url: str) -> str:
     """Extract domain from URL for user-friendly messages."""
     try:
@@ -33,6 +62,22 @@ def get_domain(url: str) -> str:
         return url
 
 
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
 def normalize_url(url: str) -> str:
     """Normalize a URL to ensure it has a scheme."""
     url = url.strip()
@@ -50,110 +95,607 @@ def normalize_url(url: str) -> str:
     return url
 
 
-async def scrape_url(url: str, timeout: float = 30.0) -> tuple[str, Optional[tuple[ScrapeErrorType, str]]]:
+class DomainThrottle:
     """
-    Scrape a URL and extract text content.
+    Per-domain politeness limiter for bulk scraping.
 
-    Args:
-        url: The URL to scrape
-        timeout: Request timeout in seconds
-
-    Returns:
-        Tuple of (content, error). If successful, error is None.
-        If failed, content is empty string and error is (error_type, domain).
+    Caps the number of concurrent requests to each domain and rate-limits
+    request starts with a token bucket per domain: up to burst requests may
+    start back to back, after which starts are spaced min_interval apart.
+    A domain can also be paused, e.g. when it answers with Retry-After.
     """
-    domain = get_domain(url)
-    logger.info(f"Scraping URL: {url}")
 
-    try:
-        async with httpx.AsyncClient(
-            timeout=timeout,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            },
-        ) as client:
-            response = await client.get(url)
-            logger.info(f"Response from {domain}: HTTP {response.status_code}")
-            response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Remove script, style, nav, footer, header elements
-        for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            element.decompose()
-
-        # Get text content
-        text = soup.get_text(separator="\n", strip=True)
-
-        # Clean up excessive whitespace
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        cleaned_text = "\n".join(lines)
-
-        # Check for empty/minimal content (likely JS-rendered)
-        if len(cleaned_text) < 200:
-            logger.warning(f"Empty/minimal content from {domain}: {len(cleaned_text)} chars (likely JS-rendered)")
-            return "", (ScrapeErrorType.EMPTY_CONTENT, domain)
-
-        logger.info(f"Successfully scraped {domain}: {len(cleaned_text)} chars")
-        return cleaned_text, None
-
-    except httpx.TimeoutException:
-        logger.error(f"Timeout scraping {url} after {timeout}s")
-        return "", (ScrapeErrorType.TIMEOUT, domain)
-    except httpx.HTTPStatusError as e:
-        status = e.response.status_code
-        logger.error(f"HTTP {status} error for {url}")
-        if status == 403:
-            return "", (ScrapeErrorType.BLOCKED, domain)
-        elif status == 404:
-            return "", (ScrapeErrorType.NOT_FOUND, domain)
-        elif status >= 500:
-            return "", (ScrapeErrorType.SERVER_ERROR, domain)
-        else:
-            return "", (ScrapeErrorType.UNKNOWN, domain)
-    except httpx.RequestError as e:
-        logger.error(f"Request error for {url}: {type(e).__name__}: {e}")
-        return "", (ScrapeErrorType.INVALID_URL, domain)
-    except Exception as e:
-        logger.exception(f"Unexpected error scraping {url}")
-        return "", (ScrapeErrorType.UNKNOWN, domain)
+    def __init__(self, max_concurrency: int = 2, min_interval: float = 1.0, burst: int = 1):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.burst = burst
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        # domain -> (tokens, time of last refill)
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._paused_until: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        """Hold one request slot for domain, waiting for politeness limits."""
+        semaphore = self._semaphores.setdefault(domain, asyncio.Semaphore(self.max_concurrency))
+        lock = self._locks.setdefault(domain, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                await self._take_token(domain)
+            yield
+
+    async def _take_token(self, domain: str) -> None:
+        while True:
+            now = time.monotonic()
+            paused = self._paused_until.get(domain, 0.0) - now
+            if paused > 0:
+                await asyncio.sleep(paused)
+                continue
+            if self.min_interval <= 0:
+                return
+
+            tokens, refilled_at = self._buckets.get(domain, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - refilled_at) / self.min_interval)
+            if tokens >= 1:
+                self._buckets[domain] = (tokens - 1, now)
+                return
+            self._buckets[domain] = (tokens, now)
+            await asyncio.sleep((1 - tokens) * self.min_interval)
+
+    def pause(self, domain: str, seconds: float) -> None:
+        """Hold back new requests to domain for the given number of seconds."""
+        until = time.monotonic() + seconds
+        if until > self._paused_until.get(domain, 0.0):
+            self._paused_until[domain] = until
+
+
+class CircuitBreaker:
+    """
+    Per-domain circuit breaker that fails fast while a host is down.
 
+    After failure_threshold consecutive failures a domain's circuit opens and
+    requests to it fail immediately with the last error. Once cooldown
+    seconds have passed, a single probe request is let through: success
+    closes the circuit, another failure re-opens it.
+    """
 
-async def scrape_urls(urls: list[str]) -> tuple[dict[str, str], list[tuple[ScrapeErrorType, str]]]:
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures: dict[str, int] = {}
+        self._last_error: dict[str, ScrapeErrorType] = {}
+        self._opened_at: dict[str, float] = {}
+        self._probing: set[str] = set()
+
+    def is_open(self, domain: str) -> bool:
+        """Whether requests to domain are failing fast, without claiming the probe."""
+        opened_at = self._opened_at.get(domain)
+        if opened_at is None:
+            return False
+        return domain in self._probing or time.monotonic() - opened_at < self.cooldown
+
+    def allow(self, domain: str) -> bool:
+        """Whether a request to domain may proceed; claims the probe when half-open."""
+        opened_at = self._opened_at.get(domain)
+        if opened_at is None:
+            return True
+        if domain in self._probing or time.monotonic() - opened_at < self.cooldown:
+            return False
+        self._probing.add(domain)
+        logger.info(f"Circuit for {domain} half-open, sending a probe request")
+        return True
+
+    def last_error(self, domain: str) -> ScrapeErrorType:
+        """The failure that opened the domain's circuit."""
+        return self._last_error.get(domain, ScrapeErrorType.UNKNOWN)
+
+    def record_success(self, domain: str) -> None:
+        if domain in self._opened_at:
+            logger.info(f"Circuit for {domain} closed")
+        self._failures.pop(domain, None)
+        self._opened_at.pop(domain, None)
+        self._probing.discard(domain)
+
+    def release_probe(self, domain: str) -> None:
+        """Give up a probe that ended without an outcome (e.g. was cancelled), so another can be sent."""
+        self._probing.discard(domain)
+
+    def record_failure(self, domain: str, error_type: ScrapeErrorType) -> None:
+        failures = self._failures.get(domain, 0) + 1
+        self._failures[domain] = failures
+        self._last_error[domain] = error_type
+        if domain in self._probing or failures >= self.failure_threshold:
+            if domain not in self._opened_at or domain in self._probing:
+                logger.warning(f"Circuit for {domain} open after {failures} failure(s), last: {error_type.value}")
+            self._opened_at[domain] = time.monotonic()
+            self._probing.discard(domain)
+
+
+def create_http_client(
+    timeout: float = 30.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+    http2: bool = False,
+) -> httpx.AsyncClient:
     """
-    Scrape multiple URLs concurrently.
+    Create the pooled HTTP client used for scraping.
 
     Args:
-        urls: List of URLs to scrape
+        timeout: Request timeout in seconds
+        max_connections: Maximum number of open connections across all hosts
+        max_keepalive_connections: Maximum number of idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept before closing
+        http2: Negotiate HTTP/2 where the server supports it (requires the h2 package)
 
     Returns:
-        Tuple of (content_map, errors).
-        content_map: Dict mapping URL to its scraped content
-        errors: List of (error_type, domain) tuples for failed scrapes
+        Configured httpx.AsyncClient
     """
-    import asyncio
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        timeout=timeout,
+        follow_redirects=True,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        headers={"User-Agent": USER_AGENT},
+    )
 
-    content_map: dict[str, str] = {}
-    errors: list[tuple[ScrapeErrorType, str]] = []
 
-    # Normalize URLs
-    normalized_urls = [normalize_url(url) for url in urls]
+class Scraper:
+    """
+    Scrapes URLs through a single pooled HTTP client.
+
+    The client is opened once (start() or "async with") and reused for every
+    request, so pages on the same host share keep-alive connections instead of
+    paying a new TCP/TLS handshake each time. With a cache, extracted text is
+    stored per URL and validators (ETag/Last-Modified, or a body hash), so an
+    unchanged page is never re-parsed. Re-scrapes send conditional requests,
+    and a 304 reuses the stored text without downloading the page again.
+
+    Bodies are streamed into the extractor with a byte cap, so a huge or
+    endless page never has to fit in memory. Transient failures are retried,
+    and a per-domain circuit breaker stops requests to hosts that are down.
+    With a renderer, pages yielding almost no text (usually built by
+    JavaScript) are rendered in a headless browser before giving up.
+    With a scheduler, downloads take a slot from it, so interactive parses
+    are served ahead of batch jobs when many pages are being fetched.
+    """
 
-    # Scrape all URLs concurrently
-    results = await asyncio.gather(
-        *[scrape_url(url) for url in normalized_urls],
-        return_exceptions=True
-    )
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        cache: Optional[TieredCache] = None,
+        extractor: Optional[Extractor] = None,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_text_chars: int = 400_000,
+        retries: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 10.0,
+        max_retry_after: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None,
+        renderer: Optional[BrowserRenderer] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self.max_bytes = max_bytes
+        self.max_text_chars = max_text_chars
+        self.cache = cache
+        self.extractor = extractor or Extractor()
+        self.renderer = renderer
+        self.scheduler = scheduler
+        self._client_options = {
+            "timeout": timeout,
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "http2": http2,
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        """Open the shared HTTP client."""
+        if self._client is None:
+            self._client = create_http_client(**self._client_options)
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> Scraper:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client."""
+        if self._client is None:
+            raise RuntimeError("Scraper has not been started")
+        return self._client
+
+    async def scrape_url(
+        self,
+        url: str,
+        throttle: Optional[DomainThrottle] = None,
+    ) -> tuple[str, Optional[tuple[ScrapeErrorType, str]]]:
+        """
+        Scrape a URL and extract text content.
+
+        Transient failures (timeouts, 5xx, 429, dropped connections) are
+        retried with jittered exponential backoff, honoring Retry-After.
+        Requests to a domain whose circuit breaker is open fail fast.
+
+        Args:
+            url: The URL to scrape
+            throttle: Optional per-domain politeness limiter
+
+        Returns:
+            Tuple of (content, error). If successful, error is None.
+            If failed, content is empty string and error is (error_type, domain).
+        """
+        domain = get_domain(url)
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow(domain):
+                logger.warning(f"Circuit open for {domain}, not scraping {url}")
+                return "", (self.breaker.last_error(domain), domain)
+
+            try:
+                content, error, retry_after = await self._scrape_once(url, domain, throttle)
+            except asyncio.CancelledError:
+                self.breaker.release_probe(domain)
+                raise
+            if error is None:
+                self.breaker.record_success(domain)
+                return content, None
+
+            error_type = error[0]
+            if error_type not in HOST_FAILURES:
+                # The host answered (e.g. 404), so it is up
+                self.breaker.record_success(domain)
+                return "", error
+            self.breaker.record_failure(domain, error_type)
+            if error_type not in TRANSIENT_ERRORS or attempt == self.retries:
+                return "", error
+
+            delay = self._retry_delay(attempt, retry_after)
+            if delay is None:
+                logger.warning(f"{domain} asked to retry after {retry_after:.0f}s, giving up on {url}")
+                return "", error
+            if retry_after is not None and throttle is not None:
+                throttle.pause(domain, retry_after)
+            SCRAPE_RETRIES.labels(error_type=error_type.value).inc()
+            logger.info(f"Retrying {url} in {delay:.1f}s after {error_type.value} (attempt {attempt + 1}/{self.retries})")
+            await asyncio.sleep(delay)
+
+        return "", error
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """
+        Seconds to wait before retry number attempt + 1.
+
+        Uses full-jitter exponential backoff, but never less than the server's
+        Retry-After. Returns None if Retry-After exceeds max_retry_after.
+        """
+        backoff = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        if retry_after is None:
+            return backoff
+        if retry_after > self.max_retry_after:
+            return None
+        return max(retry_after, backoff)
+
+    async def _scrape_once(
+        self,
+        url: str,
+        domain: str,
+        throttle: Optional[DomainThrottle],
+    ) -> tuple[str, Optional[tuple[ScrapeErrorType, str]], Optional[float]]:
+        """
+        Make one attempt at scraping a URL.
+
+        Returns:
+            Tuple of (content, error, retry_after), where retry_after is the
+            server's Retry-After in seconds, if it sent one
+        """
+        logger.info(f"Scraping URL: {url}")
+
+        try:
+            previous = await self._previous_scrape(url)
+            async with throttle.slot(domain) if throttle is not None else nullcontext():
+                async with self.scheduler.slot() if self.scheduler is not None else nullcontext():
+                    with stage("scrape", SCRAPE_SECONDS, domain=domain):
+                        cleaned_text = await self._fetch(url, previous)
+            if cleaned_text is None:
+                return "", (ScrapeErrorType.UNSUPPORTED_CONTENT, domain), None
+
+            # Check for empty/minimal content (likely JS-rendered)
+            if len(cleaned_text) < MIN_CONTENT_CHARS and self.renderer is not None and self.renderer.available:
+                logger.info(f"Minimal content from {domain} ({len(cleaned_text)} chars), rendering {url} in the browser")
+                cleaned_text = await self._render(url, domain, throttle) or cleaned_text
+            if len(cleaned_text) < MIN_CONTENT_CHARS:
+                logger.warning(f"Empty/minimal content from {domain}: {len(cleaned_text)} chars (likely JS-rendered)")
+                return "", (ScrapeErrorType.EMPTY_CONTENT, domain), None
+
+            logger.info(f"Successfully scraped {domain}: {len(cleaned_text)} chars")
+            return cleaned_text, None, None
+
+        except httpx.TimeoutException:
+            logger.error(f"Timeout scraping {url} after {self.timeout}s")
+            return "", (ScrapeErrorType.TIMEOUT, domain), None
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            logger.error(f"HTTP {status} error for {url}")
+            retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+            if status == 403:
+                return "", (ScrapeErrorType.BLOCKED, domain), None
+            elif status == 404:
+                return "", (ScrapeErrorType.NOT_FOUND, domain), None
+            elif status == 429:
+                return "", (ScrapeErrorType.RATE_LIMITED, domain), retry_after
+            elif status >= 500:
+                return "", (ScrapeErrorType.SERVER_ERROR, domain), retry_after
+            else:
+                return "", (ScrapeErrorType.UNKNOWN, domain), None
+        except (httpx.ConnectError, httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+            logger.error(f"Request error for {url}: {type(e).__name__}: {e}")
+            return "", (ScrapeErrorType.INVALID_URL, domain), None
+        except httpx.TransportError as e:
+            # Dropped connections and protocol errors mid-response are usually transient
+            logger.error(f"Connection error for {url}: {type(e).__name__}: {e}")
+            return "", (ScrapeErrorType.SERVER_ERROR, domain), None
+        except Exception as e:
+            logger.exception(f"Unexpected error scraping {url}")
+            return "", (ScrapeErrorType.UNKNOWN, domain), None
+
+    async def _render(self, url: str, domain: str, throttle: Optional[DomainThrottle]) -> str:
+        """Render a page in the headless browser and extract its text ("" if rendering failed)."""
+        async with throttle.slot(domain) if throttle is not None else nullcontext():
+            with stage("render", RENDER_SECONDS, domain=domain):
+                html = await self.renderer.render(url)
+        if html is None:
+            return ""
+        text = await self.extractor.extract(html)
+        return text[:self.max_text_chars]
+
+    async def _previous_scrape(self, url: str) -> Optional[dict]:
+        """
+        Look up the validators and extracted text from the last scrape of url.
+
+        Returns:
+            Dict with "validators" and "text", or None if either is no longer cached
+        """
+        if self.cache is None:
+            return None
+        validators = await self.cache.get(VALIDATORS, make_key(url))
+        if validators is None:
+            return None
+        page = await self.cache.get(PAGES, validators["page_key"])
+        if page is None:
+            return None
+        return {"validators": validators, "text": page["text"]}
+
+    @staticmethod
+    def _conditional_headers(previous: Optional[dict]) -> dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from a previous scrape."""
+        if previous is None:
+            return {}
+        validators = previous["validators"]
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    async def _fetch(self, url: str, previous: Optional[dict]) -> Optional[str]:
+        """
+        Download a page and extract its text.
+
+        The body is streamed and parsed as it arrives, so memory per page stays
+        bounded: reading stops at max_bytes, or as soon as the extractor has
+        collected enough text.
+
+        Returns:
+            Extracted text, or None if the response is not an HTML page
+
+        Raises:
+            httpx.HTTPStatusError: For error responses
+        """
+        domain = get_domain(url)
+        async with self.client.stream("GET", url, headers=self._conditional_headers(previous)) as response:
+            logger.info(f"Response from {domain}: HTTP {response.status_code} ({response.http_version})")
+
+            if response.status_code == 304 and previous is not None:
+                logger.info(f"{domain} not modified, reusing extracted text for {url}")
+                return previous["text"]
+            response.raise_for_status()
 
-    for url, result in zip(normalized_urls, results):
-        if isinstance(result, Exception):
-            errors.append((ScrapeErrorType.UNKNOWN, get_domain(url)))
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                logger.warning(f"Unsupported content type from {domain}: {content_type}")
+                return None
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+            # With validators the cache key is known before the body is read
+            if self.cache is not None and (etag or last_modified):
+                key = page_key(url, etag, last_modified, None, self.extractor.version)
+                cached = await self.cache.get(PAGES, key)
+                if cached is not None:
+                    logger.info(f"Using cached extraction for {url}, skipping download")
+                    body_hash = previous["validators"].get("body_hash") if previous else None
+                    await self._store_validators(url, etag, last_modified, body_hash, key)
+                    return cached["text"]
+
+            session = self.extractor.session(self.max_text_chars)
+            hasher = hashlib.sha256()
+            async for chunk in response.aiter_text():
+                hasher.update(chunk.encode())
+                await self.extractor.feed(session, chunk)
+                if response.num_bytes_downloaded >= self.max_bytes:
+                    logger.warning(f"Stopped reading {url} at the {self.max_bytes} byte limit")
+                    break
+                if session.enough:
+                    logger.info(f"Collected enough text from {url} after {response.num_bytes_downloaded} bytes")
+                    break
+
+        if self.cache is None:
+            return await self.extractor.finish(session)
+        return await self._extract(url, session, hasher.hexdigest(), etag, last_modified, previous)
+
+    async def _extract(
+        self,
+        url: str,
+        session: ExtractionSession,
+        body_hash: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        previous: Optional[dict] = None,
+    ) -> str:
+        """Finish extracting a downloaded page, reusing cached text for an unchanged page."""
+        key = page_key(url, etag, last_modified, body_hash, self.extractor.version)
+
+        # Servers without validators (or with unstable ones) still resend identical bodies
+        if previous is not None and previous["validators"].get("body_hash") == body_hash:
+            logger.info(f"Body unchanged for {url}, reusing extracted text")
+            text = previous["text"]
+            if previous["validators"]["page_key"] != key:
+                await self.cache.set(PAGES, key, {"url": url, "text": text}, url=url)
         else:
-            content, error = result
-            if error:
-                errors.append(error)
-            elif content:
-                content_map[url] = content
-
-    return content_map, errors
+            cached = await self.cache.get(PAGES, key)
+            if cached is not None:
+                logger.info(f"Using cached extraction for {url}")
+                text = cached["text"]
+            else:
+                text = await self.extractor.finish(session)
+                await self.cache.set(PAGES, key, {"url": url, "text": text}, url=url)
+
+        await self._store_validators(url, etag, last_modified, body_hash, key)
+        return text
+
+    async def _store_validators(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body_hash: Optional[str],
+        key: str,
+    ) -> None:
+        """Remember a page's validators for the next conditional request."""
+        await self.cache.set(VALIDATORS, make_key(url), {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "page_key": key,
+        }, url=url)
+
+    async def fetch_raw(
+        self,
+        url: str,
+        throttle: Optional[DomainThrottle] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Optional[tuple[int, str, str]]:
+        """
+        Download a response body as text, for link discovery, robots.txt and sitemaps.
+
+        Goes through the same client, politeness limits and scheduler as
+        scrape_url, but is neither retried nor cached. It is refused while
+        the domain's circuit is open, but never sends its probe, and its
+        outcome does not count towards the circuit breaker.
+
+        Args:
+            url: URL to download
+            throttle: Optional per-domain politeness limiter
+            max_bytes: Stop reading after this many bytes (default: max_bytes)
+
+        Returns:
+            (status code, final URL after redirects, body; "" for error
+            statuses), or None if the request failed or the circuit is open
+        """
+        domain = get_domain(url)
+        if self.breaker.is_open(domain):
+            return None
+        max_bytes = max_bytes or self.max_bytes
+        try:
+            async with throttle.slot(domain) if throttle is not None else nullcontext():
+                async with self.scheduler.slot() if self.scheduler is not None else nullcontext():
+                    async with self.client.stream("GET", url) as response:
+                        if response.status_code >= 400:
+                            return response.status_code, str(response.url), ""
+                        chunks = []
+                        async for chunk in response.aiter_text():
+                            chunks.append(chunk)
+                            if response.num_bytes_downloaded >= max_bytes:
+                                break
+                        return response.status_code, str(response.url), "".join(chunks)
+        except httpx.HTTPError as e:
+            logger.info(f"Could not fetch {url}: {type(e).__name__}: {e}")
+            return None
+
+    async def scrape_urls(
+        self,
+        urls: list[str],
+        throttle: Optional[DomainThrottle] = None,
+    ) -> tuple[dict[str, str], list[tuple[ScrapeErrorType, str]]]:
+        """
+        Scrape multiple URLs concurrently.
+
+        Args:
+            urls: List of URLs to scrape
+            throttle: Optional per-domain politeness limiter
+
+        Returns:
+            Tuple of (content_map, errors).
+            content_map: Dict mapping URL to its scraped content
+            errors: List of (error_type, domain) tuples for failed scrapes
+        """
+        content_map: dict[str, str] = {}
+        errors: list[tuple[ScrapeErrorType, str]] = []
+
+        # Normalize URLs
+        normalized_urls = [normalize_url(url) for url in urls]
+
+        # Scrape all URLs concurrently
+        results = await asyncio.gather(
+            *[self.scrape_url(url, throttle) for url in normalized_urls],
+            return_exceptions=True
+        )
+
+        for url, result in zip(normalized_urls, results):
+            if isinstance(result, Exception):
+                errors.append((ScrapeErrorType.UNKNOWN, get_domain(url)))
+            else:
+                content, error = result
+                if error:
+                    errors.append(error)
+                elif content:
+                    content_map[url] = content
+
+        for error_type, _ in errors:
+            SCRAPE_ERRORS.labels(error_type=error_type.value).inc()
+
+        return content_map, errors
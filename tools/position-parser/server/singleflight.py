@@ -0,0 +1,91 @@
+"""Single-flight coalescing of identical concurrent event streams."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One in-flight pipeline: the events it has produced so far and whether it finished."""
+
+    def __init__(self) -> None:
+        self.events: list[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Share one run of an event stream among all concurrent callers with the same key.
+
+    The first caller for a key starts the pipeline in a background task; callers
+    arriving while it runs attach to it, first receiving the events emitted so
+    far and then each new event as it arrives. The pipeline keeps running if
+    callers disconnect, so its result still reaches the cache. Once it finishes
+    the key is released and the next caller starts a fresh run.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        """Number of pipelines currently running."""
+        return len(self._flights)
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Stream the events of the pipeline for key, starting it if none is running.
+
+        Args:
+            key: Identifies identical requests
+            factory: Creates the pipeline's event iterator; only called by the first caller
+
+        Yields every event of the pipeline, in order. If the pipeline raises,
+        the exception is re-raised in every caller after its last event.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory()))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight request {key} ({len(flight.events)} event(s) so far)")
+
+        index = 0
+        while True:
+            async with flight.changed:
+                await flight.changed.wait_for(lambda: index < len(flight.events) or flight.done)
+                pending = flight.events[index:]
+            index += len(pending)
+            for event in pending:
+                yield event
+            if not pending and flight.done:
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    async def _run(self, key: str, flight: _Flight, events: AsyncIterator[Any]) -> None:
+        try:
+            async for event in events:
+                async with flight.changed:
+                    flight.events.append(event)
+                    flight.changed.notify_all()
+        except Exception as e:
+            logger.exception(f"In-flight request {key} failed")
+            flight.error = e
+        finally:
+            # Release the key before waking callers, so new requests start fresh
+            self._flights.pop(key, None)
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
@@ -0,0 +1,515 @@
+"""SQLite persistence: the cache's disk tier and the history of analysis results."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    url TEXT,
+    domain TEXT,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_entries_url ON cache_entries (url);
+CREATE INDEX IF NOT EXISTS cache_entries_domain ON cache_entries (domain);
+CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    politician_name TEXT,
+    politician_key TEXT,
+    analysis_key TEXT,
+    position_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    invalidated_at REAL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_politician ON results (politician_key, id);
+CREATE INDEX IF NOT EXISTS results_analysis ON results (analysis_key);
+
+CREATE TABLE IF NOT EXISTS result_sources (
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    content_hash TEXT,
+    PRIMARY KEY (result_id, url)
+);
+CREATE INDEX IF NOT EXISTS result_sources_url ON result_sources (url);
+CREATE INDEX IF NOT EXISTS result_sources_domain ON result_sources (domain);
+
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace TEXT,
+    key TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+# How long deleted cache keys stay in the log other worker processes read
+INVALIDATION_LOG_TTL = 86400
+
+
+def url_domain(url: str) -> str:
+    """Lowercased host of a URL, the unit of per-domain invalidation."""
+    return (urlparse(url).hostname or "").lower()
+
+
+def source_filter(url: Optional[str], domain: Optional[str]) -> tuple[str, list[str]]:
+    """SQL condition matching rows of a URL, or of a domain with or without "www."."""
+    if url:
+        return "url = ?", [url]
+    if domain:
+        domain = domain.lower().removeprefix("www.")
+        return "domain IN (?, ?)", [domain, f"www.{domain}"]
+    raise ValueError("url or domain is required")
+
+
+def politician_key(name: Optional[str]) -> Optional[str]:
+    """Normalize a politician name for case- and whitespace-insensitive lookup."""
+    if not name:
+        return None
+    return " ".join(name.split()).casefold()
+
+
+class SQLiteStore:
+    """
+    Embedded SQLite database (WAL mode) shared by the cache and the result history.
+
+    cache_entries replaces the old JSON-file-per-key disk tier: entries carry
+    the URL they were scraped from, so pages can be invalidated per URL or
+    domain, and eviction picks the least recently read rows once the total
+    payload size exceeds the cap. results keeps every analysis with its
+    politician and sources, so the latest result for a politician and the
+    history per URL or domain can be queried.
+
+    The cache-tier methods (get, set, delete, clear) are blocking and are
+    called from worker threads by TieredCache. The query methods are
+    coroutines that run in a worker thread. Each thread uses its own
+    connection; WAL lets readers proceed while one writer commits.
+
+    Several worker processes on one host can share the file: leases and
+    the log of deleted cache keys coordinate them (see LeaseManager and
+    TieredCache).
+    """
+
+    def __init__(self, path: str = "./cache/store.db", max_cache_bytes: int = 512 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_cache_bytes = max_cache_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: set[sqlite3.Connection] = set()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._cache_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use (and again after close())."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn not in self._connections:
+            # Only this thread uses the connection; close() may close it from another
+            conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.add(conn)
+        return conn
+
+    # Cache tier (blocking; TieredCache calls these from worker threads)
+
+    def get(self, namespace: str, key: str) -> Optional[tuple[str, float]]:
+        """Return (payload, expires_at) for a live entry, or None."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT payload, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        if row["expires_at"] < time.time():
+            self.delete(namespace, key)
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (time.time(), namespace, key),
+            )
+        return row["payload"], row["expires_at"]
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        payload: str,
+        expires_at: float,
+        url: Optional[str] = None,
+    ) -> None:
+        """Insert or replace an entry, then evict old entries if over the size cap."""
+        conn = self._connect()
+        size = len(payload)
+        try:
+            with conn:
+                previous = conn.execute(
+                    "SELECT size FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries "
+                    "(namespace, key, payload, expires_at, accessed_at, size, url, domain) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (namespace, key, payload, expires_at, time.time(), size, url, url_domain(url) if url else None),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._cache_size += size - (previous["size"] if previous else 0)
+            if self._cache_size > self.max_cache_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries, then least recently read ones until under 90% of the cap."""
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            target = int(self.max_cache_bytes * 0.9)
+            victims = []
+            for row in conn.execute("SELECT namespace, key, size FROM cache_entries ORDER BY accessed_at"):
+                if total <= target:
+                    break
+                victims.append((row["namespace"], row["key"]))
+                total -= row["size"]
+            conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        self._cache_size = total
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove an entry if present."""
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ? RETURNING size", (namespace, key)
+            ).fetchone()
+        if row is not None:
+            with self._lock:
+                self._cache_size -= row["size"]
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """
+        Remove all cache entries, or only those of one namespace.
+
+        Returns:
+            Number of entries deleted
+        """
+        conn = self._connect()
+        with conn:
+            if namespace:
+                count = conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,)).rowcount
+            else:
+                count = conn.execute("DELETE FROM cache_entries").rowcount
+            size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        with self._lock:
+            self._cache_size = size
+        return count
+
+    def invalidate(
+        self,
+        url: Optional[str] = None,
+        domain: Optional[str] = None,
+        analyses_namespace: str = "analyses",
+    ) -> dict[str, Any]:
+        """
+        Drop cached pages and analyses built from a URL or any page of a domain.
+
+        Results stay in the history but are marked invalidated.
+
+        Args:
+            url: Exact page URL
+            domain: Host name; "example.com" also matches "www.example.com"
+            analyses_namespace: Cache namespace holding analyses, keyed by results.analysis_key
+
+        Returns:
+            Dict with the deleted cache "keys" as (namespace, key) pairs and
+            the number of "results" marked invalidated
+        """
+        analysis_keys, marked = self.invalidate_results(url, domain)
+        where, args = source_filter(url, domain)
+
+        conn = self._connect()
+        with conn:
+            deleted = [
+                (row["namespace"], row["key"], row["size"])
+                for row in conn.execute(
+                    f"DELETE FROM cache_entries WHERE {where} RETURNING namespace, key, size", args
+                )
+            ]
+            for key in analysis_keys:
+                row = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ? RETURNING namespace, key, size",
+                    (analyses_namespace, key),
+                ).fetchone()
+                if row is not None:
+                    deleted.append((row["namespace"], row["key"], row["size"]))
+
+        with self._lock:
+            self._cache_size -= sum(size for _, _, size in deleted)
+        return {"keys": [(namespace, key) for namespace, key, _ in deleted], "results": marked}
+
+    def invalidate_results(self, url: Optional[str] = None, domain: Optional[str] = None) -> tuple[list[str], int]:
+        """
+        Mark results built from a URL or any page of a domain as invalidated.
+
+        Returns:
+            Analysis cache keys of those results, and the number of results newly marked
+        """
+        where, args = source_filter(url, domain)
+        conn = self._connect()
+        with conn:
+            result_ids = [
+                row["result_id"]
+                for row in conn.execute(f"SELECT DISTINCT result_id FROM result_sources WHERE {where}", args)
+            ]
+            placeholders = ",".join("?" * len(result_ids))
+            analysis_keys = [
+                row["analysis_key"]
+                for row in conn.execute(
+                    f"SELECT DISTINCT analysis_key FROM results WHERE id IN ({placeholders})", result_ids
+                )
+                if row["analysis_key"]
+            ]
+            marked = conn.execute(
+                f"UPDATE results SET invalidated_at = ? WHERE id IN ({placeholders}) AND invalidated_at IS NULL",
+                [time.time(), *result_ids],
+            ).rowcount
+        return analysis_keys, marked
+
+    # Coordination between worker processes (blocking; called from worker threads)
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take the named lease for ttl seconds, unless another owner holds it and it has not expired."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row["owner"] == owner
+
+    def renew_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Extend a lease by ttl seconds; False if owner no longer holds it."""
+        conn = self._connect()
+        with conn:
+            return conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?", (time.time() + ttl, name, owner)
+            ).rowcount == 1
+
+    def release_lease(self, name: str, owner: str) -> None:
+        """Give up a lease if owner still holds it."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def lease_held(self, name: str) -> bool:
+        """Whether anyone holds an unexpired lease on name."""
+        row = self._connect().execute(
+            "SELECT 1 FROM leases WHERE name = ? AND expires_at >= ?", (name, time.time())
+        ).fetchone()
+        return row is not None
+
+    def publish_invalidations(self, entries: list[tuple[Optional[str], Optional[str]]]) -> None:
+        """
+        Log deleted cache entries for other worker processes to drop from memory.
+
+        Args:
+            entries: (namespace, key) pairs; a None key stands for the whole
+                namespace, a None namespace for every entry
+        """
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO cache_invalidations (namespace, key, created_at) VALUES (?, ?, ?)",
+                [(namespace, key, now) for namespace, key in entries],
+            )
+            conn.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (now - INVALIDATION_LOG_TTL,))
+
+    def invalidations_since(
+        self, cursor: Optional[str]
+    ) -> tuple[str, list[tuple[Optional[str], Optional[str]]]]:
+        """
+        Read entries logged by publish_invalidations after cursor.
+
+        Args:
+            cursor: Position returned by the previous call; None starts at the end of the log
+
+        Returns:
+            The new cursor and the logged (namespace, key) pairs; a single
+            (None, None) if entries after cursor were already pruned
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cache_invalidations'").fetchone()
+        last = row["seq"] if row else 0
+        if cursor is None:
+            return str(last), []
+
+        position = int(cursor)
+        rows = conn.execute(
+            "SELECT id, namespace, key FROM cache_invalidations WHERE id > ? ORDER BY id", (position,)
+        ).fetchall()
+        if last > position and (not rows or rows[0]["id"] > position + 1):
+            return str(last), [(None, None)]
+        if not rows:
+            return cursor, []
+        return str(rows[-1]["id"]), [(row["namespace"], row["key"]) for row in rows]
+
+    # Result history (coroutines; the queries run in worker threads)
+
+    async def record_result(
+        self,
+        result: dict[str, Any],
+        sources: dict[str, str],
+        analysis_key: Optional[str] = None,
+    ) -> int:
+        """
+        Add an analysis result to the history.
+
+        Args:
+            result: Analysis result in the ParserResponse shape
+            sources: Content hash of each source, keyed by URL
+            analysis_key: Analysis cache key, so invalidation can drop the cached analysis
+
+        Returns:
+            ID of the stored result
+        """
+        return await asyncio.to_thread(self._record_result, result, sources, analysis_key)
+
+    def _record_result(self, result: dict[str, Any], sources: dict[str, str], analysis_key: Optional[str]) -> int:
+        conn = self._connect()
+        name = result.get("politician_name")
+        with conn:
+            result_id = conn.execute(
+                "INSERT INTO results (politician_name, politician_key, analysis_key, position_count, created_at, result) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, politician_key(name), analysis_key, len(result.get("positions", [])), time.time(), json.dumps(result)),
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO result_sources (result_id, url, domain, content_hash) VALUES (?, ?, ?, ?)",
+                [(result_id, url, url_domain(url), digest) for url, digest in sources.items()],
+            )
+        return result_id
+
+    async def latest_result(self, politician_name: str) -> Optional[dict[str, Any]]:
+        """Most recent result for a politician (name matched case-insensitively), or None."""
+        rows = await asyncio.to_thread(self._history, politician_name, None, None, None, 1, True)
+        return rows[0] if rows else None
+
+    async def history(
+        self,
+        politician_name: Optional[str] = None,
+        url: Optional[str] = None,
+        domain: Optional[str] = None,
+        before: Optional[int] = None,
+        limit: int = 20,
+        include_results: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Page through stored results, newest first.
+
+        Args:
+            politician_name: Only results for this politician
+            url: Only results with this source URL
+            domain: Only results with a source on this domain
+            before: Only results with an ID below this one (the previous page's cursor)
+            limit: Maximum number of results
+            include_results: Include each full result, not just its summary
+
+        Returns:
+            Result summaries (with the full result when requested)
+        """
+        return await asyncio.to_thread(self._history, politician_name, url, domain, before, limit, include_results)
+
+    def _history(
+        self,
+        politician_name: Optional[str],
+        url: Optional[str],
+        domain: Optional[str],
+        before: Optional[int],
+        limit: int,
+        include_results: bool,
+    ) -> list[dict[str, Any]]:
+        clauses, args = [], []
+        if politician_name:
+            clauses.append("politician_key = ?")
+            args.append(politician_key(politician_name))
+        if url:
+            clauses.append("id IN (SELECT result_id FROM result_sources WHERE url = ?)")
+            args.append(url)
+        if domain:
+            domain = domain.lower().removeprefix("www.")
+            clauses.append("id IN (SELECT result_id FROM result_sources WHERE domain IN (?, ?))")
+            args += [domain, f"www.{domain}"]
+        if before is not None:
+            clauses.append("id < ?")
+            args.append(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        conn = self._connect()
+        rows = conn.execute(f"SELECT * FROM results {where} ORDER BY id DESC LIMIT ?", [*args, limit]).fetchall()
+        sources: dict[int, list[str]] = {row["id"]: [] for row in rows}
+        if sources:
+            placeholders = ",".join("?" * len(sources))
+            for source in conn.execute(
+                f"SELECT result_id, url FROM result_sources WHERE result_id IN ({placeholders})", list(sources)
+            ):
+                sources[source["result_id"]].append(source["url"])
+
+        entries = []
+        for row in rows:
+            entry = {
+                "id": row["id"],
+                "politician_name": row["politician_name"],
+                "position_count": row["position_count"],
+                "created_at": row["created_at"],
+                "invalidated_at": row["invalidated_at"],
+                "source_urls": sources[row["id"]],
+            }
+            if include_results:
+                entry["result"] = json.loads(row["result"])
+            entries.append(entry)
+        return entries
+
+    def close(self) -> None:
+        """Close every thread's connection."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
@@ -0,0 +1,230 @@
+"""Pre-analysis scoring of sources for policy content, so irrelevant pages skip the extraction call."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+from typing import TYPE_CHECKING, Collection, Optional
+
+import anthropic
+
+from cache import TRIAGE, TieredCache, content_hash, make_key
+from metrics import TRIAGE_SOURCES
+from prompts import TRIAGE_PROMPT
+
+if TYPE_CHECKING:
+    from analyzer import AsyncAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Triage modes
+OFF = "off"
+HEURISTIC = "heuristic"
+MODEL = "model"
+MODES = (OFF, HEURISTIC, MODEL)
+
+# Changes whenever the triage prompt changes, invalidating cached scores
+PROMPT_VERSION = hashlib.sha256(TRIAGE_PROMPT.encode()).hexdigest()[:12]
+
+# Scores run from 0 (no policy content) to MAX_SCORE (dense policy content)
+MAX_SCORE = 10.0
+
+# Words that state a position or a concrete measure
+STANCE_PATTERN = re.compile(
+    r"\b(?:support(?:s|ed|ing)?|oppos(?:e|es|ed|ing)|against|fight(?:s|ing)? (?:for|to)"
+    r"|vot(?:e|es|ed|ing) (?:for|against|to)|(?:co)?sponsor(?:s|ed)?|bills?|legislation|repeal\w*"
+    r"|ban(?:s|ned|ning)?|legaliz\w*|reform\w*|fund(?:s|ed|ing)?|defund\w*|expand\w*|protect\w*"
+    r"|lower(?:s|ing)?|cut(?:s|ting)?|rais(?:e|es|ing)|invest(?:s|ed|ing)?|will (?:push|work))\b",
+    re.IGNORECASE,
+)
+
+# Policy topics
+TOPIC_PATTERN = re.compile(
+    r"\b(?:health ?care|medicare|medicaid|prescription drugs?|abortion|pro-life|pro-choice|roe"
+    r"|guns?|firearms?|second amendment|background checks?|immigra\w*|border|citizenship|asylum"
+    r"|climate|energy|emissions|environment(?:al)?|education|schools?|tuition|student loans?"
+    r"|minimum wage|tax(?:es)?|tariffs?|economy|jobs|veterans|police|policing|criminal justice"
+    r"|death penalty|same-sex|cannabis|marijuana|social security|housing|infrastructure|trade"
+    r"|military|defense|national security|foreign policy|voting rights|civil rights|budget"
+    r"|deficit|inflation|wages)\b",
+    re.IGNORECASE,
+)
+
+# Policy words per 100 words at which a page scores MAX_SCORE; issue pages run
+# around 10-15, bios, donate pages and news listings below 3
+SATURATION_DENSITY = 12.0
+
+# Words per scoring window; a page scores as its densest window, so one
+# positions section in a long article is not diluted by the rest of it
+WINDOW_WORDS = 250
+
+
+def densest_window(words: list[str]) -> tuple[float, int]:
+    """
+    Find the window of WINDOW_WORDS words with the most stance and topic words.
+
+    Windows overlap by half. Returns (policy words per 100 words, index of
+    the window's first word).
+    """
+    step = WINDOW_WORDS // 2
+    best = (0.0, 0)
+    for start in range(0, max(1, len(words) - step), step):
+        window = " ".join(words[start:start + WINDOW_WORDS])
+        hits = len(STANCE_PATTERN.findall(window)) + len(TOPIC_PATTERN.findall(window))
+        best = max(best, (100 * hits / min(WINDOW_WORDS, len(words) - start), -start))
+    return best[0], -best[1]
+
+
+def heuristic_score(text: str) -> float:
+    """
+    Score text for policy content from the density of stance and topic words.
+
+    The density is taken over the densest window of the page (see
+    densest_window), not the whole page.
+
+    Args:
+        text: Scraped text of one source
+
+    Returns:
+        Score from 0 to MAX_SCORE
+    """
+    words = text.split()
+    if not words:
+        return 0.0
+    density, _ = densest_window(words)
+    return round(min(MAX_SCORE, MAX_SCORE * density / SATURATION_DENSITY), 1)
+
+
+def excerpt(text: str, max_chars: int) -> str:
+    """
+    Shorten text for model triage: its start, plus its densest window if that lies further in.
+
+    Args:
+        text: Scraped text of one source
+        max_chars: Length limit of the excerpt
+
+    Returns:
+        text itself if it fits, otherwise an excerpt of at most about max_chars
+    """
+    if len(text) <= max_chars:
+        return text
+    words = text.split()
+    _, start = densest_window(words)
+    window = " ".join(words[start:start + WINDOW_WORDS])
+    head = text[:max_chars // 2]
+    if window[:50] in head:
+        return text[:max_chars]
+    return f"{head}\n[...]\n{window[:max_chars - len(head)]}"
+
+
+class SourceTriage:
+    """
+    Scores each source for policy density and drops irrelevant ones before analysis.
+
+    In heuristic mode sources are scored locally from the density of stance
+    and topic words in their densest section. In model mode a small, fast
+    model reads an excerpt of every source (its start and densest section)
+    in one call (AsyncAnalyzer.score_sources); its scores are cached per
+    content hash, and sources fall back to the heuristic if the call fails.
+
+    Sources scoring below min_score are dropped; the rest are ordered by
+    score so the densest come first (and land in the first chunk of a
+    map-reduce analysis). The best-scoring source is always kept, so a
+    request is never left without anything to analyze, and single-source
+    requests are not scored at all. Sources passed as keep (the URLs a user
+    asked for) are never dropped: below min_score they are only demoted
+    behind the sources that pass.
+    """
+
+    def __init__(
+        self,
+        mode: str = HEURISTIC,
+        min_score: float = 2.0,
+        analyzer: Optional[AsyncAnalyzer] = None,
+        model: Optional[str] = None,
+        excerpt_chars: int = 4000,
+        cache: Optional[TieredCache] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown triage mode {mode!r}, expected one of {MODES}")
+        if mode == MODEL and (analyzer is None or model is None):
+            raise ValueError("Model triage needs an analyzer and a model")
+        self.mode = mode
+        self.min_score = min_score
+        self.analyzer = analyzer
+        self.model = model
+        self.excerpt_chars = excerpt_chars
+        self.cache = cache
+
+    async def filter(
+        self,
+        content_map: dict[str, str],
+        keep: Collection[str] = (),
+    ) -> tuple[dict[str, str], list[str]]:
+        """
+        Drop sources without policy content and order the rest by score.
+
+        Args:
+            content_map: Dict mapping URLs to their scraped text content
+            keep: URLs that must not be dropped, only demoted
+
+        Returns:
+            (kept content map, best source first; URLs of dropped sources)
+        """
+        if self.mode == OFF or len(content_map) < 2:
+            return content_map, []
+
+        scores = await self.score(content_map)
+        ranked = sorted(content_map, key=lambda url: scores[url], reverse=True)
+        passed = [url for url in ranked if scores[url] >= self.min_score] or ranked[:1]
+        demoted = [url for url in ranked if url not in passed and url in keep]
+        kept = passed + demoted
+        dropped = [url for url in ranked if url not in kept]
+
+        TRIAGE_SOURCES.labels(mode=self.mode, result="kept").inc(len(passed))
+        TRIAGE_SOURCES.labels(mode=self.mode, result="demoted").inc(len(demoted))
+        TRIAGE_SOURCES.labels(mode=self.mode, result="dropped").inc(len(dropped))
+        if demoted:
+            logger.info(
+                f"Triage ({self.mode}) demoted {len(demoted)} requested source(s) without policy content: "
+                + ", ".join(f"{url} ({scores[url]})" for url in demoted)
+            )
+        if dropped:
+            saved = sum(len(content_map[url]) for url in dropped)
+            logger.info(
+                f"Triage ({self.mode}) dropped {len(dropped)} of {len(content_map)} source(s) "
+                f"without policy content ({saved} chars): "
+                + ", ".join(f"{url} ({scores[url]})" for url in dropped)
+            )
+        return {url: content_map[url] for url in kept}, dropped
+
+    async def score(self, content_map: dict[str, str]) -> dict[str, float]:
+        """Score every source from 0 to MAX_SCORE for policy content."""
+        heuristic = {url: heuristic_score(content) for url, content in content_map.items()}
+        if self.mode != MODEL:
+            return heuristic
+
+        excerpts = {url: excerpt(content, self.excerpt_chars) for url, content in content_map.items()}
+        keys = {url: make_key(content_hash(text), PROMPT_VERSION, self.model) for url, text in excerpts.items()}
+        scores: dict[str, float] = {}
+        if self.cache is not None:
+            entries = await asyncio.gather(*[self.cache.get(TRIAGE, keys[url]) for url in content_map])
+            scores = {url: entry for url, entry in zip(content_map, entries) if entry is not None}
+
+        pending = [url for url in content_map if url not in scores]
+        if pending:
+            try:
+                scored = await self.analyzer.score_sources({url: excerpts[url] for url in pending}, self.model)
+            except anthropic.APIError as e:
+                logger.warning(f"Triage call failed, scoring sources heuristically: {type(e).__name__}: {e}")
+                scored = {}
+            for url in pending:
+                if url in scored:
+                    scores[url] = scored[url]
+                    if self.cache is not None:
+                        await self.cache.set(TRIAGE, keys[url], scored[url], url=url)
+                else:
+                    scores[url] = heuristic[url]
+        return scores